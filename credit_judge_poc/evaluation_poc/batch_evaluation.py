@@ -0,0 +1,376 @@
+# Batch evaluation of the automated judge against human gold standard reviews.
+# Loads every (AI report, gold review) pair in parallel, judges each report, and
+# aggregates rating concurrence, per-section score distributions and judge-vs-human
+# score correlation. Per-section rows are written to a columnar file for regression
+# testing prompt changes.
+
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+from credit_judge_poc.src.config import DEFAULT_AI_REPORT_DIR, DEFAULT_GOLD_STANDARD_DIR, DEFAULT_OUTPUT_DIR
+from credit_judge_poc.src.core.credit_evaluator import JUDGE_MODES, evaluate_reports, get_report_id
+from credit_judge_poc.src.llm_interface.judge_llm_handler import get_judge_backend
+from credit_judge_poc.src.processing.rating_scale import AGREEING_CODES, CONCURRENCE_SCALE, UNRATED, agreement_summary
+from credit_judge_poc.src.processing.report_parser import parse_annotated_json
+
+OUTPUT_FORMATS = ("auto", "parquet", "arrow", "csv")
+
+# Row label used for the overall assessment alongside the section rows.
+OVERALL_SECTION = "Overall"
+
+# Column order of the per-section results table.
+RESULT_COLUMNS = (
+    "pair_id", "report_id", "ticker", "review_file", "section",
+    "human_score", "judge_score", "human_concurrence", "judge_concurrence"
+)
+
+def _load_json(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_annotated_json(f.read())
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Skipping {path}: {e}")
+        return None
+
+def load_json_files(paths: list, workers: int = 16) -> list:
+    """
+    Loads JSON files on a thread pool. Unreadable files load as None.
+
+    Returns:
+        list: Parsed documents in the order of `paths`.
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(_load_json, paths, chunksize=64))
+
+def _review_ticker(review: dict) -> str:
+    # reviewedReportId looks like "DKNG-AI-Report-2024-Q3".
+    return str(review.get("reviewedReportId", "")).split("-", 1)[0].upper()
+
+def load_pairs(reports_dir: str = DEFAULT_AI_REPORT_DIR, reviews_dirs=(DEFAULT_GOLD_STANDARD_DIR,), workers: int = 16) -> list:
+    """
+    Loads every AI report and gold review and pairs each review with the
+    report it reviewed.
+
+    A review is matched on its `reviewedReportId` (see get_report_id). If
+    the id is missing or names no loaded report, the review falls back to
+    its ticker, but only when exactly one report has that ticker; reviews
+    that would be ambiguous are skipped rather than paired with every
+    report of the company. A report with several reviews yields one pair
+    per review.
+
+    Args:
+        reports_dir (str): Directory of AI report `*.json` files.
+        reviews_dirs (iterable): Directories of gold review `*.json` files.
+        workers (int): Threads used to load files.
+
+    Returns:
+        list: (report, review, review_path) tuples, in report order.
+    """
+    report_paths = sorted(glob.glob(os.path.join(reports_dir, "*.json")))
+    review_paths = sorted(path for directory in reviews_dirs for path in glob.glob(os.path.join(directory, "*.json")))
+    documents = load_json_files(report_paths + review_paths, workers)
+    reports = [report for report in documents[:len(report_paths)] if isinstance(report, dict)]
+    reviews = documents[len(report_paths):]
+
+    reports_by_id = {}
+    reports_by_ticker = {}
+    for position, report in enumerate(reports):
+        reports_by_id.setdefault(get_report_id(report), position)
+        reports_by_ticker.setdefault(str(report.get("tickerSymbol", "")).upper(), []).append(position)
+
+    matched = [[] for _ in reports]
+    ambiguous = 0
+    for path, review in zip(review_paths, reviews):
+        if not isinstance(review, dict):
+            continue
+        position = reports_by_id.get(review.get("reviewedReportId"))
+        if position is None:
+            candidates = reports_by_ticker.get(_review_ticker(review), [])
+            if len(candidates) > 1:
+                ambiguous += 1
+                continue
+            position = candidates[0] if candidates else None
+        if position is not None:
+            matched[position].append((review, path))
+
+    if ambiguous:
+        print(f"Skipped {ambiguous} reviews whose reviewedReportId matches no report and whose ticker has several")
+    return [(report, review, path) for report, reviews_of in zip(reports, matched) for review, path in reviews_of]
+
+def _score(value) -> float:
+    """Numeric score, or NaN for missing or non-numeric values such as "N/A"."""
+    if isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _section_scores(review: dict) -> dict:
+    scores = {OVERALL_SECTION: _score((review.get("overallAssessment") or {}).get("overallScore"))}
+    for section in review.get("sectionReviews") or []:
+        if isinstance(section, dict) and section.get("sectionName"):
+            scores[section["sectionName"]] = _score(section.get("quantitativeScore"))
+    return scores
+
+def build_results_table(pairs: list, judge_reviews: dict) -> dict:
+    """
+    Flattens pairs into a columnar table with one row per (pair, section),
+    plus an OVERALL_SECTION row per pair.
+
+    Args:
+        pairs (list): (report, review, review_path) tuples from load_pairs.
+        judge_reviews (dict): report_id -> judge review table, or None where
+            judging failed.
+
+    Returns:
+        dict: Column name -> list (scores as float arrays), see RESULT_COLUMNS.
+    """
+    columns = {name: [] for name in RESULT_COLUMNS}
+    for pair_id, (report, review, review_path) in enumerate(pairs):
+        report_id = get_report_id(report)
+        judge_review = judge_reviews.get(report_id) or {}
+        human_scores = _section_scores(review)
+        judge_scores = _section_scores(judge_review)
+        human_concurrence = (review.get("overallAssessment") or {}).get("ratingConcurrence")
+        judge_concurrence = (judge_review.get("overallAssessment") or {}).get("ratingConcurrence")
+
+        for section, human_score in human_scores.items():
+            columns["pair_id"].append(pair_id)
+            columns["report_id"].append(report_id)
+            columns["ticker"].append(report.get("tickerSymbol"))
+            columns["review_file"].append(os.path.basename(review_path))
+            columns["section"].append(section)
+            columns["human_score"].append(human_score)
+            columns["judge_score"].append(judge_scores.get(section, np.nan))
+            columns["human_concurrence"].append(human_concurrence)
+            columns["judge_concurrence"].append(judge_concurrence)
+
+    columns["human_score"] = np.array(columns["human_score"], dtype=np.float64)
+    columns["judge_score"] = np.array(columns["judge_score"], dtype=np.float64)
+    return columns
+
+def _distribution(values: np.ndarray) -> dict:
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"count": 0}
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 3),
+        "std": round(float(values.std()), 3),
+        "min": float(values.min()),
+        "p25": float(p25),
+        "median": float(median),
+        "p75": float(p75),
+        "max": float(values.max()),
+    }
+
+def _correlation(human: np.ndarray, judge: np.ndarray) -> dict:
+    mask = np.isfinite(human) & np.isfinite(judge)
+    human, judge = human[mask], judge[mask]
+    result = {"pairs": int(mask.sum()), "pearson": None, "spearman": None, "meanAbsoluteError": None}
+    if len(human):
+        result["meanAbsoluteError"] = round(float(np.abs(human - judge).mean()), 3)
+    # Correlation is undefined for fewer than three points or a constant side.
+    if len(human) >= 3 and human.std() > 0 and judge.std() > 0:
+        result["pearson"] = round(float(stats.pearsonr(human, judge)[0]), 4)
+        result["spearman"] = round(float(stats.spearmanr(human, judge)[0]), 4)
+    return result
+
+def _concurrence_summary(codes: np.ndarray) -> dict:
+    parsed = codes[codes != UNRATED]
+    counts = np.bincount(parsed, minlength=len(CONCURRENCE_SCALE))
+    return {
+        "count": int(len(parsed)),
+        "unparsed": int(len(codes) - len(parsed)),
+        "concurrenceRate": round(float(np.isin(parsed, AGREEING_CODES).mean()), 4) if len(parsed) else None,
+        "labels": {level: int(count) for level, count in zip(CONCURRENCE_SCALE.levels, counts) if count}
+    }
+
+def compute_metrics(table: dict) -> dict:
+    """
+    Aggregates a results table.
+
+    Returns:
+        dict: `ratingConcurrence` (human and judge label counts on
+        CONCURRENCE_SCALE, the share agreeing with the AI's rating, and how
+        often and how far the judge's label differs from the human's), `sections` (per-section human and judge score
+        distributions with their correlation) and `overall` (correlation
+        over every section score).
+    """
+    sections = np.array(table["section"], dtype=object)
+    human = table["human_score"]
+    judge = table["judge_score"]
+
+    # Concurrence is per pair, so read it from the overall rows only.
+    overall_rows = np.flatnonzero(sections == OVERALL_SECTION)
+    human_codes = CONCURRENCE_SCALE.codes([table["human_concurrence"][i] for i in overall_rows])
+    judge_codes = CONCURRENCE_SCALE.codes([table["judge_concurrence"][i] for i in overall_rows])
+    judge_vs_human = agreement_summary(judge_codes, human_codes, CONCURRENCE_SCALE)
+
+    names, inverse = np.unique(sections.astype(str), return_inverse=True)
+    section_metrics = {}
+    for i, name in enumerate(names):
+        rows = inverse == i
+        section_metrics[name] = {
+            "human": _distribution(human[rows]),
+            "judge": _distribution(judge[rows]),
+            "correlation": _correlation(human[rows], judge[rows])
+        }
+
+    section_rows = sections != OVERALL_SECTION
+    return {
+        "pairs": int(len(overall_rows)),
+        "ratingConcurrence": {
+            "human": _concurrence_summary(human_codes),
+            "judge": _concurrence_summary(judge_codes),
+            "judgeMatchesHuman": judge_vs_human.get("exactMatchRate"),
+            "judgeVsHuman": judge_vs_human
+        },
+        "sections": section_metrics,
+        "overall": _correlation(human[section_rows], judge[section_rows])
+    }
+
+def write_table(table: dict, path_without_extension: str, output_format: str = "auto") -> str:
+    """
+    Writes a columnar table as Parquet or Arrow IPC (both need the optional
+    `pyarrow` package) or CSV. "auto" picks Parquet when pyarrow is
+    installed and CSV otherwise.
+
+    Returns:
+        str: The path written.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
+
+    if output_format != "csv":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            if output_format != "auto":
+                raise ImportError(f"Writing {output_format} requires the 'pyarrow' package (pip install pyarrow).")
+            output_format = "csv"
+
+    if output_format == "csv":
+        path = path_without_extension + ".csv"
+        names = list(table)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(zip(*(_csv_column(table[name]) for name in names)))
+        return path
+
+    arrow_table = pa.table({name: pa.array(values, from_pandas=True) for name, values in table.items()})
+    if output_format == "arrow":
+        import pyarrow.feather as feather
+        path = path_without_extension + ".arrow"
+        feather.write_feather(arrow_table, path)
+    else:
+        import pyarrow.parquet as pq
+        path = path_without_extension + ".parquet"
+        pq.write_table(arrow_table, path)
+    return path
+
+def _csv_column(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        # Empty cells for NaN; integral scores without a trailing ".0".
+        return ["" if not np.isfinite(v) else (int(v) if v.is_integer() else v) for v in values.tolist()]
+    return ["" if v is None else v for v in values]
+
+def run_batch_evaluation(reports_dir: str = DEFAULT_AI_REPORT_DIR, reviews_dirs=(DEFAULT_GOLD_STANDARD_DIR,),
+                         output_dir: str = DEFAULT_OUTPUT_DIR, backend=None, mode: str = "report",
+                         workers: int = 16, output_format: str = "auto") -> dict:
+    """
+    Loads and pairs reports with gold reviews, judges every distinct report,
+    and writes `batch_evaluation.<ext>` (per-section rows) and
+    `batch_evaluation_summary.json` (aggregate metrics) to `output_dir`.
+
+    Returns:
+        dict: The aggregate metrics, with the output paths and timings.
+    """
+    timings = {}
+    start = time.perf_counter()
+    pairs = load_pairs(reports_dir, reviews_dirs, workers)
+    timings["loadSeconds"] = round(time.perf_counter() - start, 3)
+    print(f"Loaded {len(pairs)} (AI report, gold review) pairs in {timings['loadSeconds']:.2f}s")
+    if not pairs:
+        raise ValueError(f"No gold review could be paired with an AI report in {reports_dir} by its reviewedReportId "
+                         f"(or, failing that, by an unambiguous ticker).")
+
+    # A report reviewed by several humans is judged once.
+    reports = list({get_report_id(report): report for report, _, _ in pairs}.values())
+    start = time.perf_counter()
+    judged = evaluate_reports(reports, backend=backend or get_judge_backend(), max_workers=workers, mode=mode)
+    timings["judgeSeconds"] = round(time.perf_counter() - start, 3)
+    judge_reviews = {result["reportId"]: result["review"] for result in judged}
+
+    start = time.perf_counter()
+    table = build_results_table(pairs, judge_reviews)
+    metrics = compute_metrics(table)
+    timings["metricsSeconds"] = round(time.perf_counter() - start, 3)
+
+    os.makedirs(output_dir, exist_ok=True)
+    metrics["judgeFailures"] = sum(1 for result in judged if result["error"])
+    metrics["timings"] = timings
+    metrics["resultsPath"] = write_table(table, os.path.join(output_dir, "batch_evaluation"), output_format)
+    summary_path = os.path.join(output_dir, "batch_evaluation_summary.json")
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+    metrics["summaryPath"] = summary_path
+    return metrics
+
+def print_metrics(metrics: dict):
+    """Prints the headline numbers of a batch evaluation."""
+    concurrence = metrics["ratingConcurrence"]
+    print(f"\nPairs evaluated: {metrics['pairs']} ({metrics['judgeFailures']} judge failures)")
+    print(f"Rating concurrence rate - human: {concurrence['human']['concurrenceRate']}, "
+          f"judge: {concurrence['judge']['concurrenceRate']}, "
+          f"judge label matches human: {concurrence['judgeMatchesHuman']}")
+    print(f"\n{'Section':<26}{'Human mean':>11}{'Judge mean':>11}{'MAE':>7}{'Pearson':>9}{'Spearman':>10}")
+    for name, section in metrics["sections"].items():
+        correlation = section["correlation"]
+        print(f"{name:<26}{section['human'].get('mean', float('nan')):>11.2f}{section['judge'].get('mean', float('nan')):>11.2f}"
+              f"{_fmt(correlation['meanAbsoluteError']):>7}{_fmt(correlation['pearson']):>9}{_fmt(correlation['spearman']):>10}")
+    print(f"\nAll sections - Pearson: {_fmt(metrics['overall']['pearson'])}, Spearman: {_fmt(metrics['overall']['spearman'])}")
+    print(f"Results: {metrics['resultsPath']}\nSummary: {metrics['summaryPath']}")
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the automated judge against gold standard reviews.")
+    parser.add_argument("--reports-dir", default=DEFAULT_AI_REPORT_DIR, help="Directory of AI report JSON files")
+    parser.add_argument("--reviews-dir", action="append", help="Directory of gold review JSON files (repeatable)")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--backend", help="Judge backend (stub or openai); defaults to get_judge_backend()")
+    parser.add_argument("--mode", choices=JUDGE_MODES, default="report")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="auto")
+    args = parser.parse_args()
+
+    metrics = run_batch_evaluation(
+        reports_dir=args.reports_dir,
+        reviews_dirs=args.reviews_dir or [DEFAULT_GOLD_STANDARD_DIR],
+        output_dir=args.output_dir,
+        backend=get_judge_backend(args.backend),
+        mode=args.mode,
+        workers=args.workers,
+        output_format=args.format
+    )
+    print_metrics(metrics)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 # Scripts to evaluate the performance of the Credit Judge LLM.
+import os
 import json
 import textwrap
 
+from credit_judge_poc.src.processing.report_parser import parse_annotated_json
+from credit_judge_poc.src.processing.review_formatter import SECTION_TO_AI_KEY_MAP
+
 def load_json_file(filepath):
     """Loads a JSON file from the given filepath."""
     try:
         with open(filepath, 'r') as f:
-            return json.load(f)
+            return parse_annotated_json(f.read())
     except FileNotFoundError:
         print(f"Error: File not found at {filepath}")
         return None
@@ -14,10 +18,30 @@ def load_json_file(filepath):
         print(f"Error: Could not decode JSON from {filepath}")
         return None
 
-def display_qualitative_comparison(ai_report_data, gold_standard_data):
+def section_similarity(ai_report_data, gold_standard_data, embedding_cache=None):
+    """
+    Scores each AI section against the reviewer's feedback on it with
+    credit_judge_v2's similarity module (see its README).
+
+    Returns:
+        dict: sectionName -> cosine similarity, or {} if numpy is not
+        installed (the MVP itself needs only the standard library).
+    """
+    try:
+        from credit_judge_v2.src.processing.similarity import score_sections
+    except ImportError:
+        return {}
+    return score_sections(ai_report_data, gold_standard_data, cache=embedding_cache)
+
+def display_qualitative_comparison(ai_report_data, gold_standard_data, embedding_cache=None):
     """
     Displays a side-by-side qualitative comparison of the AI report
     and the gold standard review.
+
+    Args:
+        embedding_cache (EmbeddingCache, optional): Cache for the section
+            similarity embeddings, e.g. similarity.get_embedding_cache().
+            Nothing is written to disk when it is None.
     """
     print("\n" + "="*80)
     print(" " * 25 + "Qualitative Comparison Report")
@@ -37,20 +61,12 @@ def display_qualitative_comparison(ai_report_data, gold_standard_data):
     # --- Section-by-Section Comparison ---
     print("--- Section-by-Section Detailed Review ---\n")
 
-    # Mapping from review sectionName to keys in the AI report JSON
-    section_to_ai_key_map = {
-        "Overview": "overview",
-        "Corporate Credit Rating": "corporateCreditRating",
-        "Financial Performance": "financialPerformance",
-        "SNCF Regulatory Rating": "sncfRegulatoryRating",
-        "Strengths": "strengths",
-        "Weaknesses": "weaknesses",
-        "Special Focus Areas": "specialFocusAreas"
-    }
+    # Similarity between each AI section and the reviewer's feedback on it
+    similarities = section_similarity(ai_report_data, gold_standard_data, embedding_cache)
 
     for review_section in gold_standard_data.get("sectionReviews", []):
         section_name = review_section.get("sectionName")
-        ai_key = section_to_ai_key_map.get(section_name)
+        ai_key = SECTION_TO_AI_KEY_MAP.get(section_name)
 
         print(f"## Section: {section_name}\n")
 
@@ -63,6 +79,9 @@ def display_qualitative_comparison(ai_report_data, gold_standard_data):
         print(f"  Score: {score}/10" if score is not None else "  Score: N/A")
         if completeness is not None:
             print(f"  Completeness: {completeness}/10")
+        similarity = similarities.get(section_name)
+        if similarity is not None:
+            print(f"  Semantic Similarity to AI Content (0 to 1): {similarity:.2f}")
         print("  Feedback:")
         print(textwrap.fill(f"  > {feedback}", width=78, subsequent_indent='    '))
         print("\n")
@@ -7,6 +7,8 @@ import json
 # Assuming src is in PYTHONPATH or script is run from project root.
 from credit_judge_poc.src.processing.report_parser import load_ai_report_from_json
 from credit_judge_poc.src.processing.review_formatter import format_ai_output_for_review
+from credit_judge_poc.src.core.credit_evaluator import evaluate_report
+from credit_judge_poc.src.llm_interface.judge_llm_handler import get_judge_backend
 from credit_judge_poc.evaluation_poc.evaluate_judge_outputs import (
     load_json_file as load_gold_standard, # Renaming for clarity
     display_qualitative_comparison
@@ -63,6 +65,24 @@ def main():
     # This now calls the enhanced function to show a rich, qualitative comparison.
     display_qualitative_comparison(ai_report_data, gold_standard_data)
 
+    # --- 6. Automated LLM-as-Judge Review ---
+    # Uses the stub backend unless CREDIT_JUDGE_BACKEND or an API key selects a real LLM.
+    backend = get_judge_backend()
+    print(f"\n--- Automated Judge Review ({backend.name} backend) ---")
+    try:
+        judge_review = evaluate_report(ai_report_data, backend=backend)
+    except Exception as e:
+        print(f"Automated judge review failed: {e}")
+    else:
+        judge_overall = judge_review.get("overallAssessment", {})
+        human_overall = gold_standard_data.get("overallAssessment", {})
+        print(f"Overall Score - Judge: {judge_overall.get('overallScore', 'N/A')}/10, "
+              f"Gold Standard: {human_overall.get('overallScore', 'N/A')}/10")
+        print(f"Rating Concurrence - Judge: {judge_overall.get('ratingConcurrence', 'N/A')}, "
+              f"Gold Standard: {human_overall.get('ratingConcurrence', 'N/A')}")
+        for section in judge_review.get("sectionReviews", []):
+            print(f"  {section.get('sectionName', 'N/A')}: {section.get('quantitativeScore', 'N/A')}/10")
+
     print("\nCredit Judge PoC - MVP Run Completed.")
 
 if __name__ == "__main__":
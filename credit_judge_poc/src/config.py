@@ -21,6 +21,9 @@ DEFAULT_GOLD_STANDARD_DIR = os.path.join(PROJECT_ROOT, "data", "gold_standard_re
 DEFAULT_GOLD_STANDARD_FILENAME = "dkng_review_table.json" # Example default
 DEFAULT_GOLD_STANDARD_PATH = os.path.join(DEFAULT_GOLD_STANDARD_DIR, DEFAULT_GOLD_STANDARD_FILENAME)
 
+# Default path for the JSONL dump of generated LLM outputs
+DEFAULT_LLM_OUTPUT_JSONL_PATH = os.path.join(PROJECT_ROOT, "data", "LLM_JSONL_05242025.jsonl")
+
 # Path to prompt templates
 PROMPTS_DIR = os.path.join(PROJECT_ROOT, "src", "prompts")
 JUDGE_PROMPTS_FILE = os.path.join(PROMPTS_DIR, "judge_prompts.py")
@@ -29,7 +32,9 @@ JUDGE_PROMPTS_FILE = os.path.join(PROMPTS_DIR, "judge_prompts.py")
 # --- LLM Configuration (Placeholders) ---
 # These would be used if making live LLM calls.
 LLM_API_KEY_ENV_VAR = "YOUR_LLM_API_KEY"  # Environment variable name for the API key
-DEFAULT_LLM_MODEL_NAME = "your-preferred-model-name" # e.g., "gemini-1.5-flash-latest"
+LLM_MODEL_ENV_VAR = "CREDIT_JUDGE_MODEL"  # Environment variable overriding the judge model
+DEFAULT_LLM_MODEL_NAME = "gpt-4-turbo" # Same model the v2 report generator uses
+DEFAULT_PROMPT_TOKEN_BUDGET = 16000 # Max prompt tokens when long report texts are inlined into a prompt
 
 # --- Output Configuration ---
 DEFAULT_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output_reviews")
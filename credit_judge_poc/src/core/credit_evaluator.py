@@ -1,2 +1,303 @@
 # Main orchestration logic for the credit evaluation process.
 # Iterates through report sections, invokes the LLM handler with appropriate prompts, and aggregates results.
+
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from credit_judge_poc.src.llm_interface.judge_llm_handler import get_judge_backend, request_review, parse_section_review
+from credit_judge_poc.src.processing.review_formatter import format_report_for_review, split_report_sections
+from credit_judge_poc.src.config import DEFAULT_PROMPT_TOKEN_BUDGET
+from credit_judge_poc.src.prompts.token_budget import render_with_budget
+from credit_judge_poc.src.prompts.judge_prompts import (
+    COMPARISON_TABLE_PROMPT,
+    EXPERT_REVIEW_PROMPT,
+    SECTION_REVIEW_PROMPT,
+    SECTION_REVIEW_GUIDANCE,
+    SOURCE_EVIDENCE_PROMPT,
+    RATING_CONCURRENCE_FIELD
+)
+
+# Judging modes: one prompt per report, or one prompt per report section.
+JUDGE_MODES = ("report", "section")
+
+# Source chunks retrieved per report section when a retrieval index is given.
+EVIDENCE_CHUNKS_PER_SECTION = 3
+
+# Heading priorities used when long reports are trimmed to fit a prompt:
+# rating and financial sections are kept longest.
+SECTION_PRIORITIES = {
+    "rating": 4,
+    "financial": 4,
+    "leverage": 3,
+    "weakness": 3,
+    "risk": 3,
+    "overview": 2,
+    "strength": 2,
+}
+
+def get_report_id(ai_report_data: dict) -> str:
+    """
+    Returns an identifier for a report, e.g. "DKNG-AI-Report-2024-10-28".
+    """
+    ticker = ai_report_data.get('tickerSymbol', 'UNKNOWN')
+    return f"{ticker}-AI-Report-{ai_report_data.get('assessmentDate', 'N/A')}"
+
+def retrieve_evidence(ai_report_data: dict, source_index, k: int = EVIDENCE_CHUNKS_PER_SECTION) -> dict:
+    """
+    Retrieves the source chunks relevant to each section of an AI report.
+
+    Args:
+        ai_report_data (dict): The AI-generated report data.
+        source_index (retrieval.BM25Index): Index of the source filings,
+            with one document per ticker (see retrieval.build_index).
+        k (int): Chunks per section.
+
+    Returns:
+        dict: Section name -> list of SearchResults (empty if the ticker
+        is not indexed), or None without an index.
+    """
+    if source_index is None:
+        return None
+    # Imported here so judging without source filings does not need numpy/scipy.
+    from credit_judge_poc.src.processing.retrieval import retrieve_section_evidence
+    return retrieve_section_evidence(source_index, ai_report_data.get('tickerSymbol'), k=k)
+
+def _render_evidence(evidence: dict) -> str:
+    if not evidence:
+        return ""
+    from credit_judge_poc.src.processing.retrieval import format_evidence
+    text = format_evidence(evidence)
+    return SOURCE_EVIDENCE_PROMPT.render(evidence=text) if text else ""
+
+def build_review_prompt(ai_report_data: dict, report_id: str = None, current_date: str = None,
+                        max_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET, evidence: dict = None):
+    """
+    Renders EXPERT_REVIEW_TABLE_GENERATION_TEMPLATE for one AI report within a
+    token budget. The report text gets the budget left after the template's
+    own text and is trimmed lowest-priority sections first.
+
+    Args:
+        evidence (dict, optional): Output of retrieve_evidence. The retrieved
+            chunks are added as source evidence in place of whole filings.
+
+    Returns:
+        RenderedPrompt: The prompt text and its estimated token count.
+    """
+    return render_with_budget(
+        EXPERT_REVIEW_PROMPT, max_tokens,
+        budgeted={"input_credit_report_text": format_report_for_review(ai_report_data)},
+        values={
+            "report_id_placeholder": report_id or get_report_id(ai_report_data),
+            "current_date": current_date or datetime.date.today().strftime("%Y-%m-%d"),
+            "source_evidence": _render_evidence(evidence)
+        },
+        priorities=SECTION_PRIORITIES
+    )
+
+def build_comparison_prompt(company_name: str, ai_report_text: str, human_report_text: str,
+                            max_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET):
+    """
+    Renders COMPARISON_TABLE_GENERATION_TEMPLATE within a token budget. The
+    two report texts share the budget left after the template's own text, in
+    proportion to their length.
+
+    Returns:
+        RenderedPrompt: The prompt text and its estimated token count.
+    """
+    return render_with_budget(
+        COMPARISON_TABLE_PROMPT, max_tokens,
+        budgeted={"ai_generated_report_text": ai_report_text, "human_expert_report_text": human_report_text},
+        values={"company_name": company_name},
+        priorities=SECTION_PRIORITIES
+    )
+
+def build_section_prompt(ai_report_data: dict, section_name: str, section_text: str, evidence: list = None) -> str:
+    """
+    Renders SECTION_REVIEW_TEMPLATE for one section of an AI report.
+
+    Args:
+        evidence (list, optional): SearchResults retrieved for this section
+            (an entry of retrieve_evidence's output).
+    """
+    return SECTION_REVIEW_PROMPT.render(
+        company_name=ai_report_data.get('companyName', 'N/A'),
+        section_name=section_name,
+        section_content=section_text,
+        section_guidance=SECTION_REVIEW_GUIDANCE.get(section_name, "Assess accuracy, completeness, clarity and analytical depth."),
+        extra_fields=RATING_CONCURRENCE_FIELD if section_name == "Corporate Credit Rating" else "",
+        section_evidence=_render_evidence({section_name: evidence} if evidence else None)
+    )
+
+def _submit_section_reviews(pool, backend, ai_report_data: dict, source_index=None) -> list:
+    """
+    Submits one judge call per report section and returns (section_name, future) pairs.
+    """
+    evidence = retrieve_evidence(ai_report_data, source_index) or {}
+    return [
+        (section_name, pool.submit(request_review, backend,
+                                   build_section_prompt(ai_report_data, section_name, section_text, evidence.get(section_name)),
+                                   parser=parse_section_review))
+        for section_name, section_text in split_report_sections(ai_report_data)
+    ]
+
+def merge_section_reviews(section_results: list, report_id: str, current_date: str) -> dict:
+    """
+    Merges per-section judge results into a review table with the same
+    schema as the gold standard reviews.
+
+    Args:
+        section_results (list): (section_name, review or None, error or None) tuples.
+        report_id (str): Recorded as `reviewedReportId`.
+        current_date (str): Recorded as `reviewDate`.
+
+    Returns:
+        dict: The review table. The overall score is the mean of the section
+        scores and rating concurrence comes from the Corporate Credit Rating
+        section. Sections whose review failed are listed under `failedSections`.
+
+    Raises:
+        ValueError: If every section review failed.
+    """
+    section_reviews = []
+    failed_sections = []
+    concurrence = "N/A"
+    for section_name, review, error in section_results:
+        if review is None:
+            failed_sections.append({"sectionName": section_name, "error": error})
+            continue
+        review["sectionName"] = section_name
+        concurrence = review.pop("ratingConcurrence", concurrence)
+        section_reviews.append(review)
+
+    if not section_reviews:
+        raise ValueError(f"All {len(failed_sections)} section reviews failed: {failed_sections[0]['error'] if failed_sections else 'no sections'}")
+
+    scored = [r for r in section_reviews if isinstance(r.get("quantitativeScore"), (int, float))]
+    overall_score = round(sum(r["quantitativeScore"] for r in scored) / len(scored), 1) if scored else "N/A"
+    comments = f"Aggregated from {len(section_reviews)} independently judged sections."
+    if scored:
+        weakest = min(scored, key=lambda r: r["quantitativeScore"])
+        comments += f" Weakest section: {weakest['sectionName']} ({weakest['quantitativeScore']}/10)."
+
+    review_table = {
+        "reviewedReportId": report_id,
+        "reviewerName": "AI Credit Review Expert (per-section)",
+        "reviewDate": current_date,
+        "overallAssessment": {
+            "comments": comments,
+            "overallScore": overall_score,
+            "ratingConcurrence": concurrence
+        },
+        "sectionReviews": section_reviews
+    }
+    if failed_sections:
+        review_table["failedSections"] = failed_sections
+    return review_table
+
+def _collect_section_reviews(section_futures: list, report_id: str, current_date: str) -> dict:
+    section_results = []
+    for section_name, future in section_futures:
+        try:
+            section_results.append((section_name, future.result(), None))
+        except Exception as e:
+            section_results.append((section_name, None, f"{type(e).__name__}: {e}"))
+    return merge_section_reviews(section_results, report_id, current_date)
+
+def evaluate_report(ai_report_data: dict, backend=None, report_id: str = None, mode: str = "report",
+                    source_index=None) -> dict:
+    """
+    Has the judge LLM review one AI report.
+
+    Args:
+        ai_report_data (dict): The AI-generated report data.
+        backend (JudgeBackend, optional): Judge backend. Defaults to get_judge_backend().
+        report_id (str, optional): Identifier recorded as `reviewedReportId`.
+        mode (str): "report" sends the whole report in one prompt. "section"
+            judges every section concurrently with a section-specific prompt
+            and merges the results, so latency is bounded by the slowest
+            section rather than the length of the whole report.
+        source_index (retrieval.BM25Index, optional): Index of the source
+            filings. Each prompt then carries the chunks retrieved for its
+            sections' questions (see retrieve_evidence).
+
+    Returns:
+        dict: The review table, in the same shape as the gold standard reviews.
+    """
+    if mode not in JUDGE_MODES:
+        raise ValueError(f"Unknown judge mode '{mode}'. Choose from: {', '.join(JUDGE_MODES)}")
+    backend = backend or get_judge_backend()
+    report_id = report_id or get_report_id(ai_report_data)
+
+    if mode == "report":
+        evidence = retrieve_evidence(ai_report_data, source_index)
+        return request_review(backend, build_review_prompt(ai_report_data, report_id, evidence=evidence).text)
+
+    current_date = datetime.date.today().strftime("%Y-%m-%d")
+    with ThreadPoolExecutor(max_workers=max(1, len(split_report_sections(ai_report_data)))) as pool:
+        section_futures = _submit_section_reviews(pool, backend, ai_report_data, source_index)
+        return _collect_section_reviews(section_futures, report_id, current_date)
+
+def evaluate_reports(reports: list, backend=None, max_workers: int = 8, mode: str = "report",
+                     source_index=None) -> list:
+    """
+    Judges many AI reports concurrently.
+
+    Judge calls are I/O bound, so they are dispatched on a thread pool and
+    collected as they finish. A failure for one report is recorded in its
+    result instead of stopping the batch.
+
+    Args:
+        reports (list): AI report data dictionaries.
+        backend (JudgeBackend, optional): Shared judge backend. Defaults to get_judge_backend().
+        max_workers (int): Maximum number of judge calls in flight.
+        mode (str): "report" or "section" (see evaluate_report). In section
+            mode every report's sections share the same pool.
+        source_index (retrieval.BM25Index, optional): Index of the source
+            filings, see evaluate_report.
+
+    Returns:
+        list: One dict per report, in input order, with `reportId`,
+        `review` (None on failure) and `error` (None on success).
+    """
+    if mode not in JUDGE_MODES:
+        raise ValueError(f"Unknown judge mode '{mode}'. Choose from: {', '.join(JUDGE_MODES)}")
+    backend = backend or get_judge_backend()
+    current_date = datetime.date.today().strftime("%Y-%m-%d")
+    results = [{"reportId": get_report_id(report), "review": None, "error": None} for report in reports]
+    start_time = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if mode == "section":
+            # Submit every section of every report up front, then merge per report.
+            submitted = [_submit_section_reviews(pool, backend, report, source_index) for report in reports]
+            for result, section_futures in zip(results, submitted):
+                try:
+                    result["review"] = _collect_section_reviews(section_futures, result["reportId"], current_date)
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+        else:
+            futures = {
+                pool.submit(request_review, backend, build_review_prompt(
+                    report, result["reportId"], current_date, evidence=retrieve_evidence(report, source_index)).text): result
+                for report, result in zip(reports, results)
+            }
+            for future in as_completed(futures):
+                result = futures[future]
+                try:
+                    result["review"] = future.result()
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+
+    elapsed = time.perf_counter() - start_time
+    failed = sum(1 for result in results if result["error"])
+    print(f"Judged {len(reports)} reports ({mode} mode) with the '{backend.name}' backend in {elapsed:.2f}s ({failed} failed)")
+    return results
+
+# Example Usage:
+# from credit_judge_poc.src.llm_interface.judge_llm_handler import get_judge_backend
+# from credit_judge_poc.src.processing.retrieval import BM25Index
+# results = evaluate_reports(list_of_ai_reports, backend=get_judge_backend("stub"), max_workers=16, mode="section",
+#                            source_index=BM25Index.load("credit_judge_poc/data/retrieval_index.npz"))
+# for result in results:
+#     print(result["reportId"], result["review"]["overallAssessment"]["overallScore"])
@@ -1,2 +1,289 @@
 # Handles all interactions with the 'Credit Judge' LLM.
 # Includes functions for sending prompts and receiving/parsing LLM responses.
+
+import hashlib
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+
+from credit_judge_poc.src.config import LLM_API_KEY_ENV_VAR, LLM_MODEL_ENV_VAR, DEFAULT_LLM_MODEL_NAME
+
+# Environment variable selecting the judge backend ("stub" or "openai").
+JUDGE_BACKEND_ENV_VAR = "CREDIT_JUDGE_BACKEND"
+
+class JudgeBackend(ABC):
+    """
+    Interface for judge LLM backends: anything with `complete(prompt) -> str`.
+    Implementations must be safe to call from several threads at once.
+    """
+    name = "base"
+
+    @abstractmethod
+    def complete(self, prompt: str) -> str:
+        """Sends `prompt` to the judge and returns its raw response text."""
+
+class StubJudgeBackend(JudgeBackend):
+    """
+    Deterministic local judge for offline runs, tests and throughput checks.
+
+    Reads the report embedded in an EXPERT_REVIEW_TABLE_GENERATION_TEMPLATE
+    prompt and reviews each `## Section` heading it finds, or reviews the one
+    section of a SECTION_REVIEW_TEMPLATE prompt. Scores are derived from a
+    hash of the section text, so the same prompt always yields the same
+    review.
+
+    Args:
+        seed (str): Mixed into the hash so different stubs can disagree.
+    """
+    name = "stub"
+
+    def __init__(self, seed: str = ""):
+        self.seed = seed
+
+    def _score(self, text: str, low: int = 5, high: int = 9) -> int:
+        digest = hashlib.sha256((self.seed + text).encode('utf-8')).digest()
+        return low + digest[0] % (high - low + 1)
+
+    def _review_section(self, name: str, body: str) -> dict:
+        body = body.strip()
+        words = len(body.split())
+        score = self._score(name + body)
+        return {
+            "sectionName": name.strip(),
+            "qualitativeFeedback": f"[stub] {words} words reviewed; "
+                                   + ("coverage looks adequate." if words >= 40 else "section is thin and could be expanded."),
+            "quantitativeScore": score,
+            "dataAccuracy": self._score("accuracy" + body) if re.search(r"\d", body) else "N/A",
+            "completeness": min(10, score + (1 if words >= 40 else -1)),
+            "analyticalDepth": self._score("depth" + body)
+        }
+
+    def _concurrence(self, text: str) -> str:
+        return ("Strongly Agree", "Agree", "Neutral", "Disagree")[self._score(text, 0, 3)]
+
+    def complete(self, prompt: str) -> str:
+        content_match = re.search(r"```text\n(.*?)\n```", prompt, re.S)
+        content = content_match.group(1) if content_match else prompt
+
+        # SECTION_REVIEW_TEMPLATE prompt: review just that section.
+        section_match = re.search(r"^\*\*Section Under Review:\*\* *(.+)$", prompt, re.M)
+        if section_match:
+            review = self._review_section(section_match.group(1), content)
+            if '"ratingConcurrence"' in prompt:
+                review["ratingConcurrence"] = self._concurrence(content)
+            return json.dumps(review)
+
+        report_id = re.search(r'"reviewedReportId":\s*"([^"]*)"', prompt)
+        review_date = re.search(r'"reviewDate":\s*"([^"]*)"', prompt)
+
+        sections = re.split(r"^## +(.+)$", content, flags=re.M)
+        section_reviews = [self._review_section(name, body) for name, body in zip(sections[1::2], sections[2::2])]
+
+        scores = [section["quantitativeScore"] for section in section_reviews]
+        overall_score = round(sum(scores) / len(scores), 1) if scores else 0.0
+        return json.dumps({
+            "reviewedReportId": report_id.group(1) if report_id else "N/A",
+            "reviewerName": "Stub Credit Judge",
+            "reviewDate": review_date.group(1) if review_date else "N/A",
+            "overallAssessment": {
+                "comments": f"[stub] Deterministic review of {len(section_reviews)} sections.",
+                "overallScore": overall_score,
+                "ratingConcurrence": self._concurrence(content)
+            },
+            "sectionReviews": section_reviews
+        })
+
+class OpenAIJudgeBackend(JudgeBackend):
+    """
+    Judge backend backed by the OpenAI chat completions API.
+
+    The `openai` package is imported lazily so the rest of the PoC keeps
+    running on the standard library alone. Calls go through credit_judge_v2's
+    RateLimitScheduler, which paces them against the request and token
+    budgets and retries 429s, connection errors and 5xx responses with
+    backoff, so a batch of reports on many threads shares one budget.
+
+    Args:
+        model (str): Model name. Defaults to the LLM_MODEL_ENV_VAR
+            environment variable, then DEFAULT_LLM_MODEL_NAME.
+        api_key (str): API key. Defaults to the LLM_API_KEY_ENV_VAR or
+            OPENAI_API_KEY environment variable.
+        temperature (float): Sampling temperature; 0 keeps reviews repeatable.
+        scheduler (RateLimitScheduler): Shared scheduler. Defaults to a new one
+            whose budgets come from LLM_REQUESTS_PER_MINUTE and
+            LLM_TOKENS_PER_MINUTE, as in credit_judge_v2.
+    """
+    name = "openai"
+
+    def __init__(self, model: str = None, api_key: str = None, temperature: float = 0.0, scheduler=None):
+        try:
+            import openai
+        except ImportError as e:
+            raise ImportError("The 'openai' package is required for OpenAIJudgeBackend (pip install openai).") from e
+        from credit_judge_v2.src.llm_interface.rate_limiter import RateLimitScheduler, estimate_tokens
+
+        api_key = api_key or os.environ.get(LLM_API_KEY_ENV_VAR) or os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError(f"No API key found. Set {LLM_API_KEY_ENV_VAR} or OPENAI_API_KEY.")
+
+        self.model = model or os.environ.get(LLM_MODEL_ENV_VAR) or DEFAULT_LLM_MODEL_NAME
+        self.temperature = temperature
+        self.scheduler = scheduler or RateLimitScheduler(
+            requests_per_minute=float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500)),
+            tokens_per_minute=float(os.environ.get("LLM_TOKENS_PER_MINUTE", 150000))
+        )
+        # Retries are left to the scheduler, so the SDK's own are disabled.
+        self._client = openai.OpenAI(api_key=api_key, max_retries=0)
+        self._estimate_tokens = estimate_tokens
+
+    def complete(self, prompt: str) -> str:
+        response = self.scheduler.call(
+            self._client.chat.completions.create,
+            estimated_tokens=self._estimate_tokens(prompt),
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            response_format={"type": "json_object"}
+        )
+        return response.choices[0].message.content
+
+_BACKENDS = {
+    "stub": StubJudgeBackend,
+    "openai": OpenAIJudgeBackend,
+}
+
+def get_judge_backend(name: str = None, **kwargs) -> JudgeBackend:
+    """
+    Returns a judge backend by name ("stub" or "openai").
+
+    Without a name, the CREDIT_JUDGE_BACKEND environment variable is used,
+    and failing that the OpenAI backend if an API key is configured, else
+    the stub.
+    """
+    name = name or os.environ.get(JUDGE_BACKEND_ENV_VAR)
+    if not name:
+        has_key = os.environ.get(LLM_API_KEY_ENV_VAR) or os.environ.get("OPENAI_API_KEY")
+        name = "openai" if has_key else "stub"
+
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown judge backend '{name}'. Choose from: {', '.join(_BACKENDS)}")
+    return _BACKENDS[name](**kwargs)
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_NUMERIC_RE = re.compile(r"^-?\d+(?:\.\d+)?$")
+_SCORE_FIELDS = ("overallScore", "quantitativeScore", "dataAccuracy", "completeness", "analyticalDepth")
+
+def _extract_json_object(text: str) -> str:
+    """
+    Returns the first balanced {...} block in `text`, ignoring braces inside strings.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object found in judge response.")
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    raise ValueError("Unterminated JSON object in judge response.")
+
+def _decode_json_response(response_text: str):
+    """
+    Decodes a JSON response that may be wrapped in code fences or prose.
+    """
+    text = _FENCE_RE.sub("", response_text.strip())
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(_extract_json_object(text))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Judge response is not valid JSON: {e}") from e
+
+def _coerce_scores(node: dict):
+    for field in _SCORE_FIELDS:
+        value = node.get(field)
+        if isinstance(value, str) and _NUMERIC_RE.match(value.strip()):
+            number = float(value)
+            node[field] = int(number) if number.is_integer() else number
+
+def parse_review_table(response_text: str) -> dict:
+    """
+    Parses a judge response into a review table dictionary.
+
+    Accepts bare JSON, JSON wrapped in Markdown code fences, or JSON surrounded
+    by prose. Scores returned as numeric strings (e.g. "8") are converted to
+    numbers.
+
+    Raises:
+        ValueError: If no valid review table can be extracted.
+    """
+    review = _decode_json_response(response_text)
+
+    if not isinstance(review, dict) or "overallAssessment" not in review:
+        raise ValueError("Judge response is missing 'overallAssessment'.")
+
+    _coerce_scores(review.get("overallAssessment") or {})
+    section_reviews = review.setdefault("sectionReviews", [])
+    for section in section_reviews:
+        if isinstance(section, dict):
+            _coerce_scores(section)
+    return review
+
+def parse_section_review(response_text: str) -> dict:
+    """
+    Parses a judge response to a SECTION_REVIEW_TEMPLATE prompt into one
+    `sectionReviews` entry. Accepts the same wrappers as parse_review_table.
+
+    Raises:
+        ValueError: If no valid section review can be extracted.
+    """
+    review = _decode_json_response(response_text)
+
+    if not isinstance(review, dict) or "quantitativeScore" not in review:
+        raise ValueError("Judge response is missing 'quantitativeScore'.")
+
+    _coerce_scores(review)
+    return review
+
+def request_review(backend: JudgeBackend, prompt: str, max_attempts: int = 2, parser=parse_review_table) -> dict:
+    """
+    Sends a review prompt to the judge and returns the parsed response.
+    A response that cannot be parsed is retried up to `max_attempts` times.
+
+    Args:
+        parser (callable): parse_review_table for whole-report prompts,
+            parse_section_review for section prompts.
+
+    Raises:
+        ValueError: If every attempt returned an unparseable response.
+    """
+    last_error = None
+    for _ in range(max_attempts):
+        try:
+            return parser(backend.complete(prompt))
+        except ValueError as e:
+            last_error = e
+    raise last_error
+
+# Example Usage:
+# backend = get_judge_backend("stub")
+# review = request_review(backend, filled_expert_review_prompt)
+# print(review["overallAssessment"]["overallScore"])
@@ -0,0 +1,220 @@
+# Numeric rating scales for comparing AI and human credit ratings at scale.
+# S&P-style issuer ratings, SNC regulatory classes and free-text rating concurrence
+# are mapped to ordinal codes through lookup tables built once at import, so whole
+# portfolios are parsed with dict lookups and compared with NumPy array operations.
+
+import re
+
+import numpy as np
+
+# Code returned for labels that are missing or not on the scale.
+UNRATED = -1
+
+class OrdinalScale:
+    """
+    An ordered set of labels with integer codes (the position in `levels`).
+
+    Labels are parsed through a lookup table of normalized spellings
+    (case, whitespace and aliases). Labels not in the table are matched
+    against `pattern` once and memoized, so parsing a portfolio costs one
+    dict lookup per label.
+
+    Args:
+        name (str): Used in error messages.
+        levels (tuple): Canonical labels in order.
+        aliases (dict): Extra spelling -> canonical label.
+        pattern (re.Pattern): Fallback matched at the start of a normalized
+            label; its first group must normalize to a table entry.
+    """
+
+    # Bound on memoized free-text labels, so arbitrary text cannot grow the table without limit.
+    _MAX_MEMO = 100_000
+
+    def __init__(self, name: str, levels: tuple, aliases: dict = None, pattern: re.Pattern = None):
+        self.name = name
+        self.levels = tuple(levels)
+        self.pattern = pattern
+        index = {level: code for code, level in enumerate(self.levels)}
+        self._table = {self.normalize(level): code for level, code in index.items()}
+        for alias, level in (aliases or {}).items():
+            self._table[self.normalize(alias)] = index[level]
+        self._memo = {}
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    @staticmethod
+    def normalize(label) -> str:
+        return " ".join(str(label).upper().split())
+
+    def _parse(self, label) -> int:
+        if label is None:
+            return UNRATED
+        key = self.normalize(label)
+        code = self._table.get(key)
+        if code is None and self.pattern is not None:
+            match = self.pattern.match(key)
+            if match:
+                code = self._table.get(self.normalize(match.group(1)))
+        return UNRATED if code is None else code
+
+    def code(self, label) -> int:
+        """Returns the code of one label, or UNRATED."""
+        code = self._memo.get(label)
+        if code is None:
+            code = self._parse(label)
+            if len(self._memo) < self._MAX_MEMO:
+                self._memo[label] = code
+        return code
+
+    def codes(self, labels) -> np.ndarray:
+        """
+        Maps labels to codes in one pass.
+
+        Returns:
+            np.ndarray: int16 codes, UNRATED where a label cannot be parsed.
+        """
+        memo, code = self._memo, self.code
+        return np.fromiter((memo[label] if label in memo else code(label) for label in labels),
+                           dtype=np.int16, count=len(labels))
+
+    def labels(self, codes) -> list:
+        """Maps codes back to canonical labels (None for UNRATED)."""
+        return [self.levels[c] if 0 <= c < len(self.levels) else None for c in np.asarray(codes).tolist()]
+
+# S&P long-term issuer scale, strongest first, so a larger notch is a weaker credit.
+# Moody's equivalents and selective default are accepted as aliases.
+SP_RATINGS = (
+    "AAA", "AA+", "AA", "AA-", "A+", "A", "A-", "BBB+", "BBB", "BBB-",
+    "BB+", "BB", "BB-", "B+", "B", "B-", "CCC+", "CCC", "CCC-", "CC", "C", "D"
+)
+_MOODYS_RATINGS = {
+    "Aaa": "AAA", "Aa1": "AA+", "Aa2": "AA", "Aa3": "AA-", "A1": "A+", "A2": "A", "A3": "A-",
+    "Baa1": "BBB+", "Baa2": "BBB", "Baa3": "BBB-", "Ba1": "BB+", "Ba2": "BB", "Ba3": "BB-",
+    "B1": "B+", "B2": "B", "B3": "B-", "Caa1": "CCC+", "Caa2": "CCC", "Caa3": "CCC-", "Ca": "CC",
+}
+# A rating token at the start of labels such as "BB+ (Stable)" or "BBB+/Negative".
+_SP_PATTERN = re.compile(r"((?:AAA|AA|A|BBB|BB|B|CCC|CC|C|SD|D)[+-]?|(?:AAA|AA|A|BAA|BA|B|CAA|CA)[123]?)(?![A-Z0-9])")
+
+SP_SCALE = OrdinalScale("S&P rating", SP_RATINGS, aliases={**_MOODYS_RATINGS, "SD": "D"}, pattern=_SP_PATTERN)
+
+# Shared National Credit regulatory classes, best first.
+SNC_CLASSES = ("Pass", "Special Mention", "Substandard", "Doubtful", "Loss")
+_SNC_PATTERN = re.compile(r"(PASS|SPECIAL MENTION|SUB-?STANDARD|DOUBTFUL|LOSS)\b")
+
+SNC_SCALE = OrdinalScale("SNC class", SNC_CLASSES, aliases={"SM": "Special Mention", "Sub-standard": "Substandard"},
+                         pattern=_SNC_PATTERN)
+
+# Reviewer concurrence with the AI's rating, from strongest disagreement to strongest agreement.
+CONCURRENCE_LEVELS = ("Strongly Disagree", "Disagree", "Neutral", "Agree", "Strongly Agree")
+_CONCURRENCE_ALIASES = {
+    "Fully Agree": "Strongly Agree", "Completely Agree": "Strongly Agree",
+    "Largely Agree": "Agree", "Mostly Agree": "Agree", "Generally Agree": "Agree", "Concur": "Agree",
+    "Partially Agree": "Neutral", "Partially Disagree": "Neutral", "Mixed": "Neutral",
+    "Largely Disagree": "Disagree", "Mostly Disagree": "Disagree", "Do Not Agree": "Disagree",
+    "Completely Disagree": "Strongly Disagree", "Fully Disagree": "Strongly Disagree",
+}
+# The leading phrase of free text such as "Agree, although the outlook is optimistic" or
+# "Agreed." The past tense "D" is left out of the group so it parses as the base label.
+_CONCURRENCE_PATTERN = re.compile(
+    r"((?:STRONGLY|FULLY|COMPLETELY|LARGELY|MOSTLY|GENERALLY|PARTIALLY|DO NOT)?\s?(?:AGREE|DISAGREE)(?=D?\b)"
+    r"|(?:NEUTRAL|CONCUR|MIXED)\b)"
+)
+
+CONCURRENCE_SCALE = OrdinalScale("rating concurrence", CONCURRENCE_LEVELS, aliases=_CONCURRENCE_ALIASES,
+                                 pattern=_CONCURRENCE_PATTERN)
+
+# Codes of CONCURRENCE_LEVELS counted as agreeing with the AI's rating.
+AGREEING_CODES = (CONCURRENCE_LEVELS.index("Agree"), CONCURRENCE_LEVELS.index("Strongly Agree"))
+
+def to_notches(ratings) -> np.ndarray:
+    """Maps S&P (or Moody's) rating strings to notches, 0 = AAA; UNRATED if unparsable."""
+    return SP_SCALE.codes(ratings)
+
+def _as_codes(values, scale: OrdinalScale) -> np.ndarray:
+    # Integer arrays are taken to be codes already; anything else is parsed as labels.
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.integer):
+        return values
+    return scale.codes(values)
+
+def _paired_codes(predicted, reference, scale: OrdinalScale):
+    predicted = _as_codes(predicted, scale)
+    reference = _as_codes(reference, scale)
+    if predicted.shape != reference.shape:
+        raise ValueError(f"Cannot compare {len(predicted)} predicted with {len(reference)} reference {scale.name}s.")
+    valid = (predicted != UNRATED) & (reference != UNRATED)
+    return predicted.astype(np.int64), reference.astype(np.int64), valid
+
+def notch_distance(predicted, reference, scale: OrdinalScale = SP_SCALE) -> np.ndarray:
+    """
+    Signed distance from each reference label to the predicted one. Positive
+    means the prediction is weaker (e.g. BB+ predicted for BBB is +2).
+    Accepts label sequences or code arrays from scale.codes.
+
+    Returns:
+        np.ndarray: float distances, NaN where either side is UNRATED.
+    """
+    predicted, reference, valid = _paired_codes(predicted, reference, scale)
+    distance = (predicted - reference).astype(np.float64)
+    distance[~valid] = np.nan
+    return distance
+
+def distance_histogram(predicted, reference, scale: OrdinalScale = SP_SCALE):
+    """
+    Counts pairs at each signed distance, over every possible distance.
+
+    Returns:
+        tuple: (offsets, counts) arrays, where offsets runs from
+        -(len(scale) - 1) to len(scale) - 1.
+    """
+    predicted, reference, valid = _paired_codes(predicted, reference, scale)
+    span = len(scale) - 1
+    counts = np.bincount(predicted[valid] - reference[valid] + span, minlength=2 * span + 1)
+    return np.arange(-span, span + 1), counts
+
+def confusion_matrix(predicted, reference, scale: OrdinalScale = SP_SCALE) -> np.ndarray:
+    """
+    Returns:
+        np.ndarray: (len(scale), len(scale)) counts; rows are reference
+        codes, columns predicted codes. UNRATED pairs are left out.
+    """
+    predicted, reference, valid = _paired_codes(predicted, reference, scale)
+    n = len(scale)
+    return np.bincount(reference[valid] * n + predicted[valid], minlength=n * n).reshape(n, n)
+
+def agreement_summary(predicted, reference, scale: OrdinalScale = SP_SCALE) -> dict:
+    """
+    Summarizes how far predicted labels are from reference labels.
+
+    Returns:
+        dict: Counts of compared and unrated pairs, exact and within-one-notch
+        match rates, mean absolute distance and mean signed bias (positive:
+        predictions are weaker than the reference).
+    """
+    predicted, reference, valid = _paired_codes(predicted, reference, scale)
+    distance = predicted[valid] - reference[valid]
+    compared = int(valid.sum())
+    summary = {"compared": compared, "unrated": int(len(valid) - compared)}
+    if compared:
+        absolute = np.abs(distance)
+        summary.update({
+            "exactMatchRate": round(float((absolute == 0).mean()), 4),
+            "withinOneNotchRate": round(float((absolute <= 1).mean()), 4),
+            "meanAbsoluteDistance": round(float(absolute.mean()), 3),
+            "meanSignedDistance": round(float(distance.mean()), 3)
+        })
+    return summary
+
+def concurrence_rate(labels) -> float:
+    """Share of parsable concurrence labels that agree with the AI's rating, or None if none parse."""
+    codes = CONCURRENCE_SCALE.codes(labels)
+    parsed = codes[codes != UNRATED]
+    return float(np.isin(parsed, AGREEING_CODES).mean()) if len(parsed) else None
+
+# Example Usage:
+# if __name__ == '__main__':
+#     print(to_notches(["BBB+", "bb+ (Stable)", "Baa2", "NR"]))        # [ 7 10  8 -1]
+#     print(notch_distance(["BB+", "A"], ["BBB", "A"]))                # [2. 0.]
+#     print(agreement_summary(["BB+", "A", "B+"], ["BBB", "A", "B"]))
+#     print(confusion_matrix(["Pass", "Substandard"], ["Pass", "Special Mention"], scale=SNC_SCALE))
+#     print(CONCURRENCE_SCALE.labels(CONCURRENCE_SCALE.codes(["Largely Agree", "Agree, but ...", "N/A"])))
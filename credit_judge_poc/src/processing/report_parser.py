@@ -2,7 +2,27 @@
 # Extracts relevant sections and content from various report formats (e.g., text, JSON).
 
 import json
+import mmap
 import os
+import re
+
+from credit_judge_poc.src.config import DEFAULT_LLM_OUTPUT_JSONL_PATH
+
+def parse_annotated_json(raw: str):
+    """
+    Parses a JSON document that may be followed by `#` annotation lines,
+    as the sample files under data/ are.
+
+    Raises:
+        json.JSONDecodeError: If the JSON is invalid or followed by anything
+        other than annotations.
+    """
+    text = raw.strip()
+    data, end = json.JSONDecoder().raw_decode(text)
+    for line in text[end:].splitlines():
+        if line.strip() and not line.lstrip().startswith('#'):
+            raise json.JSONDecodeError("Extra data", text, end)
+    return data
 
 def load_ai_report_from_json(filepath: str):
     """
@@ -20,8 +40,7 @@ def load_ai_report_from_json(filepath: str):
     
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            report_data = json.load(f)
-        return report_data
+            return parse_annotated_json(f.read())
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON from {filepath}: {e}")
         return None
@@ -29,6 +48,308 @@ def load_ai_report_from_json(filepath: str):
         print(f"An unexpected error occurred while loading {filepath}: {e}")
         return None
 
+def load_simulated_rag_report(filepath: str):
+    """
+    Loads a simulated RAG report (retrieved document snippets) from a text file.
+
+    Trailing `#` annotation lines, as in the sample files, are removed.
+
+    Args:
+        filepath (str): The full path to the text file, e.g. msft_sim_report.txt.
+
+    Returns:
+        str: The report text, or None if an error occurs.
+    """
+    if not os.path.exists(filepath):
+        print(f"Error: File not found at {filepath}")
+        return None
+
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.read().rstrip().split('\n')
+    except Exception as e:
+        print(f"An unexpected error occurred while loading {filepath}: {e}")
+        return None
+
+    while lines and (not lines[-1].strip() or lines[-1].lstrip().startswith('#')):
+        lines.pop()
+    return '\n'.join(lines) + '\n'
+
+# Comparison tables carry no ticker of their own; their AI side refers to the
+# report it was built from, e.g. "JSON output for MSFT_ai_credit_report_1.json".
+_REPORT_REFERENCE_RE = re.compile(r'([A-Z][A-Z0-9.\-]*)_ai_credit_report')
+
+def _record_ticker(record: dict):
+    """
+    Returns the ticker a JSONL record belongs to, or None.
+
+    Most records carry `scenario_details.ticker_symbol`; expert reviews only
+    carry a `report_id_placeholder` such as "MSFT_Report_Review_1", whose
+    prefix is the ticker, and comparison tables only name the AI report they
+    compare, e.g. "MSFT_ai_credit_report_1.json".
+    """
+    scenario = record.get('scenario_details') or {}
+    ticker = scenario.get('ticker_symbol')
+    if not ticker and isinstance(scenario.get('report_id_placeholder'), str):
+        ticker = scenario['report_id_placeholder'].split('_')[0]
+    if not ticker and isinstance(scenario.get('ai_generated_report_text'), str):
+        match = _REPORT_REFERENCE_RE.search(scenario['ai_generated_report_text'])
+        ticker = match.group(1) if match else None
+    return ticker or None
+
+# JSON escapes that can spell a value differently from its plain bytes, e.g.
+# "\u004dSFT" for "MSFT"; lines using them bypass the byte prefilter.
+_VALUE_ESCAPES = (b'\\u', b'\\/')
+
+def _field_matcher(field: str, value: str):
+    """
+    Builds a check for `"field": "value"` anywhere in a raw JSON line.
+
+    Returns a (literal, pattern) pair: the quoted value as bytes, which is a
+    fast substring test, and a compiled pattern that confirms it belongs to
+    `field`.
+    """
+    quoted_value = json.dumps(value, ensure_ascii=False).encode('utf-8')
+    pattern = re.compile(b'"' + re.escape(field.encode('utf-8')) + rb'"\s*:\s*' + re.escape(quoted_value))
+    return quoted_value, pattern
+
+def stream_jsonl_records(filepath: str, report_type: str = None, ticker_symbol: str = None,
+                         start_offset: int = 0, include_offsets: bool = False):
+    """
+    Lazily yields records from a JSONL file of LLM outputs (e.g. LLM_JSONL_05242025.jsonl).
+
+    The file is read one line at a time, so memory use does not depend on the
+    file size. When filters are given, each raw line is first searched for the
+    expected `"report_type": "..."` bytes and the ticker; lines without them
+    are skipped without being decoded. Candidate lines are then decoded and
+    the filters checked exactly. A line containing a `\\uXXXX` or `\\/` escape
+    may spell a value differently from its plain bytes, so it skips the byte
+    search and is always decoded.
+
+    Args:
+        filepath (str): The path to the JSONL file.
+        report_type (str, optional): Only yield records with this `report_type`.
+        ticker_symbol (str, optional): Only yield records that belong to this
+            ticker, resolved the same way as in the offset index (see
+            _record_ticker), so expert reviews and comparison tables match too.
+        start_offset (int): Byte offset to start reading from. Must be the start
+            of a line, e.g. `offset + length` of the last record processed.
+        include_offsets (bool): If True, yield `(offset, length, record)` tuples
+            so callers can checkpoint and resume.
+
+    Yields:
+        dict or tuple: Each matching record, or `(offset, length, record)`.
+    """
+    if not os.path.exists(filepath):
+        print(f"Error: File not found at {filepath}")
+        return
+
+    prefilters = []
+    if report_type is not None:
+        prefilters.append(_field_matcher("report_type", report_type))
+    # Wherever a record's ticker comes from, it appears verbatim in the line.
+    ticker_literal = ticker_symbol.encode('utf-8') if ticker_symbol is not None else None
+
+    with open(filepath, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for line in f:
+            line_offset = offset
+            offset += len(line)
+
+            if not line.strip():
+                continue
+            if not any(escape in line for escape in _VALUE_ESCAPES):
+                if any(literal not in line or pattern.search(line) is None for literal, pattern in prefilters):
+                    continue
+                if ticker_literal is not None and ticker_literal not in line:
+                    continue
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Error decoding JSON at byte offset {line_offset} in {filepath}: {e}")
+                continue
+
+            if report_type is not None and record.get('report_type') != report_type:
+                continue
+            if ticker_symbol is not None and _record_ticker(record) != ticker_symbol:
+                continue
+
+            if include_offsets:
+                yield line_offset, len(line), record
+            else:
+                yield record
+
+INDEX_SUFFIX = ".idx.json"
+# Bumped whenever the entry layout or ticker resolution changes, so sidecars
+# written by an older version are rebuilt rather than trusted.
+INDEX_VERSION = 2
+
+# Loaded indexes, keyed by source path. Each is validated against the source
+# file's size and mtime on every lookup.
+_index_cache = {}
+
+def build_jsonl_index(filepath: str = DEFAULT_LLM_OUTPUT_JSONL_PATH):
+    """
+    Scans a JSONL file once and writes a sidecar offset index next to it
+    (`<filepath>.idx.json`).
+
+    The index stores the source file's size and mtime plus, for every record,
+    its byte offset, byte length, report_type, filename and ticker.
+
+    Args:
+        filepath (str): The path to the JSONL file.
+
+    Returns:
+        dict: The index, or None if the file could not be read.
+    """
+    if not os.path.exists(filepath):
+        print(f"Error: File not found at {filepath}")
+        return None
+
+    stat = os.stat(filepath)
+    entries = [
+        [offset, length, record.get('report_type'), record.get('filename'), _record_ticker(record)]
+        for offset, length, record in stream_jsonl_records(filepath, include_offsets=True)
+    ]
+    index = {
+        "version": INDEX_VERSION,
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "fields": ["offset", "length", "report_type", "filename", "ticker"],
+        "entries": entries
+    }
+
+    try:
+        with open(filepath + INDEX_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+    except OSError as e:
+        print(f"Warning: Could not write index for {filepath}: {e}")
+
+    return index
+
+def _build_lookups(index: dict):
+    """
+    Adds in-memory lookup tables to a loaded index. Each key maps to the
+    positions of all its entries, in file order.
+    """
+    by_filename = {}
+    by_ticker = {}
+    for position, (_, _, report_type, filename, ticker) in enumerate(index['entries']):
+        by_filename.setdefault(filename, []).append(position)
+        if ticker:
+            by_ticker.setdefault((ticker, None), []).append(position)
+            by_ticker.setdefault((ticker, report_type), []).append(position)
+    index['by_filename'] = by_filename
+    index['by_ticker'] = by_ticker
+    return index
+
+def load_jsonl_index(filepath: str = DEFAULT_LLM_OUTPUT_JSONL_PATH):
+    """
+    Returns the offset index for a JSONL file, rebuilding it if the sidecar
+    is missing or the source file's size or mtime has changed.
+
+    Args:
+        filepath (str): The path to the JSONL file.
+
+    Returns:
+        dict: The index with lookup tables, or None if the file could not be read.
+    """
+    if not os.path.exists(filepath):
+        print(f"Error: File not found at {filepath}")
+        return None
+
+    stat = os.stat(filepath)
+    cached = _index_cache.get(filepath)
+    if cached and cached['source_size'] == stat.st_size and cached['source_mtime_ns'] == stat.st_mtime_ns:
+        return cached
+
+    index = None
+    try:
+        with open(filepath + INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if (index.get('version') != INDEX_VERSION or index.get('source_size') != stat.st_size
+                or index.get('source_mtime_ns') != stat.st_mtime_ns):
+            index = None
+    except (OSError, json.JSONDecodeError):
+        index = None
+
+    if index is None:
+        index = build_jsonl_index(filepath)
+        if index is None:
+            return None
+
+    _index_cache[filepath] = _build_lookups(index)
+    return _index_cache[filepath]
+
+def _find_records(ticker, filename, report_type, filepath, limit=None):
+    """
+    Reads the records matching a lookup key through an mmap of the file,
+    stopping after `limit` records when given.
+    """
+    index = load_jsonl_index(filepath)
+    if index is None:
+        return []
+
+    if filename is not None:
+        positions = index['by_filename'].get(filename, [])
+    elif ticker is not None:
+        positions = index['by_ticker'].get((ticker, report_type), [])
+    else:
+        print("Error: a ticker or a filename is needed to look up a report.")
+        return []
+
+    positions = positions[:limit]
+    if not positions:
+        return []
+
+    records = []
+    try:
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for position in positions:
+                offset, length = index['entries'][position][:2]
+                records.append(json.loads(mapped[offset:offset + length]))
+    except (OSError, ValueError) as e:
+        print(f"Error reading records from {filepath}: {e}")
+        return []
+    return records
+
+def get_reports(ticker: str = None, filename: str = None, report_type: str = None,
+                filepath: str = DEFAULT_LLM_OUTPUT_JSONL_PATH):
+    """
+    Fetches every record from a JSONL file that matches a ticker or filename
+    without scanning the file.
+
+    The records' byte ranges are found in the offset index and read through
+    an mmap of the file, so a lookup costs the same however large the file is.
+
+    Args:
+        ticker (str, optional): Ticker symbol to look up, resolved as in
+            stream_jsonl_records. Combined with `report_type` when given.
+        filename (str, optional): Exact `filename` of the records. Takes
+            precedence over `ticker`.
+        report_type (str, optional): Record type, e.g. "ai_credit_report".
+        filepath (str): The path to the JSONL file.
+
+    Returns:
+        list: The matching records in file order; empty if none are found.
+    """
+    return _find_records(ticker, filename, report_type, filepath)
+
+def get_report(ticker: str = None, filename: str = None, report_type: str = None,
+               filepath: str = DEFAULT_LLM_OUTPUT_JSONL_PATH):
+    """
+    Fetches a single record from a JSONL file by ticker or filename: the first
+    match in file order when several records share the key. Takes the same
+    arguments as get_reports.
+
+    Returns:
+        dict: The record, or None if it is not found.
+    """
+    records = _find_records(ticker, filename, report_type, filepath, limit=1)
+    return records[0] if records else None
+
 # Example Usage (typically called from another script like run_credit_judge_poc.py):
 # if __name__ == '__main__':
 #     # Construct path relative to this script or use absolute paths
@@ -46,3 +367,13 @@ def load_ai_report_from_json(filepath: str):
 #         # print(f"Inferred Rating: {report.get('corporateCreditRating', {}).get('rating')}")
 #     else:
 #         print("Failed to load report.")
+#
+# Streaming records out of a large JSONL dump, resuming from a checkpoint:
+# for offset, length, record in stream_jsonl_records(jsonl_path, report_type="ai_credit_report",
+#                                                     start_offset=checkpoint, include_offsets=True):
+#     process(record)
+#     checkpoint = offset + length
+#
+# Random access to one company's record via the sidecar offset index:
+# report = get_report(ticker="MSFT", report_type="ai_credit_report")
+# reviews = get_reports(ticker="MSFT", report_type="expert_review")
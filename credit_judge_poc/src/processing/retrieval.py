@@ -0,0 +1,272 @@
+# Local chunked retrieval over parsed RAG reports (e.g. msft_sim_report.txt).
+# Splits filings into chunks, builds a BM25 index as a SciPy sparse matrix and returns
+# the top-k chunks for each report section's question, so prompts carry only the
+# relevant evidence instead of whole documents.
+
+import json
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+from scipy import sparse
+
+from credit_judge_poc.src.prompts.token_budget import split_sections
+
+# One retrievable piece of a document. `section` is the heading the chunk
+# came from ("" if none).
+Chunk = namedtuple("Chunk", ["doc_id", "section", "text"])
+
+# A retrieval hit: the chunk, its position in the index and its BM25 score.
+SearchResult = namedtuple("SearchResult", ["chunk", "row", "score"])
+
+# Questions used to retrieve evidence for each section of a credit report.
+# Keys match the section names in review_formatter.SECTION_TO_AI_KEY_MAP.
+SECTION_QUERIES = {
+    "Overview": "business overview company operations industry market position products services segments",
+    "Corporate Credit Rating": "credit rating outlook S&P Moody's Fitch upgrade downgrade investment grade rating agency",
+    "Financial Performance": "revenue growth EBITDA operating income net income margin free cash flow quarter fiscal year",
+    "SNCF Regulatory Rating": "debt leverage liquidity cash maturities repayment capacity covenants interest coverage",
+    "Strengths": "strengths competitive advantage market leadership brand scale diversification",
+    "Weaknesses": "weaknesses risks competition regulatory concerns challenges losses litigation",
+    "Special Focus Areas": "recent news acquisition merger product launch announcement strategic",
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "our", "that", "the", "their", "this", "to", "was", "were", "which", "with", "we",
+))
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens with common stopwords removed."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+def chunk_document(text: str, doc_id: str, max_words: int = 120, overlap_words: int = 20) -> list:
+    """
+    Splits a document into chunks of roughly `max_words` words.
+
+    Chunks never cross a section heading. Within a section, whole lines are
+    packed until the limit; consecutive chunks share `overlap_words` words so
+    evidence spanning a boundary is not lost. Each chunk records its section
+    heading, which is indexed with the chunk and shown next to it by
+    format_evidence.
+
+    Returns:
+        list: Chunks in document order.
+    """
+    chunks = []
+    for section in split_sections(text):
+        heading = section.heading.strip()
+        body = section.text.partition("\n")[2] if heading else section.text
+        lines = [line.strip() for line in body.split("\n") if line.strip()]
+
+        # `carried` counts the leading words of `words` already emitted as the
+        # previous chunk's overlap; a tail of only those words adds nothing.
+        words, carried = [], 0
+        for line in lines:
+            line_words = line.split()
+            if len(words) > carried and len(words) + len(line_words) > max_words:
+                chunks.append(Chunk(doc_id, heading, " ".join(words)))
+                words = words[-overlap_words:] if overlap_words else []
+                carried = len(words)
+            words.extend(line_words)
+            # A single very long line is split on word boundaries.
+            while len(words) > max_words:
+                chunks.append(Chunk(doc_id, heading, " ".join(words[:max_words])))
+                words = words[max_words - overlap_words:] if overlap_words else words[max_words:]
+                carried = min(overlap_words, len(words))
+        if len(words) > carried:
+            chunks.append(Chunk(doc_id, heading, " ".join(words)))
+    return chunks
+
+class BM25Index:
+    """
+    BM25 index over chunks, stored as a CSC matrix of precomputed per-term
+    chunk weights, so a query is a sum of a few sparse columns.
+
+    Args:
+        chunks (list): Chunks to index.
+        k1 (float): Term-frequency saturation.
+        b (float): Length normalization.
+    """
+
+    def __init__(self, chunks: list, k1: float = 1.5, b: float = 0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self._build()
+
+    def _build(self):
+        doc_tokens = [tokenize(chunk.section + " " + chunk.text) for chunk in self.chunks]
+        lengths = np.fromiter(map(len, doc_tokens), dtype=np.float64, count=len(doc_tokens))
+        all_tokens = [token for tokens in doc_tokens for token in tokens]
+
+        self.vocabulary = {token: i for i, token in enumerate(dict.fromkeys(all_tokens))}
+        indices = np.fromiter(map(self.vocabulary.__getitem__, all_tokens), dtype=np.int64, count=len(all_tokens))
+        indptr = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        tf = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), indices, indptr),
+            shape=(len(self.chunks), len(self.vocabulary))
+        )
+        tf.sum_duplicates()
+
+        n = max(1, len(self.chunks))
+        df = np.bincount(tf.indices, minlength=len(self.vocabulary))
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        avg_length = lengths.mean() if len(lengths) else 1.0
+
+        # BM25 term weight for every (chunk, term) pair with tf > 0.
+        row_lengths = np.repeat(lengths, np.diff(tf.indptr))
+        norm = self.k1 * (1.0 - self.b + self.b * row_lengths / avg_length)
+        tf.data = tf.data * (self.k1 + 1.0) / (tf.data + norm) * idf[tf.indices]
+        self.weights = tf.tocsc()
+
+        self._doc_ranges = {}
+        for row, chunk in enumerate(self.chunks):
+            start, _ = self._doc_ranges.get(chunk.doc_id, (row, row))
+            self._doc_ranges[chunk.doc_id] = (start, row + 1)
+
+    @property
+    def doc_ids(self) -> list:
+        return list(self._doc_ranges)
+
+    def _query_vector(self, query: str):
+        columns, counts = np.unique(
+            [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary],
+            return_counts=True
+        )
+        return columns, counts.astype(np.float64)
+
+    def search(self, query: str, k: int = 5, doc_id: str = None) -> list:
+        """
+        Returns the top-k chunks for `query`, optionally within one document.
+
+        Returns:
+            list: SearchResults, best first. Chunks with a zero score are
+            never returned.
+        """
+        columns, counts = self._query_vector(query)
+        if len(columns) == 0:
+            return []
+
+        start, end = 0, len(self.chunks)
+        if doc_id is not None:
+            if doc_id not in self._doc_ranges:
+                return []
+            start, end = self._doc_ranges[doc_id]
+
+        postings = self.weights[:, columns]
+        if doc_id is not None:
+            postings = postings[start:end]
+        scores = np.asarray(postings @ counts).ravel()
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [SearchResult(self.chunks[start + i], start + int(i), float(scores[i])) for i in candidates]
+
+    def save(self, path: str):
+        """
+        Writes the index to a single `.npz` file (no pickling).
+        """
+        metadata = {
+            "k1": self.k1,
+            "b": self.b,
+            "vocabulary": list(self.vocabulary),
+            "chunks": [list(chunk) for chunk in self.chunks],
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path,
+            data=self.weights.data, indices=self.weights.indices, indptr=self.weights.indptr,
+            shape=np.array(self.weights.shape),
+            metadata=np.array(json.dumps(metadata))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """
+        Loads an index written by save() without recomputing any weights.
+        """
+        with np.load(path, allow_pickle=False) as stored:
+            metadata = json.loads(str(stored["metadata"]))
+            weights = sparse.csc_matrix(
+                (stored["data"], stored["indices"], stored["indptr"]),
+                shape=tuple(stored["shape"])
+            )
+
+        index = cls.__new__(cls)
+        index.k1 = metadata["k1"]
+        index.b = metadata["b"]
+        index.chunks = [Chunk(*chunk) for chunk in metadata["chunks"]]
+        index.vocabulary = {token: i for i, token in enumerate(metadata["vocabulary"])}
+        index.weights = weights
+        index._doc_ranges = {}
+        for row, chunk in enumerate(index.chunks):
+            start, _ = index._doc_ranges.get(chunk.doc_id, (row, row))
+            index._doc_ranges[chunk.doc_id] = (start, row + 1)
+        return index
+
+def build_index(documents: dict, max_words: int = 120, overlap_words: int = 20, **bm25_kwargs) -> BM25Index:
+    """
+    Chunks and indexes documents.
+
+    Args:
+        documents (dict): doc_id -> document text.
+
+    Returns:
+        BM25Index: The index.
+    """
+    chunks = []
+    for doc_id, text in documents.items():
+        chunks.extend(chunk_document(text, doc_id, max_words, overlap_words))
+    return BM25Index(chunks, **bm25_kwargs)
+
+def retrieve_section_evidence(index: BM25Index, doc_id: str, k: int = 3, queries: dict = None) -> dict:
+    """
+    Retrieves the top-k chunks of one document for each report section.
+
+    Args:
+        index (BM25Index): The index.
+        doc_id (str): Document to retrieve from.
+        k (int): Chunks per section.
+        queries (dict, optional): Section name -> query. Defaults to SECTION_QUERIES.
+
+    Returns:
+        dict: Section name -> list of SearchResults.
+    """
+    return {
+        section_name: index.search(query, k=k, doc_id=doc_id)
+        for section_name, query in (queries or SECTION_QUERIES).items()
+    }
+
+def format_evidence(evidence: dict) -> str:
+    """
+    Renders retrieved evidence as prompt text, grouped by report section.
+    A chunk retrieved for several sections is included only the first time.
+    """
+    seen = set()
+    parts = []
+    for section_name, results in evidence.items():
+        lines = []
+        for result in results:
+            if result.row in seen:
+                continue
+            seen.add(result.row)
+            source = f" ({result.chunk.section.strip('*# ')})" if result.chunk.section else ""
+            lines.append(f"- {result.chunk.text}{source}")
+        if lines:
+            parts.append(f"**Evidence for {section_name}:**\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+# Example Usage:
+# from credit_judge_poc.src.processing.report_parser import load_simulated_rag_report
+# text = load_simulated_rag_report("credit_judge_poc/data/reports_to_be_judged/msft_sim_report.txt")
+# index = build_index({"MSFT": text})
+# index.save("credit_judge_poc/data/retrieval_index.npz")
+# evidence = retrieve_section_evidence(BM25Index.load("credit_judge_poc/data/retrieval_index.npz"), "MSFT", k=2)
+# print(format_evidence(evidence))
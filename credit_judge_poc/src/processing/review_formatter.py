@@ -3,6 +3,63 @@
 
 import json
 
+# Mapping from review sectionName to keys in the AI report JSON
+SECTION_TO_AI_KEY_MAP = {
+    "Overview": "overview",
+    "Corporate Credit Rating": "corporateCreditRating",
+    "Financial Performance": "financialPerformance",
+    "SNCF Regulatory Rating": "sncfRegulatoryRating",
+    "Strengths": "strengths",
+    "Weaknesses": "weaknesses",
+    "Special Focus Areas": "specialFocusAreas"
+}
+
+def format_section_content(content) -> str:
+    """
+    Renders one AI report section as plain text: dicts as indented JSON,
+    lists as bullet points and anything else as-is.
+    """
+    if isinstance(content, dict):
+        return json.dumps(content, indent=2)
+    if isinstance(content, list):
+        return "- " + "\n- ".join(str(item) for item in content)
+    return str(content)
+
+def split_report_sections(ai_report_data: dict) -> list:
+    """
+    Splits an AI report into the sections named in SECTION_TO_AI_KEY_MAP.
+
+    Returns:
+        list: (section_name, section_text) pairs in report order, for the
+        sections present in the report.
+    """
+    if not ai_report_data or not isinstance(ai_report_data, dict):
+        return []
+    return [
+        (section_name, format_section_content(ai_report_data[ai_key]))
+        for section_name, ai_key in SECTION_TO_AI_KEY_MAP.items()
+        if ai_key in ai_report_data
+    ]
+
+def format_report_for_review(ai_report_data: dict) -> str:
+    """
+    Renders an AI report as the text the judge LLM reviews, with one
+    `## <Section Name>` heading per section in SECTION_TO_AI_KEY_MAP.
+
+    Args:
+        ai_report_data (dict): The AI-generated report data.
+
+    Returns:
+        str: The report text, or an empty string if input is invalid.
+    """
+    if not ai_report_data or not isinstance(ai_report_data, dict):
+        return ""
+
+    parts = [ai_report_data.get('reportTitle') or f"Credit Report: {ai_report_data.get('companyName', 'N/A')}"]
+    for section_name, section_text in split_report_sections(ai_report_data):
+        parts.append(f"## {section_name}\n{section_text}")
+    return "\n\n".join(parts)
+
 def format_ai_output_for_review(ai_report_data: dict):
     """
     Formats the AI-generated report data into a simplified structure for review or comparison.
@@ -27,18 +84,28 @@ def format_ai_output_for_review(ai_report_data: dict):
     formatted_review['tickerSymbol'] = ai_report_data.get('tickerSymbol', 'N/A')
     formatted_review['assessmentDate'] = ai_report_data.get('assessmentDate', 'N/A')
 
-    # Extract core credit rating assessment
-    credit_rating_info = ai_report_data.get('corporateCreditRating', {})
+    # Extract core credit rating assessment. Malformed LLM output (a rating
+    # given as a bare string, a missing or non-string justification) falls
+    # back to 'N/A' instead of raising.
+    credit_rating_info = ai_report_data.get('corporateCreditRating')
+    if not isinstance(credit_rating_info, dict):
+        credit_rating_info = {}
     formatted_review['inferredRating'] = credit_rating_info.get('rating', 'N/A')
     formatted_review['outlook'] = credit_rating_info.get('outlook', 'N/A')
-    formatted_review['ratingJustificationSummary'] = credit_rating_info.get('justification', 'N/A')[:200] + "..." # Summary
+    justification = credit_rating_info.get('justification')
+    if isinstance(justification, str) and justification.strip():
+        formatted_review['ratingJustificationSummary'] = justification[:200] + "..." # Summary
+    else:
+        formatted_review['ratingJustificationSummary'] = "N/A"
 
     # Extract a summary of strengths (example: first two strengths)
     strengths = ai_report_data.get('strengths', [])
+    strengths = strengths if isinstance(strengths, list) else []
     formatted_review['keyStrengthsSummary'] = strengths[:2] if strengths else ["N/A"]
     
     # Extract a summary of weaknesses (example: first two weaknesses)
     weaknesses = ai_report_data.get('weaknesses', [])
+    weaknesses = weaknesses if isinstance(weaknesses, list) else []
     formatted_review['keyWeaknessesSummary'] = weaknesses[:2] if weaknesses else ["N/A"]
 
     # Placeholder for quantitative scores if AI report included section self-scores
@@ -3,6 +3,8 @@
 
 # credit_judge_poc/src/prompts/judge_prompts.py
 
+from credit_judge_poc.src.prompts.template_engine import compile_template
+
 CORPORATE_CREDIT_RATING_REPORT_TEMPLATE = """
 **Objective:** Generate a Corporate Credit Rating Report for the specified company. If a human example is provided, also compare the AI-generated report to it and provide a performance score.
 
@@ -161,7 +163,7 @@ You are acting as a seasoned credit analyst. Your task is to critically evaluate
 ```text
 {{input_credit_report_text}}
 ```
-
+{{source_evidence}}
 **Instructions for Review and JSON Output Structure:**
 
 Based on the "Input Credit Report to be Reviewed" above, generate a single JSON object that follows the structure outlined below.
@@ -310,3 +312,120 @@ Ensure the entire output is valid Markdown.
 #     human_expert_report_text=example_human_expert_report
 # )
 # print(filled_comparison_prompt)
+
+
+SECTION_REVIEW_TEMPLATE = """
+**Objective:** Review a single section of a credit report as a seasoned credit analyst and return your review as a JSON object.
+
+**Company:** {{company_name}}
+**Section Under Review:** {{section_name}}
+
+**Section Content:**
+```text
+{{section_content}}
+```
+{{section_evidence}}
+**What to Assess in This Section:**
+{{section_guidance}}
+
+**JSON Output Structure:**
+
+```json
+{
+  "sectionName": "{{section_name}}",
+  "qualitativeFeedback": "[Specific feedback on this section: accuracy, completeness, clarity and analytical depth. What was done well? What could be improved? Aim for 1-3 sentences.]",
+  "quantitativeScore": "[Numerical score (0-10) for the quality of this section.]",
+  "dataAccuracy": "[Score (0-10) for the perceived accuracy of the data presented, or 'N/A'.]",
+  "completeness": "[Score (0-10) for how complete the information and analysis are for this section's typical scope, or 'N/A'.]",
+  "analyticalDepth": "[Score (0-10) for the depth of analysis and insight, or 'N/A'.]"{{extra_fields}}
+}
+```
+
+**Guidelines:**
+-   **Judge Only This Section:** Other sections of the report are reviewed separately; do not penalize this section for content that belongs elsewhere.
+-   **Be Critical but Fair, and Specific.**
+-   **Adhere to JSON Format:** Return a single, valid JSON object as specified.
+"""
+
+# Section-specific review criteria for SECTION_REVIEW_TEMPLATE, keyed by the
+# section names used in the gold standard reviews.
+SECTION_REVIEW_GUIDANCE = {
+    "Overview": "Does it accurately describe the business, industry, market position, recent performance highlights and key challenges?",
+    "Corporate Credit Rating": "Is the inferred S&P-equivalent rating and outlook consistent with the company's risk profile? Is the justification sound, and are upgrade/downgrade triggers specific and relevant?",
+    "Financial Performance": "Are revenue, EBITDA, free cash flow and leverage figures plausible, tied to reporting periods, and interpreted correctly (growth, margins, trends, liquidity)?",
+    "SNCF Regulatory Rating": "Is the indicative SNC classification (Pass, Special Mention, Substandard) consistent with the company's repayment capacity, and are the rationale and triggers appropriate?",
+    "Strengths": "Are the listed strengths material to credit quality, specific to the company, and supported by the rest of the report?",
+    "Weaknesses": "Are the key credit risks (operational, financial, market, regulatory) identified, specific, and not generic?",
+    "Special Focus Areas": "Do the focus areas address the most credit-relevant open questions and say what should be monitored?",
+}
+
+# Extra JSON field requested only for the rating section, so the merged
+# review can report overall rating concurrence.
+RATING_CONCURRENCE_FIELD = (
+    ',\n  "ratingConcurrence": "[State whether you \'Strongly Agree\', \'Agree\', \'Neutral\', '
+    '\'Disagree\', or \'Strongly Disagree\' with the inferred rating and its justification.]"'
+)
+
+# Optional block placed after the text under review in EXPERT_REVIEW_PROMPT and
+# SECTION_REVIEW_PROMPT when source filings are indexed: the chunks retrieved
+# for each section's question (see processing/retrieval.py).
+SOURCE_EVIDENCE_TEMPLATE = """
+**Source Evidence (excerpts retrieved from the company's filings; check the report's facts and figures against them):**
+```text
+{{evidence}}
+```
+"""
+
+
+# --- Compiled Templates ---
+# Each template above compiled once at import. Render with e.g.
+# EXPERT_REVIEW_PROMPT.render(input_credit_report_text=..., report_id_placeholder=..., current_date=...).
+CORPORATE_CREDIT_RATING_REPORT_PROMPT = compile_template(
+    CORPORATE_CREDIT_RATING_REPORT_TEMPLATE,
+    defaults={
+        "stock_exchange": "N/A",
+        "specific_financial_period_override": "N/A",
+        "specific_revenue_override": "N/A",
+        "specific_adj_ebitda_override": "N/A",
+        "specific_net_income_override": "N/A",
+        "specific_fcf_override": "N/A",
+        "specific_other_data_override": "N/A",
+        "special_focus_areas": "N/A",
+        "human_example_report_text": "N/A",
+    },
+    required=("company_name", "ticker_symbol", "current_date"),
+    name="CORPORATE_CREDIT_RATING_REPORT_TEMPLATE"
+)
+
+SIMULATED_INPUT_REPORT_PROMPT = compile_template(
+    SIMULATED_INPUT_REPORT_TEMPLATE,
+    defaults={"industry": "N/A", "focus_areas": "N/A"},
+    required=("company_name", "ticker_symbol"),
+    name="SIMULATED_INPUT_REPORT_TEMPLATE"
+)
+
+EXPERT_REVIEW_PROMPT = compile_template(
+    EXPERT_REVIEW_TABLE_GENERATION_TEMPLATE,
+    defaults={"source_evidence": ""},
+    required=("input_credit_report_text", "report_id_placeholder", "current_date"),
+    name="EXPERT_REVIEW_TABLE_GENERATION_TEMPLATE"
+)
+
+COMPARISON_TABLE_PROMPT = compile_template(
+    COMPARISON_TABLE_GENERATION_TEMPLATE,
+    required=("company_name", "ai_generated_report_text", "human_expert_report_text"),
+    name="COMPARISON_TABLE_GENERATION_TEMPLATE"
+)
+
+SECTION_REVIEW_PROMPT = compile_template(
+    SECTION_REVIEW_TEMPLATE,
+    defaults={"extra_fields": "", "section_evidence": ""},
+    required=("company_name", "section_name", "section_content", "section_guidance"),
+    name="SECTION_REVIEW_TEMPLATE"
+)
+
+SOURCE_EVIDENCE_PROMPT = compile_template(
+    SOURCE_EVIDENCE_TEMPLATE,
+    required=("evidence",),
+    name="SOURCE_EVIDENCE_TEMPLATE"
+)
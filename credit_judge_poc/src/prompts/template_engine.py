@@ -0,0 +1,125 @@
+# Precompiled renderer for the `{{placeholder}}` prompt templates in judge_prompts.py.
+# Each template is parsed once into static text and variable slots, so rendering is
+# a single join with no regex or brace scanning per prompt.
+
+import re
+from functools import lru_cache
+
+_PLACEHOLDER_RE = re.compile(r"{{(\w+)}}")
+
+class TemplateError(ValueError):
+    """Raised for templates that fail validation or renders with missing variables."""
+
+class CompiledTemplate:
+    """
+    A prompt template compiled into alternating static text and variable slots.
+
+    Literal braces (e.g. JSON examples in the prompt) are left untouched; only
+    `{{name}}` placeholders are variables. A variable may appear several times.
+
+    Args:
+        source (str): The template text.
+        defaults (dict, optional): Values for optional variables. Every other
+            variable is required at render time.
+        required (iterable, optional): Variables the template must contain.
+            Checked at compile time, so a renamed or misspelt placeholder is
+            caught when the template is defined rather than at first use.
+        name (str, optional): Used in error messages.
+
+    Raises:
+        TemplateError: If a required variable or a default has no placeholder.
+    """
+    __slots__ = ("source", "name", "variables", "required", "defaults", "static_prefix", "_static", "_slots")
+
+    def __init__(self, source: str, defaults: dict = None, required=None, name: str = None):
+        self.source = source
+        self.name = name or "template"
+
+        pieces = _PLACEHOLDER_RE.split(source)
+        self._static = pieces[0::2]
+        self._slots = pieces[1::2]
+        self.variables = tuple(dict.fromkeys(self._slots))
+        self.static_prefix = self._static[0]
+
+        self.defaults = {key: str(value) for key, value in (defaults or {}).items()}
+        unknown = set(self.defaults).union(required or ()) - set(self.variables)
+        if unknown:
+            raise TemplateError(f"{self.name} has no placeholder for: {', '.join(sorted(unknown))}")
+        self.required = frozenset(self.variables) - set(self.defaults)
+
+    def render(self, values: dict = None, **kwargs) -> str:
+        """
+        Renders the template. Values may be passed as a dict, keywords, or both.
+        Extra values are ignored.
+
+        Raises:
+            TemplateError: If a required variable has no value.
+        """
+        if values:
+            kwargs = {**values, **kwargs}
+        missing = self.required.difference(kwargs)
+        if missing:
+            raise TemplateError(f"{self.name} is missing values for: {', '.join(sorted(missing))}")
+
+        defaults = self.defaults
+        parts = [None] * (len(self._static) + len(self._slots))
+        parts[0::2] = self._static
+        parts[1::2] = [str(kwargs[slot]) if slot in kwargs else defaults[slot] for slot in self._slots]
+        return "".join(parts)
+
+    def partial(self, **values) -> "CompiledTemplate":
+        """
+        Returns a new template with some variables bound. Binding the values
+        that are the same for every call (e.g. the date) lengthens the static
+        prefix shared by all rendered prompts.
+        """
+        static = [self._static[0]]
+        slots = []
+        for slot, text in zip(self._slots, self._static[1:]):
+            if slot in values:
+                static[-1] += str(values[slot]) + text
+            else:
+                slots.append(slot)
+                static.append(text)
+
+        bound = CompiledTemplate.__new__(CompiledTemplate)
+        bound.source = self.source
+        bound.name = self.name
+        bound._static = static
+        bound._slots = slots
+        bound.variables = tuple(dict.fromkeys(slots))
+        bound.static_prefix = static[0]
+        bound.defaults = {key: value for key, value in self.defaults.items() if key in bound.variables}
+        bound.required = frozenset(bound.variables) - set(bound.defaults)
+        return bound
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.name!r}, variables={list(self.variables)})"
+
+@lru_cache(maxsize=None)
+def _compile_cached(source: str, defaults: tuple, required: tuple, name: str) -> CompiledTemplate:
+    return CompiledTemplate(source, defaults=dict(defaults), required=required, name=name)
+
+def compile_template(source: str, defaults: dict = None, required=None, name: str = None) -> CompiledTemplate:
+    """
+    Compiles a template, reusing the compiled form for identical arguments.
+    """
+    return _compile_cached(
+        source,
+        tuple(sorted((defaults or {}).items())),
+        tuple(sorted(required or ())),
+        name
+    )
+
+def render_template(source: str, values: dict = None, **kwargs) -> str:
+    """
+    One-off convenience: compiles (once, cached) and renders `source`.
+    """
+    return compile_template(source).render(values, **kwargs)
+
+# Example Usage:
+# from credit_judge_poc.src.prompts.judge_prompts import EXPERT_REVIEW_PROMPT
+# prompt = EXPERT_REVIEW_PROMPT.render(input_credit_report_text=report_text,
+#                                      report_id_placeholder="DKNG-AI-Report-2024-Q3",
+#                                      current_date="2025-05-24")
+# EXPERT_REVIEW_PROMPT.static_prefix  # text shared by every rendered prompt
@@ -0,0 +1,310 @@
+# Offline token counting and prompt budgeting for long report inputs.
+# Fits documents inlined into prompts (retrieved snippets, full report texts) into a
+# token budget by shrinking their lowest-priority sections first.
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+# A rendered prompt together with its estimated size, for schedulers that
+# pack requests against a tokens-per-minute budget.
+RenderedPrompt = namedtuple("RenderedPrompt", ["text", "estimated_tokens"])
+
+# A piece of a document that can be shrunk independently. Higher priority
+# sections are trimmed last; `min_tokens` of 0 lets a section be dropped.
+Section = namedtuple("Section", ["heading", "text", "priority", "min_tokens"])
+
+TRUNCATION_MARKER = "[... {omitted} tokens omitted ...]"
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_HEADING_RE = re.compile(r"^(?:#{1,6} |\*\*[^*\n]+\*\*\s*$|[IVX]+\.\s)", re.M)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+_ENCODING_NAME = "cl100k_base"
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    """
+    Returns a tiktoken encoding if the optional `tiktoken` package is
+    installed and its data is available, else None.
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+        except Exception:
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+def estimate_tokens_heuristic(text: str) -> int:
+    """
+    Estimates a BPE token count without a tokenizer: each punctuation mark
+    is one token and each word one token per started 6 characters. Numbers
+    and symbols, common in financial text, are counted closer to how BPE
+    tokenizers split them than a flat characters-per-token ratio.
+    """
+    return sum(1 if len(piece) <= 6 else math.ceil(len(piece) / 6) for piece in _WORD_RE.findall(text))
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken when available, else with
+    estimate_tokens_heuristic. Results are cached by a hash of the text, so
+    re-counting the same document (e.g. while budgeting several prompts
+    around it) is a dictionary lookup.
+
+    Args:
+        max_entries (int): Number of cached counts kept (least recently used
+            entries are evicted).
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> str:
+        return "tiktoken" if _get_encoding() is not None else "heuristic"
+
+    def _count_uncached(self, text: str) -> int:
+        encoding = _get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return estimate_tokens_heuristic(text)
+
+    def count(self, text: str) -> int:
+        """Returns the token count of `text`."""
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        count = self._count_uncached(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = count
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return count
+
+_default_counter = TokenCounter()
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with the shared, cached TokenCounter."""
+    return _default_counter.count(text)
+
+def split_sections(text: str, priorities: dict = None, default_priority: int = 0, min_tokens: int = 0) -> list:
+    """
+    Splits a document into Sections at heading lines (Markdown `#` headings,
+    whole-line `**bold**` titles or Roman-numeral headings), falling back to
+    blank-line paragraphs when there are no headings.
+
+    Args:
+        text (str): The document.
+        priorities (dict, optional): Maps a case-insensitive substring of a
+            heading to a priority, e.g. {"financial": 3, "overview": 2}.
+            The first match wins. Text before the first heading gets the
+            highest priority of any section.
+        default_priority (int): Priority of sections matching no key.
+        min_tokens (int): Floor applied to every section.
+
+    Returns:
+        list: Sections in document order.
+    """
+    starts = [m.start() for m in _HEADING_RE.finditer(text)]
+    if starts:
+        bounds = ([0] if starts[0] > 0 else []) + starts + [len(text)]
+        chunks = [text[a:b] for a, b in zip(bounds, bounds[1:])]
+    else:
+        chunks = [chunk + "\n\n" for chunk in text.split("\n\n")]
+
+    sections = []
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        heading = chunk.strip().split("\n", 1)[0] if _HEADING_RE.match(chunk) else ""
+        priority = default_priority
+        for key, value in (priorities or {}).items():
+            if key.lower() in heading.lower():
+                priority = value
+                break
+        sections.append(Section(heading, chunk, priority, min_tokens))
+
+    if sections and not sections[0].heading:
+        top = max(section.priority for section in sections)
+        sections[0] = sections[0]._replace(priority=top)
+    return sections
+
+def shrink_text(text: str, max_tokens: int, counter: TokenCounter = None) -> str:
+    """
+    Shrinks `text` to at most `max_tokens`, keeping its heading line and the
+    longest run of leading sentences that fits. A marker records how many
+    tokens were omitted.
+    """
+    counter = counter or _default_counter
+    total = counter.count(text)
+    if total <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    marker = TRUNCATION_MARKER.format(omitted=total)
+    budget = max_tokens - counter.count(marker)
+    if budget <= 0:
+        return ""
+
+    # Binary search on the number of leading sentences that fit.
+    sentences = _SENTENCE_END_RE.split(text)
+    low, high = 0, len(sentences)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if counter.count(" ".join(sentences[:mid])) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+
+    kept = " ".join(sentences[:low])
+    if not kept:
+        # A single sentence is longer than the budget: cut it by characters.
+        ratio = budget / max(1, counter.count(sentences[0]))
+        kept = sentences[0][:int(len(sentences[0]) * ratio)]
+    omitted = total - counter.count(kept)
+    return kept.rstrip() + "\n" + TRUNCATION_MARKER.format(omitted=omitted) + "\n"
+
+def _omitted(section: Section) -> str:
+    return (section.heading + "\n[section omitted]\n") if section.heading else ""
+
+def fit_sections(sections: list, max_tokens: int, counter: TokenCounter = None, summarizer=None) -> str:
+    """
+    Joins sections into a document of at most `max_tokens`, shrinking the
+    lowest-priority sections first (later sections first among equals).
+
+    Everything emitted is charged against the budget, including truncation
+    markers and the headings kept for omitted sections. Sections are first
+    shrunk down to their `min_tokens`; if that is not enough the floors are
+    ignored, and finally omitted-section headings and whole sections are
+    dropped until the document fits.
+
+    Args:
+        sections (list): Sections from split_sections.
+        max_tokens (int): Token budget for the whole document.
+        counter (TokenCounter, optional): Defaults to the shared counter.
+        summarizer (callable, optional): `summarizer(text, max_tokens) -> str`
+            used instead of shrink_text, e.g. an LLM summarization call.
+
+    Returns:
+        str: The fitted document.
+    """
+    counter = counter or _default_counter
+    if max_tokens <= 0:
+        return ""
+    shrink = summarizer or (lambda text, limit: shrink_text(text, limit, counter))
+    texts = [section.text for section in sections]
+    sizes = [counter.count(text) for text in texts]
+    order = sorted(range(len(sections)), key=lambda i: (sections[i].priority, -i))
+
+    def overflow():
+        return counter.count("".join(texts)) - max_tokens
+
+    for keep_floor in (True, False):
+        # Section sizes are tracked incrementally; `slack` corrects for token
+        # counts not being exactly additive across section boundaries.
+        slack = overflow() - (sum(sizes) - max_tokens)
+        for i in order:
+            excess = sum(sizes) - max_tokens + slack
+            if excess <= 0:
+                break
+            floor = min(sections[i].min_tokens, sizes[i]) if keep_floor else 0
+            target = max(floor, sizes[i] - excess)
+            if target >= sizes[i]:
+                continue
+            if target <= 0 or texts[i] == _omitted(sections[i]):
+                texts[i] = _omitted(sections[i])
+            else:
+                texts[i] = shrink(texts[i], target)
+            sizes[i] = counter.count(texts[i])
+        if overflow() <= 0:
+            return "".join(texts)
+
+    # Still over: drop omitted-section headings, then whole sections.
+    for dropped in (lambda i: texts[i] == _omitted(sections[i]), lambda i: True):
+        for i in order:
+            if overflow() <= 0:
+                break
+            if texts[i] and dropped(i):
+                texts[i] = ""
+    return "".join(texts)
+
+def fit_text(text: str, max_tokens: int, priorities: dict = None, counter: TokenCounter = None, summarizer=None) -> str:
+    """
+    Convenience wrapper: split_sections followed by fit_sections.
+    """
+    counter = counter or _default_counter
+    if counter.count(text) <= max_tokens:
+        return text
+    return fit_sections(split_sections(text, priorities), max_tokens, counter, summarizer)
+
+def render_with_budget(template, max_tokens: int, budgeted: dict, values: dict = None,
+                       priorities: dict = None, counter: TokenCounter = None, summarizer=None) -> RenderedPrompt:
+    """
+    Renders a CompiledTemplate so the whole prompt fits in `max_tokens`.
+
+    The template's fixed text and `values` are counted first. The remaining
+    budget is shared between the `budgeted` variables in proportion to their
+    size, and each is fitted with fit_text. If the rendered prompt still
+    comes out over budget, the shares are reduced by the excess and the
+    documents refitted.
+
+    Args:
+        template (CompiledTemplate): e.g. judge_prompts.COMPARISON_TABLE_PROMPT.
+        max_tokens (int): Token budget for the rendered prompt.
+        budgeted (dict): Variables holding long documents that may be trimmed.
+        values (dict, optional): Other template variables, never trimmed.
+        priorities (dict, optional): Heading priorities, see split_sections.
+
+    Returns:
+        RenderedPrompt: The prompt text and its estimated token count.
+
+    Raises:
+        ValueError: If the template and `values` alone exceed `max_tokens`.
+    """
+    counter = counter or _default_counter
+    values = dict(values or {})
+    base_tokens = counter.count(template.render(values, **{name: "" for name in budgeted}))
+    if base_tokens > max_tokens:
+        raise ValueError(f"Prompt '{template.name}' needs {base_tokens} tokens without its documents, "
+                         f"more than the budget of {max_tokens}.")
+
+    sizes = {name: counter.count(text) for name, text in budgeted.items()}
+    total = sum(sizes.values())
+    available = max_tokens - base_tokens
+    while True:
+        for name, text in budgeted.items():
+            share = available if total <= available else int(available * sizes[name] / total)
+            values[name] = fit_text(text, share, priorities, counter, summarizer)
+        text = template.render(values)
+        tokens = counter.count(text)
+        if tokens <= max_tokens or available <= 0:
+            return RenderedPrompt(text, tokens)
+        available = max(0, available - (tokens - max_tokens))
+
+# Example Usage:
+# from credit_judge_poc.src.prompts.judge_prompts import COMPARISON_TABLE_PROMPT
+# prompt = render_with_budget(
+#     COMPARISON_TABLE_PROMPT, max_tokens=8000,
+#     budgeted={"ai_generated_report_text": ai_text, "human_expert_report_text": human_text},
+#     values={"company_name": "Microsoft Corp."},
+#     priorities={"financial": 3, "rating": 3, "weakness": 2, "strength": 1})
+# print(prompt.estimated_tokens)
@@ -0,0 +1,126 @@
+# Pairing AI reports with the gold reviews that reviewed them, and the metrics
+# and results table built from the pairs.
+
+import csv
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from credit_judge_poc.evaluation_poc.batch_evaluation import (
+    OVERALL_SECTION, RESULT_COLUMNS, build_results_table, compute_metrics, load_pairs, run_batch_evaluation,
+    write_table
+)
+
+def _write(directory, name, document):
+    directory.mkdir(exist_ok=True)
+    (directory / name).write_text(json.dumps(document))
+
+def _report(ticker, date):
+    return {"tickerSymbol": ticker, "assessmentDate": date, "companyName": ticker}
+
+def _review(report_id=None):
+    review = {"sectionReviews": [], "overallAssessment": {"overallScore": 7}}
+    if report_id is not None:
+        review["reviewedReportId"] = report_id
+    return review
+
+def _pairs(tmp_path):
+    return [(report["assessmentDate"], review_path.rsplit("/", 1)[-1])
+            for report, _, review_path in load_pairs(str(tmp_path / "reports"), (str(tmp_path / "reviews"),), workers=2)]
+
+def test_reviews_pair_with_the_report_they_name(tmp_path):
+    _write(tmp_path / "reports", "a1.json", _report("ACME", "2024-01-01"))
+    _write(tmp_path / "reports", "a2.json", _report("ACME", "2024-04-01"))
+    _write(tmp_path / "reviews", "r1.json", _review("ACME-AI-Report-2024-01-01"))
+    _write(tmp_path / "reviews", "r2.json", _review("ACME-AI-Report-2024-04-01"))
+    assert _pairs(tmp_path) == [("2024-01-01", "r1.json"), ("2024-04-01", "r2.json")]
+
+def test_ticker_fallback_only_when_unambiguous(tmp_path):
+    _write(tmp_path / "reports", "a1.json", _report("ACME", "2024-01-01"))
+    _write(tmp_path / "reports", "a2.json", _report("ACME", "2024-04-01"))
+    _write(tmp_path / "reports", "b1.json", _report("BETA", "2024-01-01"))
+    _write(tmp_path / "reviews", "acme.json", _review("ACME-AI-Report-2024-Q3"))
+    _write(tmp_path / "reviews", "beta.json", _review("BETA-AI-Report-2024-Q3"))
+    _write(tmp_path / "reviews", "no_id.json", _review())
+    assert _pairs(tmp_path) == [("2024-01-01", "beta.json")]
+
+def _scored_review(overall, sections, concurrence):
+    return {
+        "overallAssessment": {"overallScore": overall, "ratingConcurrence": concurrence},
+        "sectionReviews": [{"sectionName": name, "quantitativeScore": score} for name, score in sections.items()]
+    }
+
+def _table():
+    reports = [_report("ACME", "2024-01-01"), _report("BETA", "2024-01-01"),
+               _report("GAMA", "2024-01-01"), _report("DELT", "2024-01-01")]
+    human = [_scored_review(8, {"Liquidity": 7}, "Agree"),
+             _scored_review(6, {"Liquidity": "N/A"}, "Disagree"),
+             _scored_review(4, {"Liquidity": 3}, "Strongly Agree"),
+             _scored_review("N/A", {"Liquidity": 9}, None)]
+    judge = [_scored_review(7, {"Liquidity": 7}, "Agree"),
+             _scored_review(5, {"Liquidity": 6}, "Agree"),
+             _scored_review(3, {"Liquidity": 2}, "Strongly Agree"),
+             None]
+    pairs = [(report, review, f"/gold/{report['tickerSymbol']}.json") for report, review in zip(reports, human)]
+    judge_reviews = {f"{report['tickerSymbol']}-AI-Report-2024-01-01": review for report, review in zip(reports, judge)}
+    return build_results_table(pairs, judge_reviews)
+
+def test_results_table_reads_non_numeric_scores_as_nan():
+    table = _table()
+
+    assert tuple(table) == RESULT_COLUMNS
+    assert table["section"] == [OVERALL_SECTION, "Liquidity"] * 4
+    np.testing.assert_array_equal(table["human_score"], [8, 7, 6, np.nan, 4, 3, np.nan, 9])
+    # The last report failed to judge, so its judge scores are missing too.
+    np.testing.assert_array_equal(table["judge_score"], [7, 7, 5, 6, 3, 2, np.nan, np.nan])
+
+def test_compute_metrics_skips_missing_scores():
+    metrics = compute_metrics(_table())
+
+    assert metrics["pairs"] == 4
+    concurrence = metrics["ratingConcurrence"]
+    assert concurrence["human"] == {"count": 3, "unparsed": 1, "concurrenceRate": 0.6667,
+                                    "labels": {"Disagree": 1, "Agree": 1, "Strongly Agree": 1}}
+    assert concurrence["judge"]["concurrenceRate"] == 1.0
+    assert concurrence["judgeVsHuman"]["compared"] == 3
+    assert concurrence["judgeMatchesHuman"] == 0.6667
+
+    overall = metrics["sections"][OVERALL_SECTION]
+    assert overall["human"]["count"] == 3
+    assert overall["correlation"] == {"pairs": 3, "pearson": 1.0, "spearman": 1.0, "meanAbsoluteError": 1.0}
+    liquidity = metrics["sections"]["Liquidity"]["correlation"]
+    assert liquidity["pairs"] == 2
+    assert liquidity["pearson"] is None
+    assert liquidity["meanAbsoluteError"] == 0.5
+    assert metrics["overall"] == liquidity
+
+def test_write_table_falls_back_to_csv_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    table = _table()
+
+    path = write_table(table, str(tmp_path / "results"))
+
+    assert path == str(tmp_path / "results.csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(RESULT_COLUMNS)
+    assert len(rows) == 1 + len(table["section"])
+    assert rows[1][4:7] == [OVERALL_SECTION, "8", "7"]
+    # NaN scores and missing concurrence labels are written as empty cells.
+    assert rows[4][5:7] == ["", "6"]
+    assert rows[7][5:9] == ["", "", "", ""]
+
+def test_write_table_rejects_formats_it_cannot_write(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="pyarrow"):
+        write_table(_table(), str(tmp_path / "results"), "parquet")
+    with pytest.raises(ValueError, match="Unknown output format"):
+        write_table(_table(), str(tmp_path / "results"), "xlsx")
+
+def test_batch_evaluation_without_pairs_names_the_pairing_rule(tmp_path):
+    _write(tmp_path / "reports", "a1.json", _report("ACME", "2024-01-01"))
+    (tmp_path / "reviews").mkdir()
+    with pytest.raises(ValueError, match="reviewedReportId"):
+        run_batch_evaluation(str(tmp_path / "reports"), (str(tmp_path / "reviews"),), str(tmp_path / "out"), workers=2)
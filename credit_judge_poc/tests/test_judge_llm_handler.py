@@ -0,0 +1,123 @@
+# Judge backends and parsing judge responses.
+
+import json
+
+import pytest
+
+from credit_judge_poc.src.core.credit_evaluator import build_review_prompt, build_section_prompt
+from credit_judge_poc.src.llm_interface.judge_llm_handler import (
+    JudgeBackend, OpenAIJudgeBackend, StubJudgeBackend, get_judge_backend, parse_section_review, request_review
+)
+from credit_judge_v2.src.llm_interface.rate_limiter import RateLimitScheduler
+from credit_judge_v2.src.llm_interface.replay_backend import InjectedRateLimitError
+
+REPORT = {
+    "reportTitle": "AI-Generated Corporate Credit Assessment: Acme Corp (ACME)",
+    "assessmentDate": "2024-10-28",
+    "companyName": "Acme Corp",
+    "tickerSymbol": "ACME",
+    "overview": "Acme makes anvils and rockets. Revenue grew 12% to 1.2B on new contracts.",
+    "corporateCreditRating": {"rating": "BB+", "outlook": "Stable", "justification": "Moderate leverage."},
+    "strengths": ["Brand", "Scale"],
+}
+
+class ScriptedBackend(JudgeBackend):
+    """Returns canned responses in order."""
+    name = "scripted"
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def complete(self, prompt):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+def test_judge_backend_is_abstract():
+    with pytest.raises(TypeError):
+        JudgeBackend()
+
+def test_stub_reviews_every_section_of_a_report_prompt():
+    prompt = build_review_prompt(REPORT, current_date="2024-11-01").text
+
+    review = request_review(StubJudgeBackend(), prompt)
+
+    assert review["reviewedReportId"] == "ACME-AI-Report-2024-10-28"
+    assert review["reviewDate"] == "2024-11-01"
+    sections = review["sectionReviews"]
+    assert len(sections) >= 3
+    scores = [section["quantitativeScore"] for section in sections]
+    assert all(5 <= score <= 9 for score in scores)
+    assert review["overallAssessment"]["overallScore"] == round(sum(scores) / len(scores), 1)
+    assert review["overallAssessment"]["ratingConcurrence"] in ("Strongly Agree", "Agree", "Neutral", "Disagree")
+
+def test_stub_is_deterministic_per_seed():
+    prompt = build_review_prompt(REPORT, current_date="2024-11-01").text
+
+    assert StubJudgeBackend().complete(prompt) == StubJudgeBackend().complete(prompt)
+    reviews = {StubJudgeBackend(seed=str(seed)).complete(prompt) for seed in range(10)}
+    assert len(reviews) > 1
+
+def test_stub_reviews_one_section_of_a_section_prompt():
+    prompt = build_section_prompt(REPORT, "Overview", REPORT["overview"])
+
+    review = request_review(StubJudgeBackend(), prompt, parser=parse_section_review)
+
+    assert review["sectionName"] == "Overview"
+    assert 5 <= review["quantitativeScore"] <= 9
+    # The overview quotes figures, so data accuracy is scored.
+    assert isinstance(review["dataAccuracy"], int)
+
+def test_request_review_retries_unparseable_responses():
+    review = {"overallAssessment": {"overallScore": "8"}, "sectionReviews": [{"quantitativeScore": "7.5"}]}
+    backend = ScriptedBackend(["I cannot review this.", "```json\n" + json.dumps(review) + "\n```"])
+
+    parsed = request_review(backend, "prompt")
+
+    assert parsed["overallAssessment"]["overallScore"] == 8
+    assert parsed["sectionReviews"][0]["quantitativeScore"] == 7.5
+    assert backend.prompts == ["prompt", "prompt"]
+
+def test_request_review_raises_after_max_attempts():
+    backend = ScriptedBackend(["no json", '{"sectionReviews": []}', "unused"])
+
+    with pytest.raises(ValueError, match="overallAssessment"):
+        request_review(backend, "prompt", max_attempts=2)
+    assert len(backend.prompts) == 2
+
+def test_get_judge_backend_defaults_to_the_stub_without_a_key(monkeypatch):
+    for name in ("CREDIT_JUDGE_BACKEND", "YOUR_LLM_API_KEY", "OPENAI_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+    assert isinstance(get_judge_backend(), StubJudgeBackend)
+    with pytest.raises(ValueError):
+        get_judge_backend("unknown")
+
+class _FakeCompletions:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) <= self.failures:
+            raise InjectedRateLimitError(retry_after=0.001)
+        message = type("Message", (), {"content": '{"overallAssessment": {}}'})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})], "usage": None})
+
+def test_openai_backend_reads_the_model_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CREDIT_JUDGE_MODEL", "gpt-4o-mini")
+
+    assert OpenAIJudgeBackend(api_key="test").model == "gpt-4o-mini"
+    assert OpenAIJudgeBackend(model="gpt-4o", api_key="test").model == "gpt-4o"
+
+def test_openai_backend_retries_rate_limits_through_the_scheduler():
+    scheduler = RateLimitScheduler(requests_per_minute=60000, max_retries=3)
+    backend = OpenAIJudgeBackend(model="judge-model", api_key="test", scheduler=scheduler)
+    completions = _FakeCompletions(failures=2)
+    backend._client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})})
+
+    assert backend.complete("prompt") == '{"overallAssessment": {}}'
+    assert len(completions.calls) == 3
+    assert scheduler.retries == 2
+    assert completions.calls[0]["model"] == "judge-model"
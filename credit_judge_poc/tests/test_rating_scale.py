@@ -0,0 +1,74 @@
+# Parsing ratings and concurrence labels, and comparing predicted with reference labels.
+
+import numpy as np
+import pytest
+
+from credit_judge_poc.src.processing.rating_scale import (
+    CONCURRENCE_SCALE, SNC_SCALE, SP_RATINGS, SP_SCALE, UNRATED, agreement_summary, concurrence_rate,
+    confusion_matrix, notch_distance, to_notches
+)
+
+def test_to_notches_parses_sp_moodys_and_annotated_labels():
+    notches = to_notches(["AAA", "BBB+", "bb+ (Stable)", "Baa2", "BBB-/Negative", "SD", "NR", None, ""])
+
+    assert notches.dtype == np.int16
+    assert notches.tolist() == [0, 7, 10, 8, 9, len(SP_RATINGS) - 1, UNRATED, UNRATED, UNRATED]
+
+def test_to_notches_does_not_read_a_word_as_a_rating():
+    assert to_notches(["Above average", "Baseline", "A-"]).tolist() == [UNRATED, UNRATED, SP_RATINGS.index("A-")]
+
+@pytest.mark.parametrize("label, expected", [
+    ("Agree", "Agree"),
+    ("Agreed", "Agree"),
+    ("agreed, with reservations", "Agree"),
+    ("Strongly agreed.", "Strongly Agree"),
+    ("Disagreed", "Disagree"),
+    ("Largely Agree", "Agree"),
+    ("Partially disagree - leverage is understated", "Neutral"),
+    ("Concur", "Agree"),
+    ("Neutral", "Neutral"),
+    ("Agreement", None),
+    ("Agreeable", None),
+    ("N/A", None),
+    (None, None),
+])
+def test_concurrence_labels(label, expected):
+    assert CONCURRENCE_SCALE.labels([CONCURRENCE_SCALE.code(label)]) == [expected]
+
+def test_concurrence_rate_ignores_unparsed_labels():
+    assert concurrence_rate(["Agreed", "Disagree", "N/A", "Strongly Agree"]) == pytest.approx(2 / 3)
+    assert concurrence_rate(["N/A"]) is None
+
+def test_notch_distance_is_positive_when_the_prediction_is_weaker():
+    distance = notch_distance(["BB+", "A", "NR", "AA"], ["BBB", "A", "A", "A+"])
+
+    np.testing.assert_array_equal(distance, [2.0, 0.0, np.nan, -2.0])
+
+def test_notch_distance_accepts_codes_and_rejects_mismatched_lengths():
+    predicted = SP_SCALE.codes(["BB+", "A"])
+    assert notch_distance(predicted, ["BBB", "A"]).tolist() == [2.0, 0.0]
+    with pytest.raises(ValueError):
+        notch_distance(["A"], ["A", "B"])
+
+def test_confusion_matrix_rows_are_reference_columns_predicted():
+    matrix = confusion_matrix(["Pass", "Substandard", "Pass", "Loss"],
+                              ["Pass", "Special Mention", "Substandard", None], scale=SNC_SCALE)
+
+    assert matrix.shape == (len(SNC_SCALE), len(SNC_SCALE))
+    assert matrix.sum() == 3
+    assert matrix[0, 0] == 1
+    # Reference "Special Mention" (row 1) predicted "Substandard" (column 2).
+    assert matrix[1, 2] == 1
+    # Reference "Substandard" (row 2) predicted "Pass" (column 0).
+    assert matrix[2, 0] == 1
+
+def test_agreement_summary():
+    # Distances: +2, 0, -1 and one unrated pair.
+    summary = agreement_summary(["BB+", "A", "B+", "NR"], ["BBB", "A", "B", "BBB"])
+
+    assert summary == {
+        "compared": 3, "unrated": 1,
+        "exactMatchRate": 0.3333, "withinOneNotchRate": 0.6667,
+        "meanAbsoluteDistance": 1.0, "meanSignedDistance": 0.333
+    }
+    assert agreement_summary(["NR"], ["A"]) == {"compared": 0, "unrated": 1}
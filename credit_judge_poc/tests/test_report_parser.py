@@ -0,0 +1,108 @@
+# Filtering JSONL records by ticker, and random access through the offset index.
+
+import json
+import os
+
+from credit_judge_poc.src.processing import report_parser
+from credit_judge_poc.src.processing.report_parser import (
+    INDEX_SUFFIX, get_report, get_reports, load_jsonl_index, stream_jsonl_records
+)
+
+RECORDS = [
+    {"report_type": "ai_credit_report", "filename": "MSFT_ai_credit_report_1.json",
+     "scenario_details": {"ticker_symbol": "MSFT"}, "content": "first"},
+    {"report_type": "expert_review", "filename": "MSFT_Report_Review_1_expert_review_1.json",
+     "scenario_details": {"report_id_placeholder": "MSFT_Report_Review_1"}, "content": "review"},
+    {"report_type": "comparison_table", "filename": "MicrosoftCorporation_comparison_table_1.md",
+     "scenario_details": {"company_name": "Microsoft Corporation",
+                          "ai_generated_report_text": "JSON output for MSFT_ai_credit_report_1.json"},
+     "content": "table"},
+    {"report_type": "ai_credit_report", "filename": "AAPL_ai_credit_report_1.json",
+     "scenario_details": {"ticker_symbol": "AAPL"}, "content": "apple"},
+    {"report_type": "ai_credit_report", "filename": "MSFT_ai_credit_report_2.json",
+     "scenario_details": {"ticker_symbol": "MSFT"}, "content": "second"},
+]
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+def test_ticker_filter_skips_records_with_null_scenario_details(tmp_path):
+    path = tmp_path / "outputs.jsonl"
+    records = [
+        {"report_type": "rating", "scenario_details": None, "notes": {"ticker_symbol": "MSFT"}},
+        {"report_type": "rating", "scenario_details": {"ticker_symbol": "MSFT"}},
+        {"report_type": "rating"},
+    ]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    assert list(stream_jsonl_records(str(path), ticker_symbol="MSFT")) == [records[1]]
+
+def test_ticker_filter_matches_reviews_and_comparison_tables(tmp_path):
+    path = _write_jsonl(tmp_path / "outputs.jsonl", RECORDS)
+
+    streamed = [record["content"] for record in stream_jsonl_records(path, ticker_symbol="MSFT")]
+
+    assert streamed == ["first", "review", "table", "second"]
+    assert [record["content"] for record in get_reports(ticker="MSFT", filepath=path)] == streamed
+
+def test_index_keeps_every_record_for_a_key(tmp_path):
+    path = _write_jsonl(tmp_path / "outputs.jsonl", RECORDS)
+
+    reports = get_reports(ticker="MSFT", report_type="ai_credit_report", filepath=path)
+
+    assert [record["content"] for record in reports] == ["first", "second"]
+    assert get_report(ticker="MSFT", report_type="ai_credit_report", filepath=path)["content"] == "first"
+    assert get_report(ticker="MSFT", report_type="comparison_table", filepath=path)["content"] == "table"
+    assert get_report(filename="AAPL_ai_credit_report_1.json", filepath=path)["content"] == "apple"
+    assert get_report(ticker="GOOG", filepath=path) is None
+    assert get_reports(ticker="GOOG", filepath=path) == []
+
+def test_index_entries_point_at_each_line(tmp_path):
+    path = _write_jsonl(tmp_path / "outputs.jsonl", RECORDS)
+
+    index = load_jsonl_index(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    for (offset, length, report_type, filename, ticker), record in zip(index["entries"], RECORDS):
+        assert json.loads(data[offset:offset + length]) == record
+        assert (report_type, filename) == (record["report_type"], record["filename"])
+    assert [entry[4] for entry in index["entries"]] == ["MSFT", "MSFT", "MSFT", "AAPL", "MSFT"]
+    assert os.path.exists(path + INDEX_SUFFIX)
+
+def test_stale_index_is_rebuilt(tmp_path):
+    path = _write_jsonl(tmp_path / "outputs.jsonl", RECORDS[:1])
+    assert get_report(ticker="AAPL", filepath=path) is None
+
+    _write_jsonl(tmp_path / "outputs.jsonl", [RECORDS[3]] + RECORDS[:1])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert get_report(ticker="AAPL", filepath=path)["content"] == "apple"
+    assert get_report(ticker="MSFT", filepath=path)["content"] == "first"
+
+def test_sidecar_from_an_older_version_is_rebuilt(tmp_path):
+    path = _write_jsonl(tmp_path / "outputs.jsonl", RECORDS)
+    index = load_jsonl_index(path)
+    index["version"] = report_parser.INDEX_VERSION - 1
+    index["entries"] = []
+    with open(path + INDEX_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump({key: index[key] for key in ("version", "source_size", "source_mtime_ns", "fields", "entries")}, f)
+    report_parser._index_cache.clear()
+
+    assert get_report(ticker="AAPL", filepath=path)["content"] == "apple"
+
+def test_filters_match_values_written_with_json_escapes(tmp_path):
+    path = tmp_path / "outputs.jsonl"
+    lines = [
+        '{"report_type": "ai\\u005fcredit\\u005freport", "scenario_details": {"ticker_symbol": "\\u004dSFT"}}',
+        '{"report_type": "ai_credit_report", "scenario_details": {"ticker_symbol": "BRK\\/B"}}',
+        '{"report_type": "expert_review", "scenario_details": {"ticker_symbol": "\\u004dSFT"}}',
+    ]
+    path.write_text("\n".join(lines) + "\n")
+
+    assert [record["report_type"] for record in stream_jsonl_records(str(path), ticker_symbol="MSFT")] == \
+        ["ai_credit_report", "expert_review"]
+    assert len(list(stream_jsonl_records(str(path), report_type="ai_credit_report", ticker_symbol="MSFT"))) == 1
+    assert len(list(stream_jsonl_records(str(path), ticker_symbol="BRK/B"))) == 1
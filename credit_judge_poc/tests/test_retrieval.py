@@ -0,0 +1,70 @@
+# Chunking keeps every word of a document retrievable, and judge prompts carry
+# the retrieved chunks instead of whole filings.
+
+from credit_judge_poc.src.core.credit_evaluator import build_review_prompt, build_section_prompt, retrieve_evidence
+from credit_judge_poc.src.processing.retrieval import build_index, chunk_document
+
+def _words(n: int, prefix: str = "w") -> str:
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+def test_trailing_heading_without_newline():
+    assert chunk_document("intro text\n## Tail heading", "doc") == chunk_document("intro text\n", "doc")
+
+def test_short_tail_after_full_chunk_is_kept():
+    document = "## Liquidity\n" + _words(118) + "\nshort closing line about covenant breach\n"
+    chunks = chunk_document(document, "doc")
+    assert chunks[-1].text.endswith("covenant breach")
+    assert all(chunk.section == "## Liquidity" for chunk in chunks)
+
+    results = build_index({"doc": document}).search("covenant breach")
+    assert results and "covenant breach" in results[0].chunk.text
+
+def test_tail_that_only_repeats_the_overlap_is_not_emitted():
+    chunks = chunk_document("## A\n" + _words(220), "doc", max_words=120, overlap_words=20)
+    assert [chunk.text.split()[0] for chunk in chunks] == ["w0", "w100"]
+    assert chunks[-1].text.split()[-1] == "w219"
+
+def test_every_word_is_in_some_chunk():
+    lines = [_words(n, prefix=f"l{n}x") for n in (5, 40, 90, 3, 130, 7, 21)]
+    document = "## Section\n" + "\n".join(lines)
+    emitted = {word for chunk in chunk_document(document, "doc") for word in chunk.text.split()}
+    assert emitted == set(" ".join(lines).split())
+
+FILING = "\n".join([
+    "## Business",
+    "Acme makes widgets for industrial customers and holds a leading market position in its segments.",
+    "## Results",
+    "Revenue grew 12% to $4.1 billion and EBITDA margin expanded to 21% for the fiscal year.",
+    "## Debt",
+    "Leverage is 2.1x with ample liquidity and no debt maturities before 2028.",
+    "## Unrelated",
+    "The cafeteria menu rotates weekly between soups salads sandwiches and desserts.",
+])
+
+def _report():
+    return {
+        "companyName": "Acme Corp", "tickerSymbol": "ACME", "assessmentDate": "2024-06-30",
+        "overview": "Acme makes widgets.",
+        "financialPerformance": {"revenue": "4.1B"},
+        "sncfRegulatoryRating": {"indicativeRating": "Pass"},
+    }
+
+def test_prompts_carry_retrieved_chunks_not_the_whole_filing():
+    evidence = retrieve_evidence(_report(), build_index({"ACME": FILING}), k=1)
+    assert evidence["Financial Performance"][0].chunk.section == "## Results"
+
+    prompt = build_review_prompt(_report(), evidence=evidence).text
+    assert "Source Evidence" in prompt
+    assert "Revenue grew 12% to $4.1 billion" in prompt
+    assert "no debt maturities before 2028" in prompt
+    assert "cafeteria" not in prompt
+
+    section_prompt = build_section_prompt(_report(), "Financial Performance", "Revenue: 4.1B",
+                                          evidence["Financial Performance"])
+    assert "Revenue grew 12% to $4.1 billion" in section_prompt
+    assert "no debt maturities" not in section_prompt and "cafeteria" not in section_prompt
+
+def test_prompts_without_an_index_have_no_evidence_block():
+    assert retrieve_evidence(_report(), None) is None
+    assert "Source Evidence" not in build_review_prompt(_report()).text
+    assert "Source Evidence" not in build_section_prompt(_report(), "Overview", "Acme makes widgets.")
@@ -0,0 +1,45 @@
+# Token budgets are hard limits: everything emitted into a prompt, including
+# truncation markers, omitted-section headings and template text, is charged.
+
+import pytest
+
+from credit_judge_poc.src.core.credit_evaluator import build_comparison_prompt, build_review_prompt
+from credit_judge_poc.src.prompts.token_budget import Section, count_tokens, fit_sections, fit_text
+
+REPORT_TEXT = "\n".join(
+    f"## Section {i}\n" + " ".join(f"Revenue grew {i}.{j}% while leverage stayed near {j}x." for j in range(20)) + "\n"
+    for i in range(12)
+)
+
+@pytest.mark.parametrize("max_tokens", [5000, 500, 200, 50, 10, 0])
+def test_fit_text_stays_within_budget(max_tokens):
+    assert count_tokens(fit_text(REPORT_TEXT * 5, max_tokens)) <= max_tokens
+
+def test_fit_text_returns_short_text_unchanged():
+    assert fit_text(REPORT_TEXT, count_tokens(REPORT_TEXT)) == REPORT_TEXT
+
+def test_fit_sections_yields_floors_when_they_cannot_all_fit():
+    sections = [Section("# A", "# A\n" + "word " * 100, 0, 80), Section("# B", "# B\n" + "word " * 100, 1, 80)]
+    fitted = fit_sections(sections, 100)
+    assert count_tokens(fitted) <= 100
+    assert fitted.startswith("# A")
+
+def test_fit_sections_drops_omitted_markers_that_do_not_fit():
+    sections = [Section(f"# Heading {i}", f"# Heading {i}\n" + "word " * 50, 0, 0) for i in range(30)]
+    assert count_tokens(fit_sections(sections, 20)) <= 20
+
+@pytest.mark.parametrize("max_tokens", [20000, 3000, 2000])
+def test_comparison_prompt_counts_template_overhead(max_tokens):
+    prompt = build_comparison_prompt("Example Corp.", REPORT_TEXT * 5, REPORT_TEXT * 5, max_tokens=max_tokens)
+    assert prompt.estimated_tokens == count_tokens(prompt.text) <= max_tokens
+
+def test_review_prompt_returns_text_and_estimate():
+    report = {"companyName": "Example Corp.", "tickerSymbol": "EXM", "assessmentDate": "2024-10-28",
+              "overview": REPORT_TEXT * 5, "strengths": REPORT_TEXT * 5}
+    prompt = build_review_prompt(report, max_tokens=2000)
+    assert prompt.estimated_tokens == count_tokens(prompt.text) <= 2000
+    assert "EXM-AI-Report-2024-10-28" in prompt.text
+
+def test_budget_below_template_overhead_is_rejected():
+    with pytest.raises(ValueError):
+        build_comparison_prompt("Example Corp.", REPORT_TEXT, REPORT_TEXT, max_tokens=100)
@@ -0,0 +1,69 @@
+# Benchmark for keyword counting in analysis.KeywordMatcher.
+# Compares the original per-keyword str.count (substring matches) and one
+# whole-word regex scan per keyword with the matcher's single token tally,
+# over growing keyword lists.
+#
+# Usage: python credit_judge_v2/benchmarks/keyword_density.py [--words 12000] [--repeat 5]
+import os
+import sys
+import re
+import json
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(current_dir)))
+
+from credit_judge_v2.src.processing.analysis import RISK_KEYWORDS, build_report_text, get_keyword_matcher
+
+SAMPLE_REPORT = os.path.join(current_dir, "..", "data", "ai_report.json")
+
+def build_document(words):
+    """Repeats the sample report's narrative text to about `words` words, lowercased."""
+    with open(SAMPLE_REPORT) as f:
+        text = build_report_text(json.load(f))
+    repeats = max(1, words // len(text.split()))
+    return " ".join([text] * repeats).lower()
+
+def build_keywords(count):
+    """RISK_KEYWORDS padded with credit terms, then with words absent from the text."""
+    extra = ("revenue", "margin", "leverage", "liquidity", "covenant", "rating", "outlook", "growth",
+             "competition", "regulation", "default", "refinancing", "dilution", "impairment")
+    keywords = list(RISK_KEYWORDS) + list(extra)
+    keywords += [f"term{i}" for i in range(max(0, count - len(keywords)))]
+    return tuple(keywords[:count])
+
+def time_ms(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword counting strategies.")
+    parser.add_argument("--words", type=int, default=12000, help="Approximate document length in words.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement.")
+    args = parser.parse_args()
+
+    text_lower = build_document(args.words)
+    print(f"Document: {len(text_lower.split())} words, mean of {args.repeat} runs\n")
+    print(f"{'keywords':>8}  {'str.count':>10}  {'regex each':>10}  {'matcher':>10}")
+
+    for count in (7, 16, 32, 64, 200, 800):
+        keywords = build_keywords(count)
+        patterns = [re.compile(rf"\b{re.escape(keyword)}(?:s|es)?\b") for keyword in keywords]
+        matcher = get_keyword_matcher(keywords)
+        expected = {keyword: len(pattern.findall(text_lower)) for keyword, pattern in zip(keywords, patterns)}
+        if matcher.count(text_lower) != expected:
+            raise AssertionError(f"Matcher and regex counts differ for {count} keywords")
+
+        timings = (
+            time_ms(lambda: [text_lower.count(keyword) for keyword in keywords], args.repeat),
+            time_ms(lambda: [len(pattern.findall(text_lower)) for pattern in patterns], args.repeat),
+            time_ms(lambda: matcher.count(text_lower), args.repeat),
+        )
+        print(f"{count:>8}  " + "  ".join(f"{ms:>8.2f}ms" for ms in timings))
+
+if __name__ == "__main__":
+    main()
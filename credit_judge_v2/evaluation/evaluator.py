@@ -1,6 +1,8 @@
 import json
 import textwrap
 from credit_judge_v2.src.processing.analysis import analyze_report_content
+from credit_judge_v2.src.processing.review_formatter import SECTION_TO_AI_KEY_MAP
+from credit_judge_v2.src.processing.similarity import score_sections
 
 def load_json_file(filepath):
     """Loads a JSON file from the given filepath."""
@@ -14,10 +16,15 @@ def load_json_file(filepath):
         print(f"Error: Could not decode JSON from {filepath}")
         return None
 
-def display_qualitative_comparison(ai_report_data, gold_standard_data):
+def display_qualitative_comparison(ai_report_data, gold_standard_data, embedding_cache=None):
     """
     Displays a side-by-side qualitative comparison of the AI report
     and the gold standard review, including quantitative analysis.
+
+    Args:
+        embedding_cache (EmbeddingCache, optional): Cache for the section
+            similarity embeddings, e.g. similarity.get_embedding_cache().
+            Nothing is written to disk when it is None.
     """
     print("\n" + "="*80)
     print(" " * 25 + "Qualitative & Quantitative Comparison Report")
@@ -53,20 +60,12 @@ def display_qualitative_comparison(ai_report_data, gold_standard_data):
     # --- Section-by-Section Comparison ---
     print("--- Section-by-Section Detailed Review ---\n")
 
-    # Mapping from review sectionName to keys in the AI report JSON
-    section_to_ai_key_map = {
-        "Overview": "overview",
-        "Corporate Credit Rating": "corporateCreditRating",
-        "Financial Performance": "financialPerformance",
-        "SNCF Regulatory Rating": "sncfRegulatoryRating",
-        "Strengths": "strengths",
-        "Weaknesses": "weaknesses",
-        "Special Focus Areas": "specialFocusAreas"
-    }
+    # Similarity between each AI section and the reviewer's feedback on it
+    section_similarity = score_sections(ai_report_data, gold_standard_data, cache=embedding_cache)
 
     for review_section in gold_standard_data.get("sectionReviews", []):
         section_name = review_section.get("sectionName")
-        ai_key = section_to_ai_key_map.get(section_name)
+        ai_key = SECTION_TO_AI_KEY_MAP.get(section_name)
 
         print(f"## Section: {section_name}\n")
 
@@ -79,6 +78,9 @@ def display_qualitative_comparison(ai_report_data, gold_standard_data):
         print(f"  Score: {score}/10" if score is not None else "  Score: N/A")
         if completeness is not None:
             print(f"  Completeness: {completeness}/10")
+        similarity = section_similarity.get(section_name)
+        if similarity is not None:
+            print(f"  Semantic Similarity to AI Content (0 to 1): {similarity:.2f}")
         print("  Feedback:")
         print(textwrap.fill(f"  > {feedback}", width=78, subsequent_indent='    '))
         print("\n")
@@ -1,5 +1,12 @@
 import os
 import sys
+import csv
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add the parent directory to sys.path to ensure modules can be found
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -7,10 +14,15 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 from credit_judge_v2.evaluation.evaluator import display_qualitative_comparison, load_json_file
-from credit_judge_v2.src.llm_interface.llm_handler import generate_report
+from credit_judge_v2.src.llm_interface.llm_handler import (
+    generate_report, generate_report_streaming, generate_report_async, create_async_client
+)
 from credit_judge_v2.src.prompts.prompts import get_report_generation_prompt
-from credit_judge_v2.src.processing.analysis import analyze_report_content
-from credit_judge_v2.src.utils.html_generator import generate_html_report
+from credit_judge_v2.src.processing.analysis import analyze_report_content, StreamingReportAnalyzer, _init_analysis_worker
+from credit_judge_v2.src.core.pipeline import Pipeline, Stage, format_stage_metrics
+from credit_judge_v2.src.processing.schema import REPORT_VALIDATOR, GOLD_STANDARD_VALIDATOR, Quarantine, format_errors
+from credit_judge_v2.src.processing.financials import financial_columns, find_inconsistencies
+from credit_judge_v2.src.utils.html_generator import generate_html_report, build_portfolio_entry, generate_portfolio_dashboard
 
 def main():
     """
@@ -77,5 +89,337 @@ def main():
 
     print("\nCredit Judge v2 Run Completed.")
 
+def load_manifest(manifest_path):
+    """
+    Loads a batch manifest from a CSV or JSONL file.
+
+    Each entry needs `company` and `ticker`, and may give a `gold_standard`
+    path. Relative gold standard paths are resolved against the manifest's
+    directory.
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        if manifest_path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    entries = []
+    for row in rows:
+        gold_standard = (row.get("gold_standard") or "").strip()
+        if gold_standard and not os.path.isabs(gold_standard):
+            gold_standard = os.path.join(manifest_dir, gold_standard)
+        entries.append({
+            "company": row["company"].strip(),
+            "ticker": row["ticker"].strip(),
+            "gold_standard": gold_standard
+        })
+    return entries
+
+# Invalid generated reports are written here, inside the output directory.
+QUARANTINE_FILENAME = "quarantine.jsonl"
+
+def quarantine_invalid_report(entry, ai_report_data, quarantine=None):
+    """
+    Validates a generated report against the report schema. An invalid
+    report is added to `quarantine` together with its manifest entry, so the
+    quarantine file can be rerun as a manifest.
+
+    Returns:
+        str: A description of the invalid fields, or None if the report is valid.
+    """
+    errors = REPORT_VALIDATOR.validate(ai_report_data)
+    if not errors:
+        return None
+    if quarantine is not None:
+        quarantine.add(ai_report_data, errors, company=entry["company"], ticker=entry["ticker"],
+                       gold_standard=entry["gold_standard"])
+    return f"Invalid report quarantined: {format_errors(errors)}"
+
+def load_gold_standard(path):
+    """
+    Loads a gold standard review and validates it against the review schema.
+
+    Returns:
+        tuple: (review dict, None) on success, (None, error message) otherwise.
+    """
+    gold_standard_data = load_json_file(path)
+    if not gold_standard_data:
+        return None, f"Could not load gold standard: {path}"
+    errors = GOLD_STANDARD_VALIDATOR.validate(gold_standard_data)
+    if errors:
+        return None, f"Invalid gold standard {path}: {format_errors(errors)}"
+    return gold_standard_data, None
+
+def render_company_outputs(ticker_symbol, ai_report_data, analysis_results, gold_standard_data, output_dir, portfolio=False):
+    """
+    Writes one company's HTML report, or builds its dashboard entry in
+    portfolio mode, and returns the fields recorded in the batch summary.
+    """
+    outputs = {}
+    if portfolio:
+        outputs["portfolioEntry"] = build_portfolio_entry(ai_report_data, analysis_results, gold_standard_data)
+        html_report = None
+    else:
+        output_path = os.path.join(output_dir, f"report_{ticker_symbol}.html")
+        generate_html_report(ai_report_data, analysis_results, gold_standard_data, output_path)
+        html_report = os.path.basename(output_path)
+
+    rating_info = ai_report_data.get("corporateCreditRating", {})
+    overall_assessment = gold_standard_data.get("overallAssessment", {})
+    financial_flags = find_inconsistencies(financial_columns([ai_report_data]))
+    outputs.update({
+        "status": "ok",
+        "rating": rating_info.get("rating"),
+        "outlook": rating_info.get("outlook"),
+        "overallScore": overall_assessment.get("overallScore"),
+        "ratingConcurrence": overall_assessment.get("ratingConcurrence"),
+        "htmlReport": html_report,
+        "financialFlags": [{key: flag[key] for key in ("check", "stated", "implied")} for flag in financial_flags]
+    })
+    return outputs
+
+def process_company(entry, output_dir, portfolio=False, stream=False, quarantine=None):
+    """
+    Runs generate -> evaluate -> analyze -> HTML for one manifest entry.
+    Returns a summary dict; failures are recorded rather than raised.
+
+    In portfolio mode no per-company HTML is written; the dashboard entry is
+    returned under `portfolioEntry` instead. With `stream=True` the report is
+    streamed and each section is analyzed as soon as it arrives. Reports
+    that fail schema validation are added to `quarantine` and recorded as
+    failed.
+    """
+    company_name = entry["company"]
+    ticker_symbol = entry["ticker"]
+    result = {"company": company_name, "ticker": ticker_symbol, "status": "failed"}
+
+    try:
+        prompt = get_report_generation_prompt(company_name, ticker_symbol)
+        analyzer = StreamingReportAnalyzer() if stream else None
+        if stream:
+            ai_report_data = generate_report_streaming(prompt, company_name, ticker_symbol, on_section=analyzer.add_section)
+        else:
+            ai_report_data = generate_report(prompt, company_name, ticker_symbol)
+        if not ai_report_data:
+            result["error"] = "Report generation failed"
+            return result
+
+        invalid = quarantine_invalid_report(entry, ai_report_data, quarantine)
+        if invalid:
+            result["error"] = invalid
+            return result
+
+        gold_standard_data = {}
+        if entry["gold_standard"]:
+            gold_standard_data, error = load_gold_standard(entry["gold_standard"])
+            if error:
+                result["error"] = error
+                return result
+
+        if analyzer is not None:
+            analysis_results = analyzer.finish(ai_report_data)
+        else:
+            analysis_results = analyze_report_content(ai_report_data)
+
+        result.update(render_company_outputs(ticker_symbol, ai_report_data, analysis_results, gold_standard_data, output_dir, portfolio))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    return result
+
+def _analyze_stage(job):
+    # Runs in the analysis process pool, so it must be a module-level function.
+    job["analysis"] = analyze_report_content(job["report"])
+    return job
+
+def run_pipeline(entries, output_dir, portfolio=False, llm_concurrency=8, analysis_workers=None, io_workers=4,
+                 on_result=None, quarantine=None):
+    """
+    Runs generate -> evaluate -> analyze -> render as a staged Pipeline, so
+    report generation for later companies overlaps analysis and HTML writing
+    for earlier ones.
+
+    Generation runs on the event loop with `llm_concurrency` requests in
+    flight, gold standard loading and rendering on thread pools of
+    `io_workers`, and analysis on a process pool of `analysis_workers`
+    (default: the CPU count).
+
+    Args:
+        on_result (callable): Called with each company's summary dict as it completes.
+        quarantine (Quarantine): Receives reports that fail schema validation.
+
+    Returns:
+        tuple: (summary dicts in manifest order, per-stage metrics).
+    """
+    client = create_async_client()
+    if client is None:
+        print("\n--- WARNING: OPENAI_API_KEY not found. Using mock LLM responses for the batch. ---")
+
+    async def generate(entry):
+        prompt = get_report_generation_prompt(entry["company"], entry["ticker"])
+        report = await generate_report_async(prompt, entry["company"], entry["ticker"], client=client)
+        if not report:
+            raise RuntimeError("Report generation failed")
+        invalid = quarantine_invalid_report(entry, report, quarantine)
+        if invalid:
+            raise ValueError(invalid)
+        return {"entry": entry, "report": report}
+
+    def evaluate(job):
+        job["gold_standard"] = {}
+        path = job["entry"]["gold_standard"]
+        if path:
+            job["gold_standard"], error = load_gold_standard(path)
+            if error:
+                raise ValueError(error)
+        return job
+
+    def render(job):
+        entry = job["entry"]
+        result = {"company": entry["company"], "ticker": entry["ticker"]}
+        result.update(render_company_outputs(entry["ticker"], job["report"], job["analysis"], job["gold_standard"], output_dir, portfolio))
+        return result
+
+    pipeline = Pipeline([
+        Stage("generate", generate, kind="async", concurrency=llm_concurrency),
+        Stage("evaluate", evaluate, kind="thread", concurrency=io_workers),
+        Stage("analyze", _analyze_stage, kind="process", concurrency=analysis_workers or os.cpu_count() or 1,
+              initializer=_init_analysis_worker),
+        Stage("render", render, kind="thread", concurrency=io_workers),
+    ])
+
+    def to_summary(pipeline_result):
+        if pipeline_result.error is None:
+            return pipeline_result.payload
+        entry = entries[pipeline_result.index]
+        return {"company": entry["company"], "ticker": entry["ticker"], "status": "failed",
+                "error": f"{pipeline_result.stage}: {pipeline_result.error}"}
+
+    def handle(pipeline_result):
+        if on_result is not None:
+            on_result(to_summary(pipeline_result))
+
+    async def run():
+        try:
+            return await pipeline.run_async(entries, on_result=handle)
+        finally:
+            if client is not None:
+                await client.close()
+
+    results = asyncio.run(run())
+    return [to_summary(result) for result in results], pipeline.stage_metrics()
+
+def run_batch(manifest_path, output_dir, workers=8, portfolio=False, stream=False, pipeline=False,
+              analysis_workers=None, io_workers=4):
+    """
+    Runs the pipeline for every company in the manifest across a worker pool
+    and writes a summary index to `output_dir/batch_summary.json`.
+
+    Generated reports that fail schema validation are written to
+    `output_dir/quarantine.jsonl`, which can be passed back as the manifest
+    to regenerate just those companies.
+
+    With `portfolio=True`, a single portfolio dashboard is written instead of
+    one HTML report per company. With `stream=True`, reports are streamed
+    section by section (see process_company). With `pipeline=True`, the
+    stages run as a staged pipeline (see run_pipeline) with `workers`
+    concurrent LLM requests, and per-stage utilization is recorded in the
+    summary.
+    """
+    entries = load_manifest(manifest_path)
+    total = len(entries)
+    mode = "staged pipeline" if pipeline else f"{workers} workers"
+    print(f"Starting Credit Judge v2 batch run: {total} companies, {mode}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    # The manifest is already loaded, so this is safe even when rerunning
+    # the previous quarantine file.
+    quarantine = Quarantine(os.path.join(output_dir, QUARANTINE_FILENAME))
+    if os.path.exists(quarantine.path):
+        os.remove(quarantine.path)
+    start_time = time.perf_counter()
+    done = 0
+
+    def report_progress(result):
+        nonlocal done
+        done += 1
+        elapsed = time.perf_counter() - start_time
+        status = result["status"] if result["status"] == "ok" else f"FAILED ({result.get('error')})"
+        print(f"[{done}/{total}] {result['ticker']}: {status} - {done / elapsed:.2f} companies/sec")
+
+    stage_metrics = None
+    if pipeline:
+        results, stage_metrics = run_pipeline(entries, output_dir, portfolio, llm_concurrency=workers,
+                                              analysis_workers=analysis_workers, io_workers=io_workers,
+                                              on_result=report_progress, quarantine=quarantine)
+    else:
+        results = [None] * total
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_company, entry, output_dir, portfolio, stream, quarantine): i for i, entry in enumerate(entries)}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                report_progress(result)
+
+    if portfolio:
+        portfolio_entries = [r.pop("portfolioEntry") for r in results if "portfolioEntry" in r]
+        generate_portfolio_dashboard(portfolio_entries, output_dir)
+
+    elapsed = time.perf_counter() - start_time
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    summary = {
+        "generatedAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "manifest": os.path.abspath(manifest_path),
+        "total": total,
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+        "elapsedSeconds": round(elapsed, 3),
+        "companiesPerSecond": round(total / elapsed, 3) if elapsed > 0 else None,
+        "quarantined": quarantine.count,
+        "financiallyInconsistent": sum(1 for r in results if r.get("financialFlags")),
+        "results": results
+    }
+    if stage_metrics is not None:
+        summary["stageMetrics"] = stage_metrics
+
+    summary_path = os.path.join(output_dir, "batch_summary.json")
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\nBatch run completed: {succeeded}/{total} succeeded in {elapsed:.2f}s "
+          f"({summary['companiesPerSecond']} companies/sec)")
+    if stage_metrics is not None:
+        print(format_stage_metrics(stage_metrics))
+    if summary["financiallyInconsistent"]:
+        print(f"{summary['financiallyInconsistent']} reports have inconsistent financial figures (see financialFlags)")
+    if quarantine.count:
+        print(f"{quarantine.count} invalid reports quarantined to {quarantine.path}; "
+              f"rerun with --manifest {quarantine.path} to regenerate them")
+    print(f"Summary index written to: {summary_path}")
+    return summary
+
+def parse_args():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Credit Judge v2")
+    parser.add_argument("--manifest", help="CSV or JSONL manifest of (company, ticker, gold_standard) for an unattended batch run")
+    parser.add_argument("--output-dir", default=os.path.join(script_dir, "output"), help="Directory for HTML reports and the batch summary")
+    parser.add_argument("--workers", type=int, default=8, help="Number of companies processed concurrently in batch mode")
+    parser.add_argument("--portfolio", action="store_true", help="In batch mode, write one portfolio dashboard instead of an HTML report per company")
+    parser.add_argument("--stream", action="store_true", help="In batch mode, stream each report and analyze its sections as they arrive")
+    parser.add_argument("--pipeline", action="store_true", help="In batch mode, run generate/evaluate/analyze/render as overlapping stages; --workers sets the LLM concurrency")
+    parser.add_argument("--analysis-workers", type=int, help="Analysis processes in pipeline mode (default: CPU count)")
+    parser.add_argument("--io-workers", type=int, default=4, help="Threads for gold standard loading and HTML writing in pipeline mode")
+    args = parser.parse_args()
+    if args.stream and args.pipeline:
+        parser.error("--stream cannot be combined with --pipeline: the pipeline generates reports without streaming")
+    return args
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.manifest:
+        run_batch(args.manifest, args.output_dir, workers=args.workers, portfolio=args.portfolio, stream=args.stream,
+                  pipeline=args.pipeline, analysis_workers=args.analysis_workers, io_workers=args.io_workers)
+    else:
+        main()
@@ -0,0 +1,222 @@
+import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+STAGE_KINDS = ("async", "thread", "process")
+
+# Outcome of one item. `payload` is the output of the last stage, or the input
+# of the stage that failed; `stage` names that stage (None on success).
+PipelineResult = namedtuple("PipelineResult", ["index", "payload", "error", "stage"])
+
+# Marks the end of a stage's input.
+_DONE = object()
+
+class Stage:
+    """
+    One step of a Pipeline: a function from payload to payload.
+
+    Args:
+        name (str): Used in metrics and error reports.
+        func (callable): The step. A coroutine function for "async" stages;
+            for "process" stages it must be picklable (module level).
+        kind (str): "async" runs on the event loop (network-bound calls),
+            "thread" on a thread pool (blocking I/O), "process" on a process
+            pool (CPU-bound work).
+        concurrency (int): Items processed at once.
+        queue_size (int): Capacity of the queue feeding this stage; a full
+            queue blocks the stage before it. Defaults to twice the
+            concurrency.
+        initializer (callable): Worker initializer for thread and process pools.
+    """
+
+    def __init__(self, name, func, kind="thread", concurrency=1, queue_size=None, initializer=None):
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind '{kind}'. Choose from: {', '.join(STAGE_KINDS)}")
+        self.name = name
+        self.func = func
+        self.kind = kind
+        self.concurrency = max(1, int(concurrency))
+        self.queue_size = queue_size or 2 * self.concurrency
+        self.initializer = initializer
+
+    def _make_executor(self):
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.concurrency, initializer=self.initializer)
+        if self.kind == "process":
+            return ProcessPoolExecutor(max_workers=self.concurrency, initializer=self.initializer)
+        return None
+
+class StageMetrics:
+    """
+    Counters for one stage of a run.
+
+    busy_seconds is time spent inside the stage function, summed over its
+    workers; blocked_seconds is time spent waiting for room in the next
+    stage's queue (backpressure).
+    """
+    __slots__ = ("name", "kind", "concurrency", "processed", "failed", "busy_seconds",
+                 "blocked_seconds", "max_queue_depth")
+
+    def __init__(self, stage):
+        self.name = stage.name
+        self.kind = stage.kind
+        self.concurrency = stage.concurrency
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def as_dict(self, elapsed):
+        """
+        Returns the metrics as a dict. `utilization` is the fraction of the
+        run during which the stage's workers were busy; `capacityPerSecond`
+        is the rate the stage could sustain on its own, so the stage with
+        the lowest capacity bounds the pipeline's throughput.
+        """
+        handled = self.processed + self.failed
+        return {
+            "stage": self.name,
+            "kind": self.kind,
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busySeconds": round(self.busy_seconds, 3),
+            "blockedSeconds": round(self.blocked_seconds, 3),
+            "maxQueueDepth": self.max_queue_depth,
+            "utilization": round(self.busy_seconds / (elapsed * self.concurrency), 3) if elapsed > 0 else None,
+            "capacityPerSecond": round(handled * self.concurrency / self.busy_seconds, 3) if self.busy_seconds > 0 else None
+        }
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages connected by bounded queues.
+
+    Every stage has its own workers and executor, so different items are in
+    different stages at the same time: while one company's report is being
+    generated, earlier ones are analyzed and rendered. Bounded queues apply
+    backpressure, so at most about sum(queue_size + concurrency) items are
+    in flight regardless of the input size.
+
+    An item whose stage raises skips the remaining stages and is reported
+    with the error; the rest of the run continues.
+
+    Args:
+        stages (list): Stages in order.
+    """
+
+    def __init__(self, stages):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.stages = list(stages)
+        self.metrics = [StageMetrics(stage) for stage in self.stages]
+        self.elapsed = 0.0
+
+    def stage_metrics(self):
+        """Returns StageMetrics.as_dict for every stage of the last run."""
+        return [metrics.as_dict(self.elapsed) for metrics in self.metrics]
+
+    async def run_async(self, items, on_result=None):
+        """
+        Runs every item through the pipeline.
+
+        Args:
+            items (iterable): Input payloads. Consumed lazily, so a generator
+                is never read further ahead than the first queue allows.
+            on_result (callable): Called with each PipelineResult as the item
+                leaves the pipeline, in completion order.
+
+        Returns:
+            list: PipelineResults in input order.
+        """
+        loop = asyncio.get_running_loop()
+        stages = self.stages
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in stages]
+        self.metrics = [StageMetrics(stage) for stage in stages]
+        results = []
+
+        def finish(result):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        async def put(i, entry):
+            queue = queues[i]
+            await queue.put(entry)
+            metrics = self.metrics[i]
+            metrics.max_queue_depth = max(metrics.max_queue_depth, queue.qsize())
+
+        async def feed():
+            for index, item in enumerate(items):
+                await put(0, (index, item))
+            for _ in range(stages[0].concurrency):
+                await queues[0].put(_DONE)
+
+        async def work(i, executor):
+            stage = stages[i]
+            metrics = self.metrics[i]
+            last = i == len(stages) - 1
+            while True:
+                entry = await queues[i].get()
+                if entry is _DONE:
+                    return
+                index, payload = entry
+
+                started = time.perf_counter()
+                try:
+                    if executor is None:
+                        output = await stage.func(payload)
+                    else:
+                        output = await loop.run_in_executor(executor, stage.func, payload)
+                except Exception as e:
+                    metrics.busy_seconds += time.perf_counter() - started
+                    metrics.failed += 1
+                    finish(PipelineResult(index, payload, f"{type(e).__name__}: {e}", stage.name))
+                    continue
+                metrics.busy_seconds += time.perf_counter() - started
+                metrics.processed += 1
+
+                if last:
+                    finish(PipelineResult(index, output, None, None))
+                else:
+                    blocked_since = time.perf_counter()
+                    await put(i + 1, (index, output))
+                    metrics.blocked_seconds += time.perf_counter() - blocked_since
+
+        async def run_stage(i, executor):
+            await asyncio.gather(*(work(i, executor) for _ in range(stages[i].concurrency)))
+            if i + 1 < len(stages):
+                for _ in range(stages[i + 1].concurrency):
+                    await queues[i + 1].put(_DONE)
+
+        executors = [stage._make_executor() for stage in stages]
+        start_time = time.perf_counter()
+        try:
+            await asyncio.gather(feed(), *(run_stage(i, executor) for i, executor in enumerate(executors)))
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+            for executor in executors:
+                if executor is not None:
+                    executor.shutdown(wait=True)
+
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def run(self, items, on_result=None):
+        """
+        Synchronous wrapper around run_async.
+        """
+        return asyncio.run(self.run_async(items, on_result))
+
+def format_stage_metrics(stage_metrics):
+    """
+    Renders Pipeline.stage_metrics() as a fixed-width table for the console.
+    """
+    lines = [f"{'Stage':<12}{'Kind':<9}{'Workers':>8}{'Done':>7}{'Failed':>8}{'Busy s':>9}{'Blocked s':>11}{'Util':>7}{'Cap/s':>9}"]
+    for m in stage_metrics:
+        utilization = f"{m['utilization']:.0%}" if m["utilization"] is not None else "-"
+        capacity = f"{m['capacityPerSecond']:.1f}" if m["capacityPerSecond"] is not None else "-"
+        lines.append(f"{m['stage']:<12}{m['kind']:<9}{m['concurrency']:>8}{m['processed']:>7}{m['failed']:>8}"
+                     f"{m['busySeconds']:>9.2f}{m['blockedSeconds']:>11.2f}{utilization:>7}{capacity:>9}")
+    return "\n".join(lines)
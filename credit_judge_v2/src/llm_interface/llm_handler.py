@@ -1,8 +1,19 @@
 import os
 import json
+import asyncio
+import threading
 import openai
 from dotenv import load_dotenv
 
+from credit_judge_v2.src.prompts.prompts import get_report_generation_prompt
+from credit_judge_v2.src.llm_interface.response_cache import ResponseCache, make_cache_key, DEFAULT_CACHE_PATH, DEFAULT_TTL_SECONDS
+from credit_judge_v2.src.llm_interface.rate_limiter import RateLimitScheduler, estimate_tokens
+from credit_judge_v2.src.llm_interface.stream_parser import SectionStreamParser, split_into_chunks, replay_chunks
+from credit_judge_v2.src.llm_interface.replay_backend import (
+    get_llm_backend, get_recording_store, replay_client_from_env, RecordingClient, AsyncRecordingClient
+)
+from credit_judge_v2.src.processing.schema import REPORT_VALIDATOR
+
 # Load environment variables from a .env file
 load_dotenv()
 
@@ -36,47 +47,373 @@ def get_mock_response(company_name, ticker):
             "specialFocusAreas": ["Path to sustained profitability", "Integration of acquisitions (e.g., Jackpocket)"]
         }
 
-def generate_report(prompt, company_name="DraftKings Inc.", ticker="DKNG"):
+MODEL_NAME = "gpt-4-turbo"
+SYSTEM_MESSAGE = "You are an expert credit analyst. Your task is to generate a corporate credit report in a structured JSON format."
+RESPONSE_FORMAT = {"type": "json_object"}
+
+# Sync clients are cached per API key so repeated calls share one connection pool.
+_sync_clients = {}
+
+def get_api_key():
+    """
+    Returns OPENAI_API_KEY, or a placeholder in replay mode (LLM_BACKEND=replay),
+    which needs no key. None means mock responses are used.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and get_llm_backend() == "replay":
+        return "replay"
+    return api_key
+
+def get_client(api_key):
+    """
+    Returns a shared OpenAI client for the given API key, creating it on first use.
+    Retries are left to the rate limit scheduler, so the SDK's own are disabled.
+    LLM_BACKEND selects a recording wrapper or the offline replay client instead.
+    """
+    backend = get_llm_backend()
+    client = _sync_clients.get((backend, api_key))
+    if client is None:
+        if backend == "replay":
+            client = replay_client_from_env()
+        else:
+            client = openai.OpenAI(api_key=api_key, max_retries=0)
+            if backend == "record":
+                client = RecordingClient(client, get_recording_store())
+        _sync_clients[(backend, api_key)] = client
+    return client
+
+_scheduler = None
+
+def get_scheduler():
+    """
+    Returns the process-wide rate limit scheduler. Budgets default to the
+    values below and can be overridden with LLM_REQUESTS_PER_MINUTE and
+    LLM_TOKENS_PER_MINUTE.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RateLimitScheduler(
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", 500)),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", 150000))
+        )
+    return _scheduler
+
+_response_cache = None
+# The missing-key warning is printed once per process rather than once per
+# company; the lock keeps concurrent workers from printing it twice.
+_warned_missing_key = False
+_warning_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Returns the process-wide response cache, or None if caching is disabled
+    via LLM_CACHE_DISABLED. The location and TTL can be overridden with
+    LLM_CACHE_PATH and LLM_CACHE_TTL_SECONDS.
+    """
+    global _response_cache
+    if os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    # Recording and load testing must reach the client on every request.
+    if get_llm_backend() != "openai":
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        )
+    return _response_cache
+
+def _cache_key_for(prompt):
+    return make_cache_key(MODEL_NAME, SYSTEM_MESSAGE, prompt, RESPONSE_FORMAT)
+
+def _build_completion_kwargs(prompt):
+    """
+    Builds the keyword arguments for a chat completion request.
+    """
+    return {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": RESPONSE_FORMAT
+    }
+
+def _parse_report_response(response, cache=None, cache_key=None):
+    """
+    Extracts and decodes the JSON report from a chat completion response.
+    The raw content is stored in `cache` once it has decoded and matches the
+    report schema, so an invalid report is regenerated on the next request.
+    """
+    report_str = response.choices[0].message.content
+    report_dict = json.loads(report_str)
+    if cache is not None and REPORT_VALIDATOR.is_valid(report_dict):
+        cache.set(cache_key, report_str)
+    return report_dict
+
+def _get_cached_report(cache, cache_key):
+    """
+    Returns the cached report for `cache_key`, or None on a miss.
+    """
+    if cache is None:
+        return None
+    cached = cache.get(cache_key)
+    return json.loads(cached) if cached is not None else None
+
+def _report_llm_error(e):
+    """
+    Prints a readable message for an exception raised during an LLM call.
+    """
+    if isinstance(e, openai.APIConnectionError):
+        print(f"OpenAI API Connection Error: {e.__cause__}")
+    elif isinstance(e, openai.RateLimitError):
+        print(f"OpenAI API Rate Limit Error: {e.response.status_code} {e.response.text}")
+    elif isinstance(e, openai.APIStatusError):
+        print(f"OpenAI API Status Error: {e.status_code} - {e.response}")
+    elif isinstance(e, json.JSONDecodeError):
+        print(f"Failed to decode JSON from LLM response: {e}")
+    else:
+        print(f"An unexpected error occurred during the LLM call: {e}")
+
+def _warn_missing_key():
+    global _warned_missing_key
+    with _warning_lock:
+        if _warned_missing_key:
+            return
+        _warned_missing_key = True
+    print("\n--- WARNING: OPENAI_API_KEY not found. ---")
+    print("Falling back to a mock LLM response. To use a real LLM, please set the OPENAI_API_KEY environment variable.")
+
+def generate_report(prompt, company_name="DraftKings Inc.", ticker="DKNG", use_cache=True):
     """
     Generates a credit report by calling the OpenAI API.
     If the API key is not available, it returns a mock response.
+    Identical requests are served from the on-disk response cache unless
+    `use_cache` is False.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = get_api_key()
 
     if not api_key:
-        print("\n--- WARNING: OPENAI_API_KEY not found. ---")
-        print("Falling back to a mock LLM response. To use a real LLM, please set the OPENAI_API_KEY environment variable.")
+        _warn_missing_key()
         return get_mock_response(company_name, ticker)
 
+    cache = get_response_cache() if use_cache else None
+    cache_key = _cache_key_for(prompt)
+    cached_report = _get_cached_report(cache, cache_key)
+    if cached_report is not None:
+        print("\n--- Using cached LLM response for this prompt. ---")
+        return cached_report
+
     print("\n--- Calling OpenAI API to Generate Report ---")
-    client = openai.OpenAI(api_key=api_key)
+    client = get_client(api_key)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert credit analyst. Your task is to generate a corporate credit report in a structured JSON format."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        response = get_scheduler().call(
+            client.chat.completions.create,
+            estimated_tokens=estimate_tokens(prompt),
+            **_build_completion_kwargs(prompt)
         )
-
-        report_str = response.choices[0].message.content
-        report_dict = json.loads(report_str)
+        report_dict = _parse_report_response(response, cache, cache_key)
 
         print("--- Successfully received and parsed report from OpenAI API. ---")
         return report_dict
 
-    except openai.APIConnectionError as e:
-        print(f"OpenAI API Connection Error: {e.__cause__}")
-    except openai.RateLimitError as e:
-        print(f"OpenAI API Rate Limit Error: {e.response.status_code} {e.response.text}")
-    except openai.APIStatusError as e:
-        print(f"OpenAI API Status Error: {e.status_code} - {e.response}")
-    except json.JSONDecodeError as e:
-        print(f"Failed to decode JSON from LLM response: {e}")
     except Exception as e:
-        print(f"An unexpected error occurred during the LLM call: {e}")
+        _report_llm_error(e)
 
     print("--- LLM call failed. Returning None. ---")
     return None
+
+def _iter_completion_deltas(stream):
+    """
+    Yields the content deltas of a streamed chat completion and closes the
+    stream when done, including when the consumer stops early.
+    """
+    try:
+        for event in stream:
+            if event.choices:
+                delta = event.choices[0].delta.content
+                if delta:
+                    yield delta
+    finally:
+        stream.close()
+
+def stream_report_sections(prompt, company_name="DraftKings Inc.", ticker="DKNG", use_cache=True,
+                           mock_chunk_size=16, mock_chunk_delay=0.0):
+    """
+    Streaming counterpart of generate_report.
+
+    Requests a streamed completion and parses it incrementally, yielding each
+    top-level section of the report as soon as it closes instead of waiting
+    for the whole response. Cached and mock responses are replayed in
+    `mock_chunk_size` character deltas, `mock_chunk_delay` seconds apart, so
+    offline runs exercise the same path. The complete response is cached
+    once the object has closed, if it matches the report schema.
+
+    Yields:
+        tuple: (section_key, value), in the order the model writes them.
+
+    Raises:
+        json.JSONDecodeError: If the response is malformed or ends early.
+        openai.OpenAIError: If the request fails after the scheduler's retries.
+    """
+    api_key = get_api_key()
+    cache = None
+    cache_key = None
+
+    if not api_key:
+        _warn_missing_key()
+        content = json.dumps(get_mock_response(company_name, ticker))
+        deltas = replay_chunks(split_into_chunks(content, mock_chunk_size), mock_chunk_delay)
+    else:
+        cache = get_response_cache() if use_cache else None
+        cache_key = _cache_key_for(prompt)
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached is not None:
+            deltas = replay_chunks(split_into_chunks(cached, mock_chunk_size))
+            cache = None
+        else:
+            # Only opening the stream is retried; a stream that fails part
+            # way through raises to the caller.
+            stream = get_scheduler().call(
+                get_client(api_key).chat.completions.create,
+                estimated_tokens=estimate_tokens(prompt),
+                stream=True,
+                **_build_completion_kwargs(prompt)
+            )
+            deltas = _iter_completion_deltas(stream)
+
+    parser = SectionStreamParser()
+    for delta in deltas:
+        yield from parser.feed(delta)
+    parser.close()
+
+    if cache is not None and REPORT_VALIDATOR.is_valid(parser.result):
+        cache.set(cache_key, parser.text)
+
+def generate_report_streaming(prompt, company_name="DraftKings Inc.", ticker="DKNG", on_section=None, use_cache=True, **kwargs):
+    """
+    Generates a report with stream_report_sections, calling
+    `on_section(key, value)` for each section as it arrives so downstream
+    work (e.g. StreamingReportAnalyzer.add_section) overlaps generation.
+
+    Returns:
+        dict: The complete report, or None if generation failed, like generate_report.
+    """
+    report_dict = {}
+    try:
+        for key, value in stream_report_sections(prompt, company_name, ticker, use_cache=use_cache, **kwargs):
+            report_dict[key] = value
+            if on_section is not None:
+                on_section(key, value)
+        return report_dict
+    except Exception as e:
+        print(f"[{ticker}] ", end="")
+        _report_llm_error(e)
+
+    print("--- Streaming LLM call failed. Returning None. ---")
+    return None
+
+async def generate_report_async(prompt, company_name="DraftKings Inc.", ticker="DKNG", client=None, mock_latency=0.0, use_cache=True):
+    """
+    Async counterpart of generate_report.
+
+    Uses the given AsyncOpenAI client. When no client is provided, the mock
+    response is returned after sleeping for `mock_latency` seconds, which
+    simulates network time for offline runs.
+    """
+    if client is None:
+        if mock_latency:
+            await asyncio.sleep(mock_latency)
+        return get_mock_response(company_name, ticker)
+
+    cache = get_response_cache() if use_cache else None
+    cache_key = _cache_key_for(prompt)
+    cached_report = _get_cached_report(cache, cache_key)
+    if cached_report is not None:
+        return cached_report
+
+    try:
+        response = await get_scheduler().call_async(
+            client.chat.completions.create,
+            estimated_tokens=estimate_tokens(prompt),
+            **_build_completion_kwargs(prompt)
+        )
+        return _parse_report_response(response, cache, cache_key)
+    except Exception as e:
+        print(f"[{ticker}] ", end="")
+        _report_llm_error(e)
+
+    return None
+
+def create_async_client():
+    """
+    Returns a new AsyncOpenAI client when OPENAI_API_KEY is set, else None
+    (callers then fall back to mock responses). The caller closes it.
+    LLM_BACKEND selects a recording wrapper or the offline replay client instead.
+    """
+    api_key = get_api_key()
+    if not api_key:
+        return None
+    backend = get_llm_backend()
+    if backend == "replay":
+        return replay_client_from_env(async_client=True)
+    client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+    if backend == "record":
+        return AsyncRecordingClient(client, get_recording_store())
+    return client
+
+async def generate_reports_async(companies, max_concurrency=8, prompt_builder=get_report_generation_prompt, client=None, mock_latency=0.0, use_cache=True):
+    """
+    Generates reports for many companies concurrently.
+
+    Args:
+        companies (iterable): (company_name, ticker) pairs.
+        max_concurrency (int): Maximum number of requests in flight at once.
+        prompt_builder (callable): Builds the prompt from (company_name, ticker).
+        client (openai.AsyncOpenAI): Optional client to use. By default one pooled
+            client is created for the whole batch when OPENAI_API_KEY is set,
+            otherwise mock responses are served.
+        mock_latency (float): Seconds each mock response waits before returning.
+        use_cache (bool): Serve repeated prompts from the response cache.
+
+    Yields:
+        tuple: (company_name, ticker, report_dict or None), in completion order.
+    """
+    owns_client = False
+    if client is None:
+        client = create_async_client()
+        if client is not None:
+            owns_client = True
+        else:
+            print("\n--- WARNING: OPENAI_API_KEY not found. Using mock LLM responses for the batch. ---")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(company_name, ticker):
+        async with semaphore:
+            prompt = prompt_builder(company_name, ticker)
+            report = await generate_report_async(
+                prompt, company_name, ticker, client=client, mock_latency=mock_latency, use_cache=use_cache
+            )
+            return company_name, ticker, report
+
+    tasks = [asyncio.ensure_future(run_one(name, ticker)) for name, ticker in companies]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        if owns_client:
+            await client.close()
+
+def generate_reports(companies, max_concurrency=8, **kwargs):
+    """
+    Synchronous wrapper around generate_reports_async.
+    Returns a list of (company_name, ticker, report_dict or None) in completion order.
+    """
+    async def collect():
+        return [result async for result in generate_reports_async(companies, max_concurrency, **kwargs)]
+
+    return asyncio.run(collect())
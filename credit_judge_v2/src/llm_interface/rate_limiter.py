@@ -0,0 +1,209 @@
+# Rate-limit-aware scheduling for LLM calls.
+# Paces requests against requests/min and tokens/min budgets with token buckets
+# and retries transient failures (429s, connection errors, 5xx) with jittered
+# exponential backoff, honoring any Retry-After hint from the server.
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+import openai
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Rough characters-per-token ratio for English prompts, used when no tokenizer is available.
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 1500
+
+def estimate_tokens(prompt, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """
+    Estimates the total tokens a request will consume (prompt plus completion).
+    """
+    return len(prompt) // CHARS_PER_TOKEN + completion_tokens
+
+class TokenBucket:
+    """
+    Token bucket that refills continuously at `per_minute / 60` units per second.
+
+    Callers reserve units up front and are told how long to wait before the
+    reservation is covered. The balance may go negative, which queues later
+    callers behind earlier ones instead of letting them race.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self, amount=1.0):
+        """
+        Deducts `amount` units and returns the seconds to wait before using them.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def pause(self, seconds):
+        """
+        Withholds units for `seconds`. Callers reserving during the pause are
+        queued behind it and released one reservation at a time at the refill
+        rate, instead of all at once when it ends.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def adjust(self, delta):
+        """
+        Credits (positive) or debits (negative) the bucket, e.g. once the
+        actual token usage of a request is known.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+def get_retry_after(error):
+    """
+    Returns the server-provided retry delay in seconds, or None if absent.
+    Understands `retry-after-ms` and `retry-after` (seconds or HTTP date).
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RateLimitScheduler:
+    """
+    Paces LLM calls against request and token budgets and retries transient errors.
+
+    Args:
+        requests_per_minute (float): Request budget.
+        tokens_per_minute (float): Token budget (prompt plus completion).
+        max_retries (int): Retries per call before the last error is raised.
+        base_delay (float): Initial backoff in seconds.
+        max_delay (float): Cap on a single backoff in seconds.
+        burst (float): Requests that may be sent back-to-back. The default of 1
+            spaces requests evenly across the minute.
+    """
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=150000, max_retries=6,
+                 base_delay=1.0, max_delay=60.0, burst=1):
+        self.requests = TokenBucket(requests_per_minute, capacity=burst)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def _reserve(self, estimated_tokens):
+        """Returns how long to wait before the next call may be sent."""
+        return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def _backoff(self, attempt, error):
+        """
+        Returns the delay before retry number `attempt`. A Retry-After hint is
+        honored and also pauses the shared request budget, so every other
+        call waits too and is then released at the request rate. The retry
+        itself goes back through the budget after the delay, so callers hit
+        by the same 429 are spaced out rather than retrying together.
+        """
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay)
+            self.requests.pause(delay)
+            return delay
+        # Full jitter keeps retries from many workers from synchronizing.
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _record_usage(self, response, estimated_tokens):
+        """Reconciles the token bucket with the actual usage reported by the API."""
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if isinstance(total_tokens, int):
+            self.tokens.adjust(estimated_tokens - total_tokens)
+
+    def call(self, func, *args, estimated_tokens=DEFAULT_COMPLETION_TOKENS, **kwargs):
+        """
+        Calls `func(*args, **kwargs)` within the budgets, retrying transient errors.
+        """
+        attempt = 0
+        while True:
+            wait = self._reserve(estimated_tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = func(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                # A rejected request consumed no tokens, so return its reservation.
+                self.tokens.adjust(estimated_tokens)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                print(f"Transient LLM error ({type(e).__name__}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            self._record_usage(response, estimated_tokens)
+            return response
+
+    async def call_async(self, func, *args, estimated_tokens=DEFAULT_COMPLETION_TOKENS, **kwargs):
+        """
+        Async counterpart of call() for coroutine functions.
+        """
+        attempt = 0
+        while True:
+            wait = self._reserve(estimated_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await func(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                # A rejected request consumed no tokens, so return its reservation.
+                self.tokens.adjust(estimated_tokens)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                print(f"Transient LLM error ({type(e).__name__}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            self._record_usage(response, estimated_tokens)
+            return response
@@ -0,0 +1,591 @@
+# Record/replay stand-ins for the OpenAI client, for offline load testing.
+# "record" wraps the real client and stores every completion with its latency;
+# "replay" serves stored completions, or synthesizes reports from the scenario
+# data for unseen tickers, with configurable latency and injected failures.
+import os
+import re
+import json
+import math
+import time
+import zlib
+import random
+import sqlite3
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import openai
+
+from credit_judge_v2.src.llm_interface.response_cache import make_cache_key
+from credit_judge_v2.src.llm_interface.stream_parser import split_into_chunks
+
+LLM_BACKENDS = ("openai", "record", "replay")
+ERROR_KINDS = ("429", "timeout", "malformed")
+
+DEFAULT_RECORDING_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".cache", "llm_recordings.sqlite3"
+)
+DEFAULT_SCENARIOS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "credit_judge_poc", "data", "LLM_JSONL_05242025.jsonl"
+)
+# Latency of synthesized responses when nothing has been recorded.
+DEFAULT_LATENCY_SPEC = "lognormal:2.0,0.4"
+
+def get_llm_backend():
+    """
+    Returns the backend selected by LLM_BACKEND: "openai" (default),
+    "record" or "replay".
+    """
+    backend = os.getenv("LLM_BACKEND", "openai").strip().lower() or "openai"
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}'. Choose from: {', '.join(LLM_BACKENDS)}")
+    return backend
+
+class RecordingStore:
+    """
+    SQLite store of recorded completions: zlib-compressed content and the
+    observed latency, keyed by response_cache.make_cache_key.
+
+    Args:
+        path (str): Location of the SQLite database file.
+    """
+
+    def __init__(self, path=DEFAULT_RECORDING_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._latencies = None
+
+        store_dir = os.path.dirname(path)
+        if store_dir and not os.path.exists(store_dir):
+            os.makedirs(store_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recordings ("
+            " key TEXT PRIMARY KEY,"
+            " content BLOB NOT NULL,"
+            " latency REAL NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (content, latency_seconds), or None if `key` was not recorded.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT content, latency FROM recordings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), row[1]
+
+    def put(self, key, content, latency):
+        blob = zlib.compress(content.encode("utf-8"), 6)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recordings (key, content, latency, recorded_at) VALUES (?, ?, ?, ?)",
+                (key, blob, latency, time.time())
+            )
+            self._latencies = None
+
+    def latencies(self):
+        """Returns every recorded latency, e.g. to sample from for unrecorded requests."""
+        with self._lock:
+            if self._latencies is None:
+                self._latencies = [row[0] for row in self._conn.execute("SELECT latency FROM recordings")]
+            return self._latencies
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _request_key(kwargs):
+    """Cache key of a chat completion request, matching llm_handler._cache_key_for."""
+    messages = kwargs.get("messages", [])
+    system = next((m["content"] for m in messages if m.get("role") == "system"), None)
+    prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return make_cache_key(kwargs.get("model"), system, prompt, kwargs.get("response_format")), prompt
+
+def _completion(content, prompt):
+    """A minimal object shaped like a ChatCompletion."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+        usage=SimpleNamespace(total_tokens=(len(prompt) + len(content)) // 4)
+    )
+
+def _stream_event(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+# --- Recording ---
+
+class _RecordingStream:
+    """Passes a completion stream through and records it once it is fully read."""
+
+    def __init__(self, stream, on_complete):
+        self._stream = stream
+        self._on_complete = on_complete
+        self._parts = []
+
+    def __iter__(self):
+        for event in self._stream:
+            if event.choices and event.choices[0].delta.content:
+                self._parts.append(event.choices[0].delta.content)
+            yield event
+        self._on_complete("".join(self._parts))
+
+    def close(self):
+        self._stream.close()
+
+class RecordingClient:
+    """
+    Wraps an OpenAI client and records each successful chat completion,
+    streamed or not, with its wall-clock latency.
+
+    Args:
+        client (openai.OpenAI): The real client.
+        store (RecordingStore): Where completions are recorded.
+    """
+
+    def __init__(self, client, store):
+        self._client = client
+        self.store = store
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        key, _ = _request_key(kwargs)
+        started = time.perf_counter()
+        response = self._client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return _RecordingStream(response, lambda content: self.store.put(key, content, time.perf_counter() - started))
+        self.store.put(key, response.choices[0].message.content, time.perf_counter() - started)
+        return response
+
+class AsyncRecordingClient(RecordingClient):
+    """Async counterpart of RecordingClient for openai.AsyncOpenAI (non-streamed calls)."""
+
+    async def create(self, **kwargs):
+        key, _ = _request_key(kwargs)
+        started = time.perf_counter()
+        response = await self._client.chat.completions.create(**kwargs)
+        self.store.put(key, response.choices[0].message.content, time.perf_counter() - started)
+        return response
+
+    async def close(self):
+        await self._client.close()
+
+# --- Replay configuration ---
+
+def parse_latency_spec(spec):
+    """
+    Parses a latency distribution.
+
+    Args:
+        spec (str): "recorded" (each response's recorded latency; unrecorded
+            requests draw from all recorded latencies), "none",
+            "fixed:SECONDS", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA".
+
+    Returns:
+        tuple: (kind, params).
+    """
+    kind, _, args = (spec or "recorded").strip().lower().partition(":")
+    params = tuple(float(arg) for arg in args.split(",") if arg.strip())
+    expected = {"recorded": 0, "none": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+    if kind not in expected or len(params) != expected[kind]:
+        raise ValueError(f"Invalid latency spec '{spec}'. Use recorded, none, fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+    return kind, params
+
+def parse_error_rates(spec):
+    """
+    Parses injected error rates, e.g. "429=0.05,timeout=0.02,malformed=0.01".
+
+    Returns:
+        dict: Error kind -> probability per request.
+    """
+    rates = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        kind, _, rate = part.partition("=")
+        kind = kind.strip().lower()
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"Unknown error kind '{kind}'. Choose from: {', '.join(ERROR_KINDS)}")
+        rates[kind] = float(rate)
+    if sum(rates.values()) > 1:
+        raise ValueError(f"Error rates add up to more than 1: {spec}")
+    return rates
+
+class InjectedRateLimitError(openai.RateLimitError):
+    """A 429 raised by the replay client; retried by the scheduler like a real one."""
+
+    def __init__(self, message="Injected rate limit (429)", retry_after=None):
+        Exception.__init__(self, message)
+        self.message = message
+        self.body = None
+        self.request_id = None
+        self.status_code = 429
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=429, text=message, headers=headers)
+
+class InjectedTimeoutError(openai.APITimeoutError):
+    """A request timeout raised by the replay client."""
+
+    def __init__(self, message="Injected request timeout"):
+        Exception.__init__(self, message)
+        self.message = message
+        self.body = None
+        self.request = None
+
+# --- Report synthesis ---
+
+_RATINGS = (
+    "AAA", "AA+", "AA", "AA-", "A+", "A", "A-", "BBB+", "BBB", "BBB-",
+    "BB+", "BB", "BB-", "B+", "B", "B-", "CCC+", "CCC", "CCC-"
+)
+_HUMAN_RATING_RE = re.compile(r"Assign\s+([A-Z]{1,3}[+-]?)\s+rating,\s*Outlook\s+(\w+)", re.IGNORECASE)
+_PROMPT_COMPANY_RE = re.compile(r"\*\*Company Name:\*\*\s*(.+)")
+_PROMPT_TICKER_RE = re.compile(r"\*\*Ticker Symbol:\*\*\s*(\S+)")
+
+_STRENGTHS = (
+    "Leading market position in {industry} with recognized brands.",
+    "Diversified revenue base across products and geographies.",
+    "Solid liquidity from cash on hand and an undrawn revolving credit facility.",
+    "Consistent free cash flow generation through the cycle.",
+    "Experienced management team with a conservative financial policy.",
+    "Long-term customer contracts provide revenue visibility.",
+)
+_WEAKNESSES = (
+    "Exposure to cyclical demand in {industry}.",
+    "Elevated leverage following recent debt-funded investments.",
+    "Customer concentration among a small number of large accounts.",
+    "Margin pressure from rising input and labor costs.",
+    "Execution risk in ongoing expansion and integration plans.",
+    "Regulatory uncertainty in key markets.",
+)
+_FOCUS_AREAS = (
+    "Refinancing of upcoming debt maturities.",
+    "Sustainability of margins amid competitive pricing.",
+    "Capital allocation between growth investment and shareholder returns.",
+)
+
+def load_scenarios(path=DEFAULT_SCENARIOS_PATH):
+    """
+    Builds a profile per ticker from the `scenario_details` of a JSONL data
+    file, merging every record that names the ticker or its company.
+
+    Returns:
+        dict: Ticker -> profile dict (company_name, industry, focus areas,
+        human expert text, ...). Empty if the file does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    details = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                scenario = json.loads(line).get("scenario_details")
+            except (json.JSONDecodeError, AttributeError):
+                continue
+            if isinstance(scenario, dict):
+                details.append(scenario)
+
+    profiles, tickers_by_company = {}, {}
+    for scenario in details:
+        ticker = scenario.get("ticker_symbol")
+        if ticker:
+            tickers_by_company[scenario.get("company_name")] = ticker
+    for scenario in details:
+        ticker = scenario.get("ticker_symbol") or tickers_by_company.get(scenario.get("company_name"))
+        if not ticker:
+            continue
+        profile = profiles.setdefault(ticker, {})
+        for field, value in scenario.items():
+            if isinstance(value, str) and value.strip() and value != "N/A":
+                profile.setdefault(field, value)
+    return profiles
+
+def _format_amount(value):
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    if value >= 1e9:
+        return f"{sign}{value / 1e9:.2f} Billion USD"
+    return f"{sign}{value / 1e6:.0f} Million USD"
+
+def _snc_class(notch):
+    if notch <= _RATINGS.index("BB-"):
+        return "Pass"
+    if notch <= _RATINGS.index("B-"):
+        return "Special Mention"
+    return "Substandard"
+
+def synthesize_report(company_name, ticker, profile=None, seed=0):
+    """
+    Builds a plausible credit report for any ticker. The same (ticker, seed)
+    always gives the same report. A scenario profile supplies the industry,
+    focus areas and, when its human expert text states one, the rating;
+    the rest is drawn at random. The financial figures are internally
+    consistent, e.g. leverage equals net debt / EBITDA.
+
+    Returns:
+        dict: A report matching schema.REPORT_SCHEMA.
+    """
+    rng = random.Random(f"{seed}:{ticker}")
+    profile = profile or {}
+    industry = profile.get("industry", "Diversified Industrials")
+
+    match = _HUMAN_RATING_RE.search(profile.get("human_expert_report_text", ""))
+    if match and match.group(1).upper() in _RATINGS:
+        rating, outlook = match.group(1).upper(), match.group(2).capitalize()
+    else:
+        rating = rng.choice(_RATINGS[4:16])
+        outlook = rng.choice(("Stable", "Stable", "Stable", "Positive", "Negative"))
+    notch = _RATINGS.index(rating)
+
+    revenue = rng.lognormvariate(math.log(5e9), 1.0)
+    margin = rng.uniform(0.08, 0.35)
+    ebitda = revenue * margin
+    leverage = max(0.1, 0.4 + 0.33 * notch + rng.uniform(-0.4, 0.4))
+    net_debt = ebitda * leverage
+    growth = rng.uniform(-0.05, 0.25)
+    period = f"FY{profile.get('current_date', '2024')[:4]}"
+
+    focus = [area.strip().rstrip(".") + "." for area in
+             re.split(r",|;", profile.get("special_focus_areas") or profile.get("focus_areas") or "") if area.strip()]
+    focus += rng.sample(_FOCUS_AREAS, max(0, 2 - len(focus)))
+
+    return {
+        "reportTitle": f"Corporate Credit Rating Report: {company_name}",
+        "assessmentDate": profile.get("current_date", "2024-06-30"),
+        "companyName": company_name,
+        "tickerSymbol": ticker,
+        "overview": (f"{company_name} ({profile.get('stock_exchange', 'NYSE')}: {ticker}) operates in the {industry} sector. "
+                     f"Revenue of {_format_amount(revenue)} in {period} grew {growth:.1%} year over year."),
+        "corporateCreditRating": {
+            "rating": rating,
+            "outlook": outlook,
+            "justification": (f"The {rating} rating reflects leverage of {leverage:.1f}x net debt to EBITDA and an "
+                              f"EBITDA margin of {margin:.1%}, weighed against the risks of the {industry} sector.")
+        },
+        "financialPerformance": {
+            "latestReportedPeriod": period,
+            "revenue": {"amount": _format_amount(revenue), "period": period, "yearOverYearGrowth": f"{growth:.1%}"},
+            "adjustedEBITDA": {"amount": _format_amount(ebitda), "period": period, "margin": f"{margin:.1%}"},
+            "freeCashFlow": {"amount": _format_amount(ebitda * rng.uniform(-0.1, 0.5)), "period": period},
+            "leverage": {"netDebt": _format_amount(net_debt), "debtToEbitda": f"Net Debt / Adj. EBITDA approx. {leverage:.1f}x"}
+        },
+        "sncfRegulatoryRating": {
+            "indicativeRating": _snc_class(notch),
+            "justification": f"Repayment capacity is consistent with a {rating} issuer at {leverage:.1f}x leverage."
+        },
+        "strengths": [s.format(industry=industry) for s in rng.sample(_STRENGTHS, 3)],
+        "weaknesses": [w.format(industry=industry) for w in rng.sample(_WEAKNESSES, 3)],
+        "specialFocusAreas": focus
+    }
+
+# --- Replay ---
+
+class _ReplayStream:
+    """Serves content as stream events, spreading `latency` across the chunks."""
+
+    def __init__(self, chunks, latency):
+        self._chunks = chunks
+        self._delay = latency / len(chunks) if chunks else 0.0
+        self._closed = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self._closed:
+                return
+            if self._delay:
+                time.sleep(self._delay)
+            yield _stream_event(chunk)
+
+    def close(self):
+        self._closed = True
+
+class ReplayClient:
+    """
+    Offline stand-in for openai.OpenAI's chat completions.
+
+    Recorded requests are answered with their recorded content; any other
+    request is answered with synthesize_report for the company and ticker
+    named in the prompt. Each response waits for a latency drawn from
+    `latency`, and `error_rates` injects 429s (InjectedRateLimitError),
+    timeouts (InjectedTimeoutError, after the drawn latency) and malformed
+    JSON (the content cut in half).
+
+    Every random draw is seeded from (seed, request, attempt number), so a run
+    replays identically however requests are interleaved.
+
+    Args:
+        store (RecordingStore): Recorded completions, or None.
+        scenarios (dict): Ticker -> profile, from load_scenarios.
+        latency (str): A parse_latency_spec spec.
+        latency_scale (float): Multiplies every latency, e.g. 0.01 to run a
+            large benchmark quickly with the same distribution shape.
+        error_rates (dict or str): Error kind -> probability (or a
+            parse_error_rates spec).
+        seed (int): Seed of all random draws.
+        chunk_size (int): Characters per event of streamed responses.
+    """
+
+    def __init__(self, store=None, scenarios=None, latency="recorded", latency_scale=1.0,
+                 error_rates=None, seed=0, chunk_size=64):
+        self.store = store
+        self.scenarios = scenarios or {}
+        self.latency = parse_latency_spec(latency)
+        self.latency_scale = latency_scale
+        self.error_rates = parse_error_rates(error_rates) if isinstance(error_rates, str) else dict(error_rates or {})
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.counts = {"requests": 0, "recorded": 0, "synthesized": 0, **{kind: 0 for kind in ERROR_KINDS}}
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._scenario_tickers = sorted(self.scenarios)
+        self._default_latency = parse_latency_spec(DEFAULT_LATENCY_SPEC)
+
+    def stats(self):
+        """Returns request counts by outcome."""
+        with self._lock:
+            return dict(self.counts)
+
+    def _draw_latency(self, rng, recorded_latency):
+        kind, params = self.latency
+        if kind == "recorded":
+            if recorded_latency is None:
+                recorded = self.store.latencies() if self.store is not None else []
+                if recorded:
+                    recorded_latency = rng.choice(recorded)
+                else:
+                    kind, params = self._default_latency
+            if recorded_latency is not None:
+                return recorded_latency * self.latency_scale
+        if kind == "none":
+            return 0.0
+        if kind == "fixed":
+            seconds = params[0]
+        elif kind == "uniform":
+            seconds = rng.uniform(*params)
+        else:
+            seconds = rng.lognormvariate(math.log(params[0]), params[1])
+        return seconds * self.latency_scale
+
+    def _synthesize(self, prompt):
+        company_match = _PROMPT_COMPANY_RE.search(prompt)
+        ticker_match = _PROMPT_TICKER_RE.search(prompt)
+        company_name = company_match.group(1).strip() if company_match else "Example Corp."
+        ticker = ticker_match.group(1).strip() if ticker_match else "EXMPL"
+        profile = self.scenarios.get(ticker)
+        if profile is None and self._scenario_tickers:
+            # Unknown tickers borrow the industry and focus areas of a scenario company.
+            template = self.scenarios[random.Random(f"{self.seed}:{ticker}").choice(self._scenario_tickers)]
+            profile = {k: v for k, v in template.items() if k not in ("company_name", "ticker_symbol", "human_expert_report_text")}
+        return json.dumps(synthesize_report(company_name, ticker, profile, self.seed))
+
+    def _plan(self, kwargs):
+        """
+        Decides the outcome of one request.
+
+        Returns:
+            tuple: (content, latency_seconds, error_kind or None, prompt).
+        """
+        key, prompt = _request_key(kwargs)
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+
+        recorded = self.store.get(key) if self.store is not None else None
+        if recorded is not None:
+            content, recorded_latency = recorded
+            outcome = "recorded"
+        else:
+            content = self._synthesize(prompt)
+            recorded_latency = None
+            outcome = "synthesized"
+
+        error = None
+        draw = rng.random()
+        for kind in ERROR_KINDS:
+            rate = self.error_rates.get(kind, 0.0)
+            if draw < rate:
+                error = kind
+                break
+            draw -= rate
+        if error == "malformed":
+            content = content[:len(content) // 2]
+
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts[error or outcome] += 1
+        return content, self._draw_latency(rng, recorded_latency), error, prompt
+
+    def create(self, **kwargs):
+        content, latency, error, prompt = self._plan(kwargs)
+        if error == "429":
+            raise InjectedRateLimitError()
+        if kwargs.get("stream"):
+            if error == "timeout":
+                time.sleep(latency)
+                raise InjectedTimeoutError()
+            return _ReplayStream(split_into_chunks(content, self.chunk_size), latency)
+        time.sleep(latency)
+        if error == "timeout":
+            raise InjectedTimeoutError()
+        return _completion(content, prompt)
+
+class AsyncReplayClient(ReplayClient):
+    """Async counterpart of ReplayClient for code written against openai.AsyncOpenAI."""
+
+    async def create(self, **kwargs):
+        content, latency, error, prompt = self._plan(kwargs)
+        if error == "429":
+            raise InjectedRateLimitError()
+        await asyncio.sleep(latency)
+        if error == "timeout":
+            raise InjectedTimeoutError()
+        return _completion(content, prompt)
+
+    async def close(self):
+        pass
+
+_recording_store = None
+_store_lock = threading.Lock()
+
+def get_recording_store():
+    """
+    Returns the process-wide recording store. The location can be
+    overridden with LLM_REPLAY_PATH.
+    """
+    global _recording_store
+    with _store_lock:
+        if _recording_store is None:
+            _recording_store = RecordingStore(os.getenv("LLM_REPLAY_PATH", DEFAULT_RECORDING_PATH))
+        return _recording_store
+
+def replay_client_from_env(async_client=False):
+    """
+    Creates a ReplayClient (or AsyncReplayClient) configured from
+    LLM_REPLAY_LATENCY, LLM_REPLAY_LATENCY_SCALE, LLM_REPLAY_ERRORS,
+    LLM_REPLAY_SEED and LLM_REPLAY_SCENARIOS.
+    """
+    client_class = AsyncReplayClient if async_client else ReplayClient
+    return client_class(
+        store=get_recording_store(),
+        scenarios=load_scenarios(os.getenv("LLM_REPLAY_SCENARIOS", DEFAULT_SCENARIOS_PATH)),
+        latency=os.getenv("LLM_REPLAY_LATENCY", "recorded"),
+        latency_scale=float(os.getenv("LLM_REPLAY_LATENCY_SCALE", 1.0)),
+        error_rates=os.getenv("LLM_REPLAY_ERRORS", ""),
+        seed=int(os.getenv("LLM_REPLAY_SEED", 0))
+    )
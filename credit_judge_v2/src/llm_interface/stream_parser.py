@@ -0,0 +1,295 @@
+import json
+import re
+import time
+
+# Parser states.
+_BEFORE_OBJECT = "before_object"
+_BEFORE_KEY = "before_key"
+_IN_KEY = "in_key"
+_BEFORE_COLON = "before_colon"
+_BEFORE_VALUE = "before_value"
+_IN_VALUE = "in_value"
+_AFTER_VALUE = "after_value"
+_DONE = "done"
+
+_WHITESPACE = " \t\n\r"
+# Runs of characters that never change the parser state, skipped in one step.
+_STRING_RUN_RE = re.compile(r'[^"\\]+')
+_CONTAINER_RUN_RE = re.compile(r'[^"{}\[\]]+')
+_SCALAR_RUN_RE = re.compile(r'[^,}\s]+')
+
+class SectionStreamParser:
+    """
+    Incremental parser for a streamed JSON object.
+
+    Feed it the text deltas of a streamed completion as they arrive. Each
+    top-level member (e.g. "overview" or "corporateCreditRating") is decoded
+    and returned as soon as its value closes, without waiting for the rest of
+    the object. Each delta is scanned once and never copied again: text that
+    has been scanned is either dropped or, inside an unfinished member, set
+    aside until the member closes. The total work is linear in the length of
+    the response however finely it is split.
+
+    Raises json.JSONDecodeError for malformed input, like json.loads.
+    """
+
+    def __init__(self):
+        self.result = {}
+        self._chunks = []
+        # Unscanned text; `_offset` is the position of its first character in the whole stream.
+        self._buffer = ""
+        self._offset = 0
+        self._pos = 0
+        # The key or value being scanned: where it starts in the buffer and
+        # in the stream, and the scanned part already moved out of the buffer.
+        self._token_start = None
+        self._token_offset = None
+        self._pending = []
+        self._state = _BEFORE_OBJECT
+        self._key = None
+        self._value_kind = None
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def text(self):
+        """The raw text received so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    @property
+    def done(self):
+        """True once the closing brace of the object has been received."""
+        return self._state == _DONE
+
+    def _error(self, message, pos):
+        return json.JSONDecodeError(message, self.text, self._offset + pos)
+
+    def _skip_whitespace(self, pos):
+        text = self._buffer
+        while pos < len(text) and text[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def _start_token(self, pos):
+        self._token_start = pos
+        self._token_offset = self._offset + pos
+
+    def _finish_token(self, end):
+        """Returns the full text of the current key or value, ending at `end`."""
+        self._pending.append(self._buffer[self._token_start:end])
+        token = "".join(self._pending)
+        self._pending = []
+        self._token_start = None
+        return token
+
+    def _suspend(self, pos, completed):
+        """
+        Waits for the next delta with scanning resuming at `pos`. The scanned
+        text is dropped from the buffer, or set aside if it belongs to an
+        unfinished key or value.
+        """
+        if self._token_start is not None:
+            self._pending.append(self._buffer[self._token_start:pos])
+            self._token_start = 0
+        self._buffer = self._buffer[pos:]
+        self._offset += pos
+        self._pos = 0
+        return completed
+
+    def _scan_string(self, pos):
+        """
+        Scans string content from `pos` (just after the opening quote).
+        Returns the index just past the closing quote, or None with
+        self._pos set to where scanning should resume.
+        """
+        text = self._buffer
+        while True:
+            match = _STRING_RUN_RE.match(text, pos)
+            if match:
+                pos = match.end()
+            if pos >= len(text):
+                self._pos = pos
+                return None
+            if text[pos] == '"':
+                return pos + 1
+            # Backslash: wait for the escaped character if it has not arrived.
+            if pos + 1 >= len(text):
+                self._pos = pos
+                return None
+            pos += 2
+
+    def _scan_value(self, pos):
+        """
+        Scans the current member's value from `pos`. Returns the index just
+        past the end of the value, or None if it is still incomplete.
+        """
+        text = self._buffer
+        if self._value_kind == "scalar":
+            match = _SCALAR_RUN_RE.match(text, pos)
+            end = match.end() if match else pos
+            if end >= len(text):
+                self._pos = end
+                return None
+            return end
+
+        if self._value_kind == "string":
+            return self._scan_string(pos)
+
+        while pos < len(text):
+            if self._in_string:
+                end = self._scan_string(pos)
+                if end is None:
+                    return None
+                self._in_string = False
+                pos = end
+                continue
+            match = _CONTAINER_RUN_RE.match(text, pos)
+            if match:
+                pos = match.end()
+                continue
+            char = text[pos]
+            pos += 1
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+        self._pos = pos
+        return None
+
+    def feed(self, chunk):
+        """
+        Consumes one text delta.
+
+        Returns:
+            list: (key, value) pairs for every top-level member completed by
+            this delta, in order.
+        """
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        self._buffer += chunk
+        text = self._buffer
+        completed = []
+        pos = self._pos
+
+        while True:
+            if self._state in (_BEFORE_OBJECT, _BEFORE_KEY, _BEFORE_COLON, _BEFORE_VALUE, _AFTER_VALUE, _DONE):
+                pos = self._skip_whitespace(pos)
+                if pos >= len(text):
+                    return self._suspend(pos, completed)
+                char = text[pos]
+
+                if self._state == _BEFORE_OBJECT:
+                    if char != "{":
+                        raise self._error("Expecting '{'", pos)
+                    self._state = _BEFORE_KEY
+                    pos += 1
+                elif self._state == _BEFORE_KEY:
+                    if char == "}" and not self.result:
+                        self._state = _DONE
+                        pos += 1
+                    elif char == '"':
+                        self._start_token(pos)
+                        self._state = _IN_KEY
+                        pos += 1
+                    else:
+                        raise self._error("Expecting property name enclosed in double quotes", pos)
+                elif self._state == _BEFORE_COLON:
+                    if char != ":":
+                        raise self._error("Expecting ':' delimiter", pos)
+                    self._state = _BEFORE_VALUE
+                    pos += 1
+                elif self._state == _BEFORE_VALUE:
+                    self._start_token(pos)
+                    self._depth = 0
+                    self._in_string = False
+                    if char in "{[":
+                        self._value_kind = "container"
+                        self._depth = 1
+                        pos += 1
+                    elif char == '"':
+                        self._value_kind = "string"
+                        pos += 1
+                    else:
+                        self._value_kind = "scalar"
+                    self._state = _IN_VALUE
+                elif self._state == _AFTER_VALUE:
+                    if char == ",":
+                        self._state = _BEFORE_KEY
+                    elif char == "}":
+                        self._state = _DONE
+                    else:
+                        raise self._error("Expecting ',' delimiter", pos)
+                    pos += 1
+                else:
+                    raise self._error("Extra data", pos)
+
+            elif self._state == _IN_KEY:
+                end = self._scan_string(pos)
+                if end is None:
+                    return self._suspend(self._pos, completed)
+                self._key = json.loads(self._finish_token(end))
+                self._state = _BEFORE_COLON
+                pos = end
+
+            else:
+                end = self._scan_value(pos)
+                if end is None:
+                    return self._suspend(self._pos, completed)
+                token_offset = self._token_offset
+                try:
+                    value = json.loads(self._finish_token(end))
+                except json.JSONDecodeError as e:
+                    raise json.JSONDecodeError(f"Invalid value for '{self._key}': {e.msg}", self.text,
+                                               token_offset + e.pos) from e
+                self.result[self._key] = value
+                completed.append((self._key, value))
+                self._state = _AFTER_VALUE
+                pos = end
+
+    def close(self):
+        """
+        Signals the end of the stream and returns the decoded object.
+
+        Raises:
+            json.JSONDecodeError: If the object was never closed.
+        """
+        if self._state != _DONE:
+            raise json.JSONDecodeError("Unterminated JSON object in streamed response", self.text, len(self.text))
+        return self.result
+
+def iter_sections(chunks):
+    """
+    Parses an iterable of text deltas, yielding (key, value) for each
+    top-level member as soon as it is complete.
+
+    Raises:
+        json.JSONDecodeError: If the stream is malformed or ends early.
+    """
+    parser = SectionStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+def split_into_chunks(text, chunk_size=16):
+    """
+    Splits `text` into deltas of `chunk_size` characters, roughly the size
+    of the content deltas of a streamed chat completion.
+    """
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+def replay_chunks(chunks, delay=0.0):
+    """
+    Replays recorded deltas (e.g. from split_into_chunks or a captured
+    stream), sleeping `delay` seconds before each one to simulate generation.
+    """
+    for chunk in chunks:
+        if delay:
+            time.sleep(delay)
+        yield chunk
@@ -1,59 +1,298 @@
-from textblob import TextBlob
+import os
+import re
+import math
+import string
+from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import RE_EMOTICONS, RE_SARCASM
 import textstat
 
+RISK_KEYWORDS = ("risk", "loss", "decline", "debt", "uncertainty", "challenge", "burn")
+
+# Word tokens used for keyword matching, in the text and in the keywords
+# alike: runs of word characters, so "risk/return" and "cash-flow" hold the
+# words "risk" and "cash".
+_WORD_RE = re.compile(r"\w+")
+
+# The plural rule for keywords: a word also counts with one of these endings
+# ("risks", "losses"). Used for single words and for the last word of phrases.
+_PLURAL_SUFFIXES = ("s", "es")
+
+_PUNCTUATION = string.punctuation
+
+# textstat's word and sentence rules: punctuation (\W) is removed before
+# counting words and syllables, and sentences are runs of text between . ! or ?
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"[.!?]+")
+_HAS_WORD_RE = re.compile(r"\w")
+
+@lru_cache(maxsize=65536)
+def _count_syllables(word):
+    return textstat.syllable_count(word)
+
+@lru_cache(maxsize=65536)
+def _sentiment_split(word):
+    # TextBlob's tokenizer applied to one whitespace-delimited word: contractions
+    # and quotes are split off ("weren't" -> were n ' t) and punctuation is
+    # split except for abbreviation periods ("e.g.").
+    return tuple(" ".join(pattern_sentiment.tokenizer(word)).split())
+
+class TokenizedText:
+    """
+    A report's text tokenized once and shared by every analysis metric.
+
+    Everything is derived from a single whitespace split of the text:
+        words: Raw whitespace-delimited tokens.
+        lower_words: Lowercased words with surrounding punctuation stripped;
+            punctuation-only tokens are dropped.
+        sentiment_tokens: Tokens as TextBlob's tokenizer splits each word,
+            in their original case.
+        syllable_counts: Syllables of each word as textstat counts words
+            (tokens with a word character, punctuation removed).
+        sentence_lengths: Words in each run of text between . ! or ?, the
+            last entry being the unterminated run at the end (possibly 0).
+    """
+
+    __slots__ = ("text", "text_lower", "words", "lower_words", "sentiment_tokens",
+                 "syllable_counts", "sentence_lengths")
+
+    def __init__(self, text):
+        self.text = text or ""
+        self.text_lower = self.text.lower()
+        self.words = self.text.split()
+
+        lower_words = []
+        sentiment_tokens = []
+        syllable_counts = []
+        sentence_lengths = []
+        run_words = 0
+        for word in self.text_lower.split():
+            bare = word if word.isalnum() else _NON_WORD_RE.sub("", word)
+            if bare:
+                syllable_counts.append(_count_syllables(bare))
+                if "." in word or "!" in word or "?" in word:
+                    pieces = _SENTENCE_END_RE.split(word)
+                    for i, piece in enumerate(pieces):
+                        if i:
+                            sentence_lengths.append(run_words)
+                            run_words = 0
+                        if _HAS_WORD_RE.search(piece):
+                            run_words += 1
+                else:
+                    run_words += 1
+            elif "." in word or "!" in word or "?" in word:
+                sentence_lengths.append(run_words)
+                run_words = 0
+
+            core = word.strip(_PUNCTUATION)
+            if core:
+                lower_words.append(core)
+        sentence_lengths.append(run_words)
+
+        for word in self.words:
+            sentiment_tokens.extend(_sentiment_split(word))
+
+        self.lower_words = lower_words
+        self.sentiment_tokens = sentiment_tokens
+        self.syllable_counts = syllable_counts
+        self.sentence_lengths = sentence_lengths
+
+    @property
+    def sentence_count(self):
+        """Sentences of more than two words, at least 1, as textstat counts them."""
+        return max(1, sum(1 for length in self.sentence_lengths if length > 2))
+
+    @classmethod
+    def join(cls, parts):
+        """
+        Combines TokenizedTexts into the TokenizedText of their texts joined
+        with single spaces, without tokenizing anything again.
+        """
+        joined = cls.__new__(cls)
+        joined.text = " ".join(part.text for part in parts)
+        joined.text_lower = " ".join(part.text_lower for part in parts)
+        joined.words = [word for part in parts for word in part.words]
+        joined.lower_words = [word for part in parts for word in part.lower_words]
+        joined.sentiment_tokens = [token for part in parts for token in part.sentiment_tokens]
+        joined.syllable_counts = [count for part in parts for count in part.syllable_counts]
+
+        # The unterminated run at the end of each part continues into the
+        # first run of the next one.
+        sentence_lengths = [0]
+        for part in parts:
+            sentence_lengths[-1] += part.sentence_lengths[0]
+            sentence_lengths.extend(part.sentence_lengths[1:])
+        joined.sentence_lengths = sentence_lengths
+        return joined
+
+def tokenize_text(text):
+    """
+    Returns `text` as a TokenizedText, passing through already tokenized input.
+    """
+    if isinstance(text, TokenizedText):
+        return text
+    return TokenizedText(text)
+
 def calculate_sentiment(text):
     """
-    Calculates polarity and subjectivity using TextBlob.
+    Calculates polarity and subjectivity using TextBlob's pattern lexicon,
+    equal to TextBlob(text).sentiment.
+    Accepts a string or a TokenizedText.
     Returns a dictionary with 'polarity' and 'subjectivity'.
     """
-    if not text:
+    tokenized = tokenize_text(text)
+    if not tokenized.sentiment_tokens:
         return {"polarity": 0, "subjectivity": 0}
 
-    blob = TextBlob(text)
+    joined = " ".join(tokenized.sentiment_tokens)
+    if RE_SARCASM.search(joined) or RE_EMOTICONS.search(joined):
+        # TextBlob merges "( ! )" and emoticons such as ": )" across tokens
+        # within a sentence; leave such texts to its own tokenizer.
+        polarity, subjectivity = pattern_sentiment(tokenized.text)[:2]
+    else:
+        polarity, subjectivity = pattern_sentiment(joined.lower().split())[:2]
     return {
-        "polarity": blob.sentiment.polarity,
-        "subjectivity": blob.sentiment.subjectivity
+        "polarity": polarity,
+        "subjectivity": subjectivity
     }
 
+def _legacy_round(number, points):
+    # textstat's rounding of intermediate and final values (half away from zero).
+    scale = 10 ** points
+    return math.floor(number * scale + math.copysign(0.5, number)) / scale
+
 def calculate_readability(text):
     """
-    Calculates the Flesch Reading Ease score using textstat.
+    Calculates the Flesch Reading Ease score the way textstat does: words,
+    sentences and syllables are counted with its rules and the averages are
+    rounded as it rounds them, so the score equals
+    textstat.flesch_reading_ease(text).
+    Accepts a string or a TokenizedText.
     Returns the score.
     """
-    if not text:
+    tokenized = tokenize_text(text)
+    if not tokenized.text:
         return 0
-    return textstat.flesch_reading_ease(text)
+
+    total_words = len(tokenized.syllable_counts)
+    words_per_sentence = _legacy_round(total_words / tokenized.sentence_count, 1)
+    syllables_per_word = _legacy_round(sum(tokenized.syllable_counts) / total_words, 1) if total_words else 0.0
+    return _legacy_round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 2)
+
+def keyword_tokens(text_lower):
+    """Returns the word tokens keyword matching works on."""
+    return _WORD_RE.findall(text_lower)
+
+class KeywordMatcher:
+    """
+    Counts whole-word occurrences of a fixed keyword set.
+
+    Words are _WORD_RE tokens, so "risk" does not match inside "brisk" but
+    does inside "risk/return", and plurals (_PLURAL_SUFFIXES) count towards
+    their keyword ("risks" -> "risk", "losses" -> "loss"). Multi-word
+    keywords are matched together by one precompiled pattern, with any
+    punctuation or whitespace between their words.
+
+    Single words are counted by tokenizing the text once and tallying token
+    frequencies, so the text is read once and each keyword costs a few
+    lookups however long the list grows.
+
+    Args:
+        keywords (iterable): Keywords to count.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        self.single_words = []
+        self._phrases = {}
+        for keyword in dict.fromkeys(self.keywords):
+            tokens = _WORD_RE.findall(keyword.lower())
+            if len(tokens) == 1:
+                self.single_words.append((keyword, tokens[0]))
+            elif tokens:
+                self._phrases.setdefault(" ".join(tokens), []).append(keyword)
+
+        # Token form ("risk", "risks", "riskes") -> keywords it counts towards.
+        self.forms = {}
+        for keyword, token in self.single_words:
+            for form in (token, *(token + suffix for suffix in _PLURAL_SUFFIXES)):
+                self.forms.setdefault(form, []).append(keyword)
+
+        self.phrase_first_words = {phrase.split(" ")[0] for phrase in self._phrases}
+
+        self._phrase_re = None
+        if self._phrases:
+            alternation = "|".join(
+                r"\W+".join(re.escape(token) for token in phrase.split(" "))
+                for phrase in sorted(self._phrases, key=len, reverse=True)
+            )
+            plural = "|".join(_PLURAL_SUFFIXES)
+            self._phrase_re = re.compile(rf"\b({alternation})(?:{plural})?\b")
+
+    def count(self, text_lower, tokens=None):
+        """
+        Returns a dictionary mapping each keyword to its number of occurrences.
+
+        Args:
+            text_lower (str): Lowercased text to scan.
+            tokens (list): _WORD_RE tokens of `text_lower`, if already computed.
+        """
+        counts = dict.fromkeys(self.keywords, 0)
+        if self.forms:
+            token_counts = Counter(keyword_tokens(text_lower) if tokens is None else tokens)
+            for form, keywords in self.forms.items():
+                occurrences = token_counts.get(form)
+                if occurrences:
+                    for keyword in keywords:
+                        counts[keyword] += occurrences
+
+        for keyword, count in self.count_phrases(text_lower).items():
+            counts[keyword] += count
+
+        return counts
+
+    def count_phrases(self, text_lower):
+        """
+        Returns occurrence counts for the multi-word keywords only.
+        """
+        counts = {}
+        if self._phrase_re is not None:
+            for match in self._phrase_re.finditer(text_lower):
+                for keyword in self._phrases[" ".join(_WORD_RE.findall(match.group(1)))]:
+                    counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+@lru_cache(maxsize=64)
+def get_keyword_matcher(keywords):
+    """
+    Returns the compiled matcher for a tuple of keywords, building it on first use.
+    """
+    return KeywordMatcher(keywords)
 
 def calculate_keyword_density(text, keywords):
     """
     Calculates the density of specific keywords in the text.
+    Accepts a string or a TokenizedText.
     Returns a dictionary mapping keywords to their count per 1000 words.
     """
-    if not text:
-        return {k: 0 for k in keywords}
-
-    text_lower = text.lower()
-    words = text_lower.split()
-    total_words = len(words)
+    tokenized = tokenize_text(text)
+    total_words = len(tokenized.words)
     if total_words == 0:
         return {k: 0 for k in keywords}
 
-    density = {}
-    for keyword in keywords:
-        count = text_lower.count(keyword.lower())
-        density[keyword] = (count / total_words) * 1000
-
-    return density
+    counts = get_keyword_matcher(tuple(keywords)).count(tokenized.text_lower)
+    return {keyword: (count / total_words) * 1000 for keyword, count in counts.items()}
 
 def calculate_numerical_density(text):
     """
     Calculates the density of numerical figures in the text.
+    Accepts a string or a TokenizedText.
     Returns the count of numbers per 1000 words.
     """
-    if not text:
-        return 0
-
-    words = text.split()
+    words = tokenize_text(text).words
     total_words = len(words)
     if total_words == 0:
         return 0
@@ -61,40 +300,120 @@ def calculate_numerical_density(text):
     num_count = sum(1 for word in words if any(char.isdigit() for char in word))
     return (num_count / total_words) * 1000
 
-def analyze_report_content(report_data):
+# Top-level report sections that contribute narrative text, in the order
+# their text is concatenated for analysis.
+NARRATIVE_SECTIONS = ("overview", "corporateCreditRating", "sncfRegulatoryRating",
+                      "strengths", "weaknesses", "specialFocusAreas")
+
+def section_texts(key, value):
     """
-    Aggregates all quantitative metrics for a given report data dictionary.
-    Assumes report_data contains standard sections.
+    Returns the narrative text pieces contributed by one top-level section.
     """
-    # Combine relevant text sections for analysis
-    text_sections = []
-
-    if "overview" in report_data:
-        text_sections.append(report_data["overview"])
-    if "corporateCreditRating" in report_data and isinstance(report_data["corporateCreditRating"], dict):
-        text_sections.append(report_data["corporateCreditRating"].get("justification", ""))
-    if "sncfRegulatoryRating" in report_data and isinstance(report_data["sncfRegulatoryRating"], dict):
-        text_sections.append(report_data["sncfRegulatoryRating"].get("justification", ""))
+    if key == "overview":
+        return [value]
+    if key in ("corporateCreditRating", "sncfRegulatoryRating"):
+        return [value.get("justification", "")] if isinstance(value, dict) else []
+    if key in ("strengths", "weaknesses", "specialFocusAreas"):
+        return list(value) if isinstance(value, list) else []
+    return []
 
-    # Flatten lists (strengths, weaknesses, etc.)
-    for key in ["strengths", "weaknesses", "specialFocusAreas"]:
-        if key in report_data and isinstance(report_data[key], list):
-             text_sections.extend(report_data[key])
-
-    full_text = " ".join(text_sections)
+def build_report_text(report_data):
+    """
+    Concatenates the narrative sections of a report into a single string.
+    """
+    text_sections = []
+    for key in NARRATIVE_SECTIONS:
+        if key in report_data:
+            text_sections.extend(section_texts(key, report_data[key]))
+    return " ".join(text_sections)
 
-    sentiment = calculate_sentiment(full_text)
-    readability = calculate_readability(full_text)
+def _analyze_tokenized(tokenized):
+    sentiment = calculate_sentiment(tokenized)
+    readability = calculate_readability(tokenized)
 
-    risk_keywords = ["risk", "loss", "decline", "debt", "uncertainty", "challenge", "burn"]
-    keyword_density = calculate_keyword_density(full_text, risk_keywords)
+    keyword_density = calculate_keyword_density(tokenized, RISK_KEYWORDS)
 
-    numerical_density = calculate_numerical_density(full_text)
+    numerical_density = calculate_numerical_density(tokenized)
 
     return {
         "sentiment": sentiment,
         "readability": readability,
         "keyword_density": keyword_density,
         "numerical_density": numerical_density,
-        "full_text_length": len(full_text)
+        "full_text_length": len(tokenized.text)
     }
+
+def analyze_report_content(report_data):
+    """
+    Aggregates all quantitative metrics for a given report data dictionary.
+    Assumes report_data contains standard sections.
+    """
+    return _analyze_tokenized(TokenizedText(build_report_text(report_data)))
+
+class StreamingReportAnalyzer:
+    """
+    Runs analyze_report_content on a report that arrives one section at a
+    time, e.g. from llm_handler.generate_report_streaming.
+
+    Each section's text is tokenized as soon as the section arrives, so the
+    tokenization overlaps with generation and finish() only combines the
+    pieces and computes the metrics. The result is identical to
+    analyze_report_content on the complete report.
+    """
+
+    def __init__(self):
+        self._tokenized = {}
+
+    def add_section(self, key, value):
+        """Tokenizes one top-level section; non-narrative sections are ignored."""
+        if key in NARRATIVE_SECTIONS:
+            self._tokenized[key] = [TokenizedText(text) for text in section_texts(key, value)]
+
+    def finish(self, report_data):
+        """
+        Returns the analysis of the complete report. Sections that were not
+        passed to add_section are tokenized now.
+        """
+        parts = []
+        for key in NARRATIVE_SECTIONS:
+            if key not in report_data:
+                continue
+            if key not in self._tokenized:
+                self.add_section(key, report_data[key])
+            parts.extend(self._tokenized[key])
+        return _analyze_tokenized(TokenizedText.join(parts))
+
+def _init_analysis_worker():
+    """
+    Process pool initializer: loads the sentiment lexicon and readability
+    resources once per worker so no report pays that cost.
+    """
+    calculate_sentiment("Warm up the sentiment lexicon.")
+    calculate_readability("Warm up the readability resources.")
+
+def analyze_reports(reports, workers=None, chunksize=None):
+    """
+    Runs analyze_report_content over many reports on a process pool.
+
+    Args:
+        reports (list): Report data dictionaries.
+        workers (int): Number of worker processes. Defaults to the CPU count;
+            1 analyzes serially in the current process.
+        chunksize (int): Reports sent to a worker per task. Defaults to
+            splitting the batch into about four chunks per worker.
+
+    Returns:
+        list: Analysis results in the same order as `reports`.
+    """
+    reports = list(reports)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(reports))
+
+    if workers <= 1:
+        return [analyze_report_content(report) for report in reports]
+
+    if chunksize is None:
+        chunksize = max(1, len(reports) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_analysis_worker) as pool:
+        return list(pool.map(analyze_report_content, reports, chunksize=chunksize))
@@ -0,0 +1,187 @@
+# Corpus-level quantitative analysis over many reports at once.
+# Builds one sparse term-count matrix for the whole portfolio and derives the
+# per-report metrics from it as NumPy arrays, instead of looping the
+# single-report functions in analysis.py.
+import re
+import string
+from itertools import chain
+
+import numpy as np
+from scipy import sparse
+
+from credit_judge_v2.src.processing.analysis import build_report_text, get_keyword_matcher, keyword_tokens, RISK_KEYWORDS
+
+_PUNCTUATION = string.punctuation
+_DIGIT_RE = re.compile(r"\d")
+
+def build_term_matrix(texts):
+    """
+    Builds a sparse document-term count matrix for a list of texts.
+
+    Terms are lowercased whitespace tokens with surrounding punctuation
+    stripped, the same word forms analysis.TokenizedText produces. Tokens are
+    first counted as-is and punctuation is stripped once per distinct token,
+    folding variants such as "risk," and "risk" onto one column.
+
+    Args:
+        texts (list): Report texts.
+
+    Returns:
+        tuple: (matrix, vocabulary, word_counts) where `matrix` is an N x V
+        CSR matrix of term counts, `vocabulary` maps each term to its column
+        and `word_counts` holds each text's whitespace token count.
+    """
+    doc_tokens = [text.lower().split() for text in texts]
+    word_counts = np.fromiter(map(len, doc_tokens), dtype=np.int64, count=len(doc_tokens))
+    all_tokens = list(chain.from_iterable(doc_tokens))
+
+    raw_vocabulary = {token: i for i, token in enumerate(dict.fromkeys(all_tokens))}
+    indices = np.fromiter(map(raw_vocabulary.__getitem__, all_tokens), dtype=np.int64, count=len(all_tokens))
+    indptr = np.concatenate(([0], np.cumsum(word_counts)))
+    raw_matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(texts), len(raw_vocabulary))
+    )
+
+    vocabulary = {}
+    rows, cols = [], []
+    for token, column in raw_vocabulary.items():
+        word = token.strip(_PUNCTUATION)
+        if word:
+            rows.append(column)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    fold = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(raw_vocabulary), len(vocabulary))
+    )
+
+    matrix = (raw_matrix @ fold).tocsr()
+    return matrix, vocabulary, word_counts
+
+def _keyword_selector(vocabulary, matcher, keywords):
+    """
+    Returns a V x K sparse matrix that sums each keyword's occurrences,
+    including its simple plural forms. A term is a whitespace token, so it
+    is split into keyword tokens first: "risk/return" counts towards "risk".
+    """
+    keyword_index = {keyword: k for k, keyword in enumerate(keywords)}
+    rows, cols = [], []
+    for term, column in vocabulary.items():
+        for token in keyword_tokens(term):
+            for keyword in matcher.forms.get(token, ()):
+                rows.append(column)
+                cols.append(keyword_index[keyword])
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(vocabulary), len(keywords))
+    )
+
+def analyze_corpus(reports, keywords=RISK_KEYWORDS):
+    """
+    Computes keyword densities, numerical densities and lengths for many
+    reports in one pass.
+
+    Args:
+        reports (list): Report data dictionaries.
+        keywords (iterable): Keywords whose densities are computed.
+
+    Returns:
+        dict: Per-report arrays, aligned with `reports`:
+            - tickers, ratings: object arrays of tickerSymbol and rating.
+            - text_length, word_count: int arrays.
+            - numerical_density: numbers per 1000 words.
+            - keyword_density: N x K array of occurrences per 1000 words.
+            - keywords: the keyword order of keyword_density's columns.
+            - term_matrix, vocabulary: the underlying sparse counts.
+    """
+    keywords = tuple(keywords)
+    texts = [build_report_text(report) for report in reports]
+    matrix, vocabulary, word_counts = build_term_matrix(texts)
+
+    # Numbers: a term with a digit stays a number whatever punctuation was stripped.
+    has_digit = np.zeros(len(vocabulary), dtype=np.int32)
+    for term, column in vocabulary.items():
+        if _DIGIT_RE.search(term):
+            has_digit[column] = 1
+    numeric_counts = matrix @ has_digit
+
+    matcher = get_keyword_matcher(keywords)
+    keyword_counts = (matrix @ _keyword_selector(vocabulary, matcher, keywords)).toarray().astype(np.float64)
+    if matcher.phrase_first_words:
+        # Multi-word keywords need the running text, so only scan reports that
+        # contain the first word of at least one phrase.
+        keyword_index = {keyword: k for k, keyword in enumerate(keywords)}
+        first_word_columns = [
+            column for term, column in vocabulary.items()
+            if not matcher.phrase_first_words.isdisjoint(keyword_tokens(term))
+        ]
+        candidates = np.flatnonzero(matrix[:, first_word_columns].getnnz(axis=1)) if first_word_columns else []
+        for i in candidates:
+            for keyword, count in matcher.count_phrases(texts[i].lower()).items():
+                keyword_counts[i, keyword_index[keyword]] += count
+
+    per_thousand = np.divide(1000.0, word_counts, out=np.zeros(len(texts)), where=word_counts > 0)
+
+    return {
+        "tickers": np.array([report.get("tickerSymbol", "N/A") for report in reports], dtype=object),
+        "ratings": np.array([_get_rating(report) for report in reports], dtype=object),
+        "text_length": np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts)),
+        "word_count": word_counts,
+        "numerical_density": numeric_counts * per_thousand,
+        "keyword_density": keyword_counts * per_thousand[:, None],
+        "keywords": keywords,
+        "term_matrix": matrix,
+        "vocabulary": vocabulary
+    }
+
+def _get_rating(report):
+    rating_info = report.get("corporateCreditRating")
+    if isinstance(rating_info, dict) and rating_info.get("rating"):
+        return str(rating_info["rating"])
+    return "N/A"
+
+def summarize_by_rating(corpus):
+    """
+    Aggregates the per-report metrics of analyze_corpus by rating bucket.
+
+    Returns:
+        dict: rating -> {"count", "text_length", "word_count",
+        "numerical_density", "keyword_density"}, where each metric has its
+        mean and standard deviation (keyword_density per keyword).
+    """
+    buckets, inverse = np.unique(corpus["ratings"].astype(str), return_inverse=True)
+    buckets = buckets.tolist()
+    counts = np.bincount(inverse, minlength=len(buckets))
+
+    def mean_std(values):
+        sums = np.bincount(inverse, weights=values, minlength=len(buckets))
+        squares = np.bincount(inverse, weights=values * values, minlength=len(buckets))
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+        return means, stds
+
+    scalar_metrics = {
+        name: mean_std(corpus[name].astype(np.float64))
+        for name in ("text_length", "word_count", "numerical_density")
+    }
+
+    # Bucket sums for every keyword column at once: (B x N) one-hot @ (N x K).
+    one_hot = sparse.csr_matrix(
+        (np.ones(len(inverse)), (inverse, np.arange(len(inverse)))),
+        shape=(len(buckets), len(inverse))
+    )
+    density = corpus["keyword_density"]
+    keyword_means = (one_hot @ density) / counts[:, None]
+    keyword_stds = np.sqrt(np.maximum((one_hot @ (density * density)) / counts[:, None] - keyword_means ** 2, 0.0))
+
+    summary = {}
+    for b, rating in enumerate(buckets):
+        entry = {"count": int(counts[b])}
+        for name, (means, stds) in scalar_metrics.items():
+            entry[name] = {"mean": float(means[b]), "std": float(stds[b])}
+        entry["keyword_density"] = {
+            keyword: {"mean": float(keyword_means[b, k]), "std": float(keyword_stds[b, k])}
+            for k, keyword in enumerate(corpus["keywords"])
+        }
+        summary[rating] = entry
+    return summary
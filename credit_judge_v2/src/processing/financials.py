@@ -0,0 +1,267 @@
+# Typed financial figures from the financialPerformance section of AI reports.
+# Strings such as "96.8B", "1.2 Billion USD", "-50M", "0.1x" or "7.9%" are parsed
+# into floats with a unit, whole portfolios are laid out as NumPy columns, and
+# the stated figures are cross-checked with array operations.
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# One parsed figure. `unit` is "currency" (value in currency units, scale
+# applied), "multiple" (e.g. 5.6 for "5.6x"), "percent" (a fraction: 0.079 for
+# "7.9%") or "number" (no unit given).
+Figure = namedtuple("Figure", ["value", "unit"])
+
+_SCALES = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "mm": 1e6, "mn": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9,
+    "t": 1e12, "tn": 1e12, "trillion": 1e12,
+}
+
+# A number not embedded in a token like "Q3" or "FY2025E", with an optional
+# sign, currency marker and unit. "(50M)" is read as negative.
+_FIGURE_RE = re.compile(r"""
+    (?<![\w.])
+    (?P<open>\()?
+    (?P<sign>[-+−])?\s?
+    (?P<currency>\$|USD\s?)?
+    (?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)
+    \s?
+    (?P<suffix>trillion|billion|million|thousand|percent|times|bn|mm|mn|tn|[tbmkx%])?
+    (?![a-z0-9])
+    (?P<close>\))?
+""", re.IGNORECASE | re.VERBOSE)
+
+def _to_figure(match):
+    value = float(match.group("number").replace(",", ""))
+    if match.group("sign") in ("-", "−") or (match.group("open") and match.group("close")):
+        value = -value
+
+    suffix = (match.group("suffix") or "").lower()
+    if suffix in ("x", "times"):
+        unit = "multiple"
+    elif suffix in ("%", "percent"):
+        value, unit = value / 100.0, "percent"
+    elif suffix in _SCALES:
+        value, unit = value * _SCALES[suffix], "currency"
+    elif match.group("currency"):
+        unit = "currency"
+    else:
+        unit = "number"
+    return Figure(value, unit)
+
+def parse_figures(text):
+    """
+    Finds every figure in a string.
+
+    Args:
+        text (str): e.g. "Total Debt / TTM Adj. EBITDA approx. 5.6x".
+
+    Returns:
+        list: Figures in order of appearance.
+    """
+    return [_to_figure(match) for match in _FIGURE_RE.finditer(text)]
+
+@lru_cache(maxsize=65536)
+def _parse_value(text, unit):
+    for figure in parse_figures(text):
+        if unit is None or figure.unit == unit:
+            return figure
+    return None
+
+def parse_figure(value, unit=None):
+    """
+    Parses one field value.
+
+    Args:
+        value: A string, or a number which is taken as already in `unit`.
+        unit (str): If given, the first figure with this unit is returned, so
+            "TTM EBITDA of $250M, leverage approx. 5.6x" yields 5.6 for
+            "multiple" and 250e6 for "currency".
+
+    Returns:
+        Figure: The parsed figure, or None if there is none.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return Figure(float(value), unit or "number")
+    if not isinstance(value, str):
+        return None
+    return _parse_value(value, unit)
+
+# Portfolio columns: name -> (unit, candidate key paths into financialPerformance).
+# Reports come both flat ({"revenue": "96.8B"}) and nested
+# ({"revenue": {"amount": "1.2 Billion USD"}}); the first path holding a
+# scalar with a figure of the right unit wins.
+FINANCIAL_FIELDS = {
+    "revenue": ("currency", (("revenue",), ("revenue", "amount"))),
+    "revenue_growth": ("percent", (("revenue", "yearOverYearGrowth"), ("revenueGrowth",))),
+    "ebitda": ("currency", (("adjustedEBITDA",), ("adjustedEBITDA", "amount"), ("ebitda",), ("EBITDA",))),
+    "ebitda_margin": ("percent", (("adjustedEBITDA", "margin"), ("ebitdaMargin",))),
+    "net_income": ("currency", (("netIncome",), ("netIncome", "amount"))),
+    "free_cash_flow": ("currency", (("freeCashFlow",), ("freeCashFlow", "amount"))),
+    "net_debt": ("currency", (("netDebt",), ("leverage", "netDebt"))),
+    "total_debt": ("currency", (("totalDebt",), ("leverage", "totalDebt"))),
+    "cash": ("currency", (("cashAndEquivalents",), ("leverage", "cashAndEquivalents"))),
+    "leverage": ("multiple", (("leverage",), ("leverage", "debtToEbitda"), ("debtToEbitda",))),
+}
+
+# Columns extract_financials adds after FINANCIAL_FIELDS: the debt and EBITDA
+# the stated leverage multiple is computed from, so it is checked like for like.
+LEVERAGE_BASIS_FIELDS = ("leverage_debt", "leverage_ebitda")
+
+# "Total Debt / ..." or "gross debt": the multiple is on debt before cash.
+_GROSS_DEBT_RE = re.compile(r"\b(?:total|gross)\s+debt\b", re.IGNORECASE)
+# Text between "EBITDA" and a figure stated for it, as in "TTM Adj. EBITDA of approx. $250M".
+_STATED_EBITDA_RE = re.compile(r"\bEBITDA\b[^$\d(\-+−]{0,20}", re.IGNORECASE)
+# A period covering a single quarter, e.g. "Q3 2024" (but not "TTM as of Q3").
+_QUARTER_RE = re.compile(r"\bQ[1-4]\b|\bquarter", re.IGNORECASE)
+_TRAILING_RE = re.compile(r"\b(?:TTM|LTM|trailing|annual|FY)", re.IGNORECASE)
+
+def _lookup(node, path):
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+def _leverage_basis(financials, values):
+    """
+    Returns (debt, ebitda): the figures the stated leverage is computed from.
+
+    The debt is total debt if the leverage text says "total" or "gross"
+    debt, net debt otherwise. The EBITDA is the one stated next to the
+    multiple (usually trailing twelve months), else the reported EBITDA
+    unless it covers a single quarter. NaN where the basis is not stated.
+    """
+    text = ""
+    for path in FINANCIAL_FIELDS["leverage"][1]:
+        candidate = _lookup(financials, path)
+        if isinstance(candidate, str):
+            text = candidate
+            break
+
+    debt = values["total_debt"] if _GROSS_DEBT_RE.search(text) else values["net_debt"]
+
+    for match in _STATED_EBITDA_RE.finditer(text):
+        stated = _FIGURE_RE.match(text, match.end())
+        if stated:
+            figure = _to_figure(stated)
+            if figure.unit == "currency":
+                return debt, figure.value
+
+    period = _lookup(financials, ("adjustedEBITDA", "period")) or _lookup(financials, ("latestReportedPeriod",))
+    if isinstance(period, str) and _QUARTER_RE.search(period) and not _TRAILING_RE.search(period):
+        return debt, np.nan
+    return debt, values["ebitda"]
+
+def extract_financials(report_data):
+    """
+    Parses the FINANCIAL_FIELDS of one report, plus the
+    LEVERAGE_BASIS_FIELDS.
+
+    Returns:
+        dict: Column name -> float, NaN where the figure is missing.
+    """
+    financials = report_data.get("financialPerformance")
+    values = {}
+    for name, (unit, paths) in FINANCIAL_FIELDS.items():
+        values[name] = np.nan
+        for path in paths:
+            figure = parse_figure(_lookup(financials, path), unit)
+            if figure is not None:
+                values[name] = figure.value
+                break
+    values["leverage_debt"], values["leverage_ebitda"] = _leverage_basis(financials, values)
+    return values
+
+def financial_columns(reports):
+    """
+    Parses the financial figures of a portfolio into one array per field,
+    so cross-company screens are array operations, e.g.
+    `columns["tickers"][columns["leverage"] > 4]`.
+
+    Args:
+        reports (list): Report data dictionaries.
+
+    Returns:
+        dict: "tickers" (object array) and one float64 array per
+        FINANCIAL_FIELDS and LEVERAGE_BASIS_FIELDS entry, aligned with
+        `reports` (NaN if missing).
+    """
+    rows = [extract_financials(report) for report in reports]
+    columns = {"tickers": np.array([report.get("tickerSymbol", "N/A") for report in reports], dtype=object)}
+    for name in (*FINANCIAL_FIELDS, *LEVERAGE_BASIS_FIELDS):
+        columns[name] = np.fromiter((row[name] for row in rows), dtype=np.float64, count=len(rows))
+    return columns
+
+def _compare(stated, implied, rtol, atol):
+    checked = np.isfinite(stated) & np.isfinite(implied)
+    consistent = np.ones(len(stated), dtype=bool)
+    consistent[checked] = np.isclose(stated[checked], implied[checked], rtol=rtol, atol=atol)
+    return {"stated": stated, "implied": implied, "checked": checked, "consistent": consistent}
+
+def check_consistency(columns, tolerance=0.15):
+    """
+    Cross-checks stated figures against the ones they imply, for every
+    report at once:
+        - leverage: stated leverage against leverage_debt / leverage_ebitda.
+        - ebitda_margin: stated margin against ebitda / revenue.
+        - revenue_positive: revenue must be above zero.
+
+    Ratios are only implied where the denominator is positive. Leverage is
+    recomputed on the basis it states (see LEVERAGE_BASIS_FIELDS), so
+    "Total Debt / TTM EBITDA" is not compared with net debt over a
+    quarter's EBITDA; it is skipped when that basis is not in the report.
+
+    Args:
+        columns (dict): Output of financial_columns.
+        tolerance (float): Relative tolerance of the comparisons.
+
+    Returns:
+        dict: Check name -> {"stated", "implied", "checked", "consistent"}
+        arrays; `consistent` is True where the check passed or could not be
+        made (`checked` is False).
+    """
+    revenue, ebitda = columns["revenue"], columns["ebitda"]
+    leverage_ebitda = columns["leverage_ebitda"]
+    implied_leverage = np.full(len(revenue), np.nan)
+    np.divide(columns["leverage_debt"], leverage_ebitda, out=implied_leverage, where=leverage_ebitda > 0)
+    implied_margin = np.full(len(revenue), np.nan)
+    np.divide(ebitda, revenue, out=implied_margin, where=revenue > 0)
+
+    revenue_checked = np.isfinite(revenue)
+    return {
+        "leverage": _compare(columns["leverage"], implied_leverage, tolerance, atol=0.5),
+        "ebitda_margin": _compare(columns["ebitda_margin"], implied_margin, tolerance, atol=0.01),
+        "revenue_positive": {
+            "stated": revenue,
+            "implied": np.full(len(revenue), np.nan),
+            "checked": revenue_checked,
+            "consistent": ~revenue_checked | (revenue > 0)
+        }
+    }
+
+def find_inconsistencies(columns, checks=None):
+    """
+    Lists the failed checks, e.g. for a batch summary.
+
+    Returns:
+        list: {"ticker", "check", "stated", "implied"} dicts (implied is
+        None for checks without one), ordered by check then report.
+    """
+    checks = checks if checks is not None else check_consistency(columns)
+    found = []
+    for name, check in checks.items():
+        for i in np.flatnonzero(check["checked"] & ~check["consistent"]):
+            implied = check["implied"][i]
+            found.append({
+                "ticker": columns["tickers"][i],
+                "check": name,
+                "stated": float(check["stated"][i]),
+                "implied": round(float(implied), 4) if np.isfinite(implied) else None
+            })
+    return found
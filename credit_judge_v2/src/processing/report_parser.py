@@ -1,12 +1,16 @@
 # Utility functions for parsing and loading credit reports.
 import json
 
-def load_ai_report_from_json(filepath):
+from credit_judge_v2.src.processing.schema import REPORT_VALIDATOR
+
+def load_ai_report_from_json(filepath, validate=True):
     """
     Loads a structured AI-generated report from a JSON file.
 
     Args:
         filepath (str): The path to the JSON file.
+        validate (bool): Check the report against REPORT_SCHEMA and reject
+            it, printing each invalid field, if it does not conform.
 
     Returns:
         dict: The loaded report data as a dictionary, or None if an error occurs.
@@ -14,6 +18,13 @@ def load_ai_report_from_json(filepath):
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             report_data = json.load(f)
+        if validate:
+            errors = REPORT_VALIDATOR.validate(report_data)
+            if errors:
+                print(f"Error: Report at {filepath} does not match the report schema:")
+                for error in errors:
+                    print(f"  - {error.path}: {error.message}")
+                return None
         return report_data
     except FileNotFoundError:
         print(f"Error: Report file not found at {filepath}")
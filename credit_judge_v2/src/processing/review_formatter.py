@@ -1,5 +1,16 @@
 # Functions to format the AI's output into a structured, comparable format.
 
+# Mapping from review sectionName to keys in the AI report JSON
+SECTION_TO_AI_KEY_MAP = {
+    "Overview": "overview",
+    "Corporate Credit Rating": "corporateCreditRating",
+    "Financial Performance": "financialPerformance",
+    "SNCF Regulatory Rating": "sncfRegulatoryRating",
+    "Strengths": "strengths",
+    "Weaknesses": "weaknesses",
+    "Special Focus Areas": "specialFocusAreas"
+}
+
 def format_ai_output_for_review(ai_report_data):
     """
     Formats the raw AI report dictionary into a more structured format
@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+# Schemas use a small subset of JSON Schema: "type" (a name or a list of
+# names), "properties", "required", "items", "enum", "minLength" and
+# "minItems". They are compiled once into nested checks by compile_schema.
+
+_TEXT = {"type": "string", "minLength": 1}
+_TEXT_LIST = {"type": "array", "items": _TEXT, "minItems": 1}
+# Review scores are numbers, but reviewers also write "N/A" or "High".
+_SCORE = {"type": ["number", "string"]}
+
+REPORT_SCHEMA = {
+    "type": "object",
+    "required": ["companyName", "tickerSymbol", "overview", "corporateCreditRating", "financialPerformance",
+                 "sncfRegulatoryRating", "strengths", "weaknesses", "specialFocusAreas"],
+    "properties": {
+        "reportTitle": {"type": "string"},
+        "assessmentDate": {"type": "string"},
+        "companyName": _TEXT,
+        "tickerSymbol": _TEXT,
+        "overview": _TEXT,
+        "corporateCreditRating": {
+            "type": "object",
+            "required": ["rating", "outlook", "justification"],
+            "properties": {"rating": _TEXT, "outlook": _TEXT, "justification": _TEXT}
+        },
+        # Metrics are free-form: "96.8B", 5.6 or a nested breakdown.
+        "financialPerformance": {"type": "object"},
+        "sncfRegulatoryRating": {
+            "type": "object",
+            "required": ["indicativeRating", "justification"],
+            "properties": {"indicativeRating": _TEXT, "justification": _TEXT}
+        },
+        "strengths": _TEXT_LIST,
+        "weaknesses": _TEXT_LIST,
+        "specialFocusAreas": _TEXT_LIST,
+    }
+}
+
+GOLD_STANDARD_SCHEMA = {
+    "type": "object",
+    "required": ["reviewedReportId", "reviewerName", "overallAssessment", "sectionReviews"],
+    "properties": {
+        "reviewedReportId": _TEXT,
+        "reviewerName": _TEXT,
+        "reviewDate": {"type": "string"},
+        "overallAssessment": {
+            "type": "object",
+            "required": ["overallScore", "ratingConcurrence"],
+            "properties": {"comments": {"type": "string"}, "overallScore": _SCORE, "ratingConcurrence": _TEXT}
+        },
+        "sectionReviews": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["sectionName", "quantitativeScore"],
+                "properties": {
+                    "sectionName": _TEXT,
+                    "qualitativeFeedback": {"type": "string"},
+                    "quantitativeScore": _SCORE,
+                    "dataAccuracy": _SCORE,
+                    "completeness": _SCORE,
+                    "analyticalDepth": _SCORE,
+                }
+            }
+        }
+    }
+}
+
+# One validation failure: `path` locates the field, e.g.
+# "corporateCreditRating.justification" or "strengths[2]".
+FieldError = namedtuple("FieldError", ["path", "message"])
+
+_TYPES = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+class SchemaValidationError(ValueError):
+    """Raised by Validator.check; `errors` holds the FieldErrors."""
+
+    def __init__(self, name, errors):
+        self.errors = errors
+        super().__init__(f"{name} failed validation: " + "; ".join(f"{e.path}: {e.message}" for e in errors))
+
+def _join(path, key):
+    return f"{path}.{key}" if path else key
+
+def _compile_node(node):
+    """
+    Compiles one schema node into check(value, path, errors), which appends
+    FieldErrors for `value` and returns nothing.
+    """
+    type_names = node.get("type")
+    if isinstance(type_names, str):
+        type_names = [type_names]
+    python_types = tuple(t for name in (type_names or ()) for t in _TYPES[name])
+    # bool is an int subclass but never a valid number.
+    reject_bool = bool(type_names) and "boolean" not in type_names
+    type_label = " or ".join(type_names or ())
+
+    checks = []
+
+    enum = node.get("enum")
+    if enum is not None:
+        allowed = frozenset(enum)
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(FieldError(path, f"must be one of {sorted(allowed)}, got {value!r}"))
+        checks.append(check_enum)
+
+    min_length = node.get("minLength")
+    if min_length:
+        def check_length(value, path, errors):
+            if isinstance(value, str) and len(value.strip()) < min_length:
+                errors.append(FieldError(path, "must not be empty" if min_length == 1 else f"must have at least {min_length} characters"))
+        checks.append(check_length)
+
+    if "properties" in node or "required" in node:
+        required = tuple(node.get("required", ()))
+        properties = tuple((key, _compile_node(child)) for key, child in node.get("properties", {}).items())
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for key in required:
+                if key not in value:
+                    errors.append(FieldError(_join(path, key), "is required"))
+            for key, check in properties:
+                if key in value:
+                    check(value[key], f"{path}.{key}" if path else key, errors)
+        checks.append(check_object)
+
+    min_items = node.get("minItems")
+    item_check = _compile_node(node["items"]) if "items" in node else None
+    if min_items or item_check:
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items and len(value) < min_items:
+                errors.append(FieldError(path, f"must have at least {min_items} item(s)"))
+            if item_check is not None:
+                for i, item in enumerate(value):
+                    item_check(item, f"{path}[{i}]", errors)
+        checks.append(check_array)
+
+    def check(value, path, errors):
+        if python_types and (not isinstance(value, python_types) or (reject_bool and value.__class__ is bool)):
+            errors.append(FieldError(path or "<root>", f"must be {type_label}, got {type(value).__name__}"))
+            return
+        for sub_check in checks:
+            sub_check(value, path, errors)
+
+    return check
+
+class Validator:
+    """
+    A schema compiled once into nested checks, so validating a record only
+    runs the checks that apply and never re-reads the schema.
+
+    Args:
+        schema (dict): e.g. REPORT_SCHEMA or GOLD_STANDARD_SCHEMA.
+        name (str): Used in error messages.
+    """
+
+    def __init__(self, schema, name="record"):
+        self.schema = schema
+        self.name = name
+        self._check = _compile_node(schema)
+
+    def validate(self, record):
+        """
+        Returns:
+            list: FieldErrors for `record`; empty if it is valid.
+        """
+        errors = []
+        self._check(record, "", errors)
+        return errors
+
+    def is_valid(self, record):
+        return not self.validate(record)
+
+    def check(self, record):
+        """
+        Returns `record` if it is valid.
+
+        Raises:
+            SchemaValidationError: Listing every invalid field.
+        """
+        errors = self.validate(record)
+        if errors:
+            raise SchemaValidationError(self.name, errors)
+        return record
+
+    def validate_many(self, records):
+        """
+        Validates a batch of records.
+
+        Returns:
+            dict: Index -> FieldErrors for every invalid record.
+        """
+        check = self._check
+        invalid = {}
+        for i, record in enumerate(records):
+            errors = []
+            check(record, "", errors)
+            if errors:
+                invalid[i] = errors
+        return invalid
+
+def compile_schema(schema, name="record"):
+    """
+    Compiles a schema into a Validator.
+    """
+    return Validator(schema, name)
+
+REPORT_VALIDATOR = compile_schema(REPORT_SCHEMA, "AI report")
+GOLD_STANDARD_VALIDATOR = compile_schema(GOLD_STANDARD_SCHEMA, "Gold standard review")
+
+def format_errors(errors, limit=5):
+    """
+    Renders FieldErrors as one line, e.g. for a batch summary.
+    """
+    text = "; ".join(f"{error.path}: {error.message}" for error in errors[:limit])
+    if len(errors) > limit:
+        text += f"; ... ({len(errors) - limit} more)"
+    return text
+
+class Quarantine:
+    """
+    Appends invalid records to a JSONL file instead of failing the batch.
+
+    Each line holds the caller's context (e.g. company, ticker and
+    gold_standard), the field errors and the rejected record. With that
+    context, the quarantine file can be passed back as a batch manifest to
+    regenerate only the rejected companies. Safe to share between threads.
+
+    Args:
+        path (str): The JSONL file. Created on the first quarantined record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, record, errors, **context):
+        line = dict(context)
+        line["errors"] = [{"path": error.path, "message": error.message} for error in errors]
+        line["record"] = record
+        data = json.dumps(line, default=str) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+            self.count += 1
@@ -0,0 +1,313 @@
+# Offline semantic similarity between AI report sections and reference texts
+# (gold standard reviewer feedback or human-written reports).
+# Texts are embedded with a local hashed n-gram embedder, vectors are cached on
+# disk by text hash, and whole corpora are scored with batched matrix products.
+import os
+import re
+import math
+import sqlite3
+import hashlib
+import threading
+import zlib
+
+import numpy as np
+
+from credit_judge_v2.src.processing.review_formatter import SECTION_TO_AI_KEY_MAP
+
+DEFAULT_EMBEDDING_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".cache", "embeddings.sqlite3"
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+_STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "their", "this", "to", "was", "were", "which", "with",
+))
+
+class HashedEmbedder:
+    """
+    Embeds texts as hashed bags of word n-grams (the "hashing trick").
+
+    No vocabulary or model is needed, so embeddings are deterministic and
+    computed locally. Each n-gram is hashed to one of `dim` buckets, term
+    counts are damped with 1 + log(tf), and vectors are L2-normalized so a
+    dot product is the cosine similarity, which lies in [0, 1].
+
+    Args:
+        dim (int): Embedding dimension.
+        ngram_range (tuple): Smallest and largest word n-gram length.
+    """
+
+    def __init__(self, dim=2048, ngram_range=(1, 2)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    @property
+    def identity(self):
+        """Identifies the embedding function; part of every cache key."""
+        return f"hashed-ngrams:v2:{self.dim}:{self.ngram_range[0]}-{self.ngram_range[1]}"
+
+    def _features(self, text):
+        tokens = [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                yield " ".join(tokens[i:i + n])
+
+    def embed(self, texts):
+        """
+        Returns:
+            numpy.ndarray: A float32 array of shape (len(texts), dim) with
+            unit-length rows (all-zero rows for texts without words).
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self._features(text):
+                column = zlib.crc32(feature.encode("utf-8")) % self.dim
+                counts[column] = counts.get(column, 0) + 1
+            for column, count in counts.items():
+                vectors[row, column] = 1.0 + math.log(count)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+def make_embedding_key(identity, text):
+    """
+    Returns a stable SHA-256 hex digest for a text under one embedder.
+    """
+    return hashlib.sha256(f"{identity}\0{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of embedding vectors keyed by make_embedding_key.
+
+    Embeddings are a pure function of the text and the embedder, so entries
+    never expire; changing the embedder changes every key.
+
+    Args:
+        path (str): Location of the SQLite database file.
+    """
+
+    # SQLite's default limit on host parameters in one statement is 999.
+    _BATCH_SIZE = 500
+
+    def __init__(self, path=DEFAULT_EMBEDDING_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def get_many(self, keys):
+        """
+        Returns:
+            dict: key -> float32 vector for every key found.
+        """
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for start in range(0, len(keys), self._BATCH_SIZE):
+                batch = keys[start:start + self._BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, vectors):
+        """
+        Stores a dict of key -> vector in one transaction.
+        """
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def stats(self):
+        """Returns hit/miss counters and the current number of entries."""
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_default_embedder = HashedEmbedder()
+_embedding_cache = None
+
+def get_embedding_cache():
+    """
+    Returns the process-wide embedding cache, or None if disabled via
+    EMBEDDING_CACHE_DISABLED. The location can be overridden with
+    EMBEDDING_CACHE_PATH.
+    """
+    global _embedding_cache
+    if os.getenv("EMBEDDING_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_EMBEDDING_CACHE_PATH))
+    return _embedding_cache
+
+def embed_texts(texts, embedder=None, cache=None):
+    """
+    Embeds texts, reusing cached vectors. Duplicate texts are embedded once
+    and all cache misses are embedded in a single batch.
+
+    Args:
+        texts (list): Texts to embed.
+        embedder: Any object with `identity` and `embed(texts)`; defaults
+            to a shared HashedEmbedder.
+        cache (EmbeddingCache): Optional vector cache.
+
+    Returns:
+        numpy.ndarray: One row per input text.
+    """
+    embedder = embedder or _default_embedder
+    unique_texts = list(dict.fromkeys(texts))
+    keys = [make_embedding_key(embedder.identity, text) for text in unique_texts]
+
+    cached = cache.get_many(keys) if cache is not None else {}
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        new_vectors = embedder.embed([unique_texts[i] for i in missing])
+        computed = {keys[i]: vector for i, vector in zip(missing, new_vectors)}
+        if cache is not None:
+            cache.set_many(computed)
+        cached.update(computed)
+
+    rows = {text: cached[key] for text, key in zip(unique_texts, keys)}
+    if not texts:
+        return np.zeros((0, getattr(embedder, "dim", 0)), dtype=np.float32)
+    return np.vstack([rows[text] for text in texts])
+
+def cross_similarity(a, b):
+    """
+    Cosine similarity of every row of `a` with every row of `b`, as one
+    matrix product. Rows must be unit length (as embed_texts returns).
+    """
+    return a @ b.T
+
+def paired_similarity(a, b):
+    """
+    Cosine similarity of each row of `a` with the same row of `b`.
+    """
+    return np.einsum("ij,ij->i", a, b)
+
+def section_text(content):
+    """
+    Flattens one AI report section to plain text: strings as-is, list
+    items and dict values (recursively) joined with newlines.
+    """
+    if content is None:
+        return ""
+    if isinstance(content, dict):
+        return "\n".join(section_text(value) for value in content.values())
+    if isinstance(content, list):
+        return "\n".join(section_text(item) for item in content)
+    return str(content)
+
+def _section_pairs(ai_report, gold_standard):
+    """
+    Returns (section_name, ai_text, feedback_text) for each reviewed section.
+    """
+    pairs = []
+    for review in gold_standard.get("sectionReviews", []):
+        section_name = review.get("sectionName")
+        ai_key = SECTION_TO_AI_KEY_MAP.get(section_name)
+        ai_text = section_text(ai_report.get(ai_key)) if ai_key else ""
+        pairs.append((section_name, ai_text, review.get("qualitativeFeedback") or ""))
+    return pairs
+
+def score_sections(ai_report, gold_standard, embedder=None, cache=None):
+    """
+    Scores how closely each AI report section matches the reviewer's
+    feedback on it.
+
+    Returns:
+        dict: sectionName -> cosine similarity in [0, 1], or None if either
+        side has no text.
+    """
+    pairs = _section_pairs(ai_report, gold_standard)
+    if not pairs:
+        return {}
+    vectors = embed_texts([p[1] for p in pairs] + [p[2] for p in pairs], embedder, cache)
+    similarities = paired_similarity(vectors[:len(pairs)], vectors[len(pairs):])
+    return {
+        section_name: (round(float(similarity), 4) if ai_text.strip() and feedback.strip() else None)
+        for (section_name, ai_text, feedback), similarity in zip(pairs, similarities)
+    }
+
+def score_corpus(pairs, section_names=None, embedder=None, cache=None):
+    """
+    Scores many (ai_report, reference) pairs at once. Every text in the
+    corpus is embedded in one call and all similarities come from one
+    batched row-wise product.
+
+    Args:
+        pairs (list): (ai_report, gold_standard) tuples.
+        section_names (list): Sections to score. Defaults to every section
+            in SECTION_TO_AI_KEY_MAP.
+
+    Returns:
+        tuple: (scores, section_names) where `scores` is a float array of
+        shape (len(pairs), len(section_names)); NaN where a section is not
+        reviewed or has no text.
+    """
+    section_names = list(section_names or SECTION_TO_AI_KEY_MAP)
+    column = {name: i for i, name in enumerate(section_names)}
+    positions, ai_texts, reference_texts = [], [], []
+    for row, (ai_report, gold_standard) in enumerate(pairs):
+        for section_name, ai_text, feedback in _section_pairs(ai_report, gold_standard):
+            if section_name in column and ai_text.strip() and feedback.strip():
+                positions.append((row, column[section_name]))
+                ai_texts.append(ai_text)
+                reference_texts.append(feedback)
+
+    scores = np.full((len(pairs), len(section_names)), np.nan)
+    if positions:
+        vectors = embed_texts(ai_texts + reference_texts, embedder, cache)
+        rows, columns = np.array(positions).T
+        scores[rows, columns] = paired_similarity(vectors[:len(ai_texts)], vectors[len(ai_texts):])
+    return scores, section_names
+
+def rank_by_similarity(query_texts, corpus_texts, k=10, embedder=None, cache=None):
+    """
+    Finds the `k` corpus texts most similar to each query text, e.g. the
+    human reports closest to each AI report.
+
+    Returns:
+        tuple: (indices, scores), each of shape (len(query_texts), k'),
+        where k' = min(k, len(corpus_texts)); best match first.
+    """
+    vectors = embed_texts(list(query_texts) + list(corpus_texts), embedder, cache)
+    similarities = cross_similarity(vectors[:len(query_texts)], vectors[len(query_texts):])
+    k = min(k, similarities.shape[1])
+    if k == 0:
+        empty = np.zeros((len(query_texts), 0))
+        return empty.astype(np.int64), empty
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
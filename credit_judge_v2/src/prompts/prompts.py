@@ -1,5 +1,7 @@
 # This file contains the prompt templates for the Credit Judge v2 system.
 
+import string
+
 # This is a simplified version of the prompt for generating a corporate credit rating report.
 # In a real application, this would be much more detailed and might include few-shot examples.
 REPORT_GENERATION_PROMPT = """
@@ -27,11 +29,48 @@ The report should be well-researched, accurate, and professionally written.
 The output must be a single, valid JSON object.
 """
 
+def compile_format_template(template):
+    """
+    Parses a str.format-style template once into static text and field names.
+
+    Returns:
+        tuple: (static_parts, field_names) with len(static_parts) ==
+        len(field_names) + 1. Format specs and conversions are not supported.
+    """
+    static_parts = [""]
+    field_names = []
+    for literal_text, field_name, format_spec, conversion in string.Formatter().parse(template):
+        static_parts[-1] += literal_text
+        if field_name is None:
+            continue
+        if format_spec or conversion or not field_name.isidentifier():
+            raise ValueError(f"Unsupported template field: {{{field_name}}}")
+        field_names.append(field_name)
+        static_parts.append("")
+    return tuple(static_parts), tuple(field_names)
+
+def render_format_template(compiled, **values):
+    """
+    Renders a template compiled by compile_format_template in a single join.
+    """
+    static_parts, field_names = compiled
+    parts = [None] * (len(static_parts) + len(field_names))
+    parts[0::2] = static_parts
+    parts[1::2] = [str(values[name]) for name in field_names]
+    return "".join(parts)
+
+_REPORT_GENERATION_COMPILED = compile_format_template(REPORT_GENERATION_PROMPT)
+
+# The text shared by every report generation prompt, before the first
+# company-specific field. Useful for provider-side prompt-prefix caching.
+REPORT_GENERATION_STATIC_PREFIX = _REPORT_GENERATION_COMPILED[0][0]
+
 def get_report_generation_prompt(company_name, ticker_symbol):
     """
     Formats the main report generation prompt with the given company details.
     """
-    return REPORT_GENERATION_PROMPT.format(
+    return render_format_template(
+        _REPORT_GENERATION_COMPILED,
         company_name=company_name,
         ticker_symbol=ticker_symbol
     )
@@ -1,106 +1,225 @@
 import os
+import re
+import json
+import shutil
 from datetime import datetime
+from functools import lru_cache
+from html import escape
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_template.html")
+
+_PLACEHOLDER_RE = re.compile(r"{{\s*(\w+)\s*}}")
+
+# Placeholders whose values are HTML fragments built (and escaped) here.
+_RAW_FIELDS = frozenset(("keyword_badges", "comparison_rows"))
+
+@lru_cache(maxsize=None)
+def load_template(template_path=TEMPLATE_PATH):
+    """
+    Reads a template once per process and compiles it into segments.
+
+    Returns:
+        tuple: Alternating static text and placeholder names; even positions
+        are static text, odd positions are placeholder names.
+    """
+    with open(template_path, 'r') as f:
+        return tuple(_PLACEHOLDER_RE.split(f.read()))
+
+def render_template(segments, values):
+    """
+    Renders compiled template segments in a single join. Values are
+    HTML-escaped unless the placeholder is in _RAW_FIELDS; unknown
+    placeholders render as empty strings.
+    """
+    parts = list(segments)
+    for i in range(1, len(parts), 2):
+        name = parts[i]
+        value = values.get(name, "")
+        parts[i] = value if name in _RAW_FIELDS else escape(str(value))
+    return "".join(parts)
+
+def _build_keyword_badges(keyword_density):
+    return "".join(
+        f'<span class="bg-red-100 text-red-800 text-xs font-medium mr-2 px-2.5 py-0.5 rounded">{escape(kw)}: {density:.1f}</span>'
+        for kw, density in keyword_density.items() if density > 0
+    )
+
+def _build_comparison_rows(section_reviews):
+    return "".join(
+        f"""
+        <tr class="border-b hover:bg-gray-50">
+            <td class="p-3 font-medium">{escape(str(section.get("sectionName", "N/A")))}</td>
+            <td class="p-3 text-gray-600">{escape(str(section.get("qualitativeFeedback", "N/A")))}</td>
+            <td class="p-3 font-bold text-center bg-gray-100">{escape(str(section.get("quantitativeScore", "N/A")))}</td>
+        </tr>
+        """
+        for section in section_reviews
+    )
+
+def render_html_report(ai_report, analysis_results, gold_standard, template_path=TEMPLATE_PATH):
+    """
+    Renders the HTML report for one company and returns it as a string.
+    """
+    segments = load_template(template_path)
+
+    # Executive Summary
+    rating_info = ai_report.get("corporateCreditRating", {})
+    sncf_info = ai_report.get("sncfRegulatoryRating", {})
+
+    # Qualitative Comparison
+    overall_assessment = gold_standard.get("overallAssessment", {})
+
+    values = {
+        # Basic Info
+        "company_name": ai_report.get("companyName", "N/A"),
+        "ticker_symbol": ai_report.get("tickerSymbol", "N/A"),
+        "generation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "rating": rating_info.get("rating", "N/A"),
+        "outlook": rating_info.get("outlook", "N/A"),
+        "rating_justification": rating_info.get("justification", "N/A"),
+        "sncf_rating": sncf_info.get("indicativeRating", "N/A"),
+        "sncf_justification": sncf_info.get("justification", "N/A"),
+        "overview": ai_report.get("overview", "N/A"),
+        # Quantitative Metrics
+        "sentiment_polarity": f"{analysis_results['sentiment']['polarity']:.2f}",
+        "sentiment_subjectivity": f"{analysis_results['sentiment']['subjectivity']:.2f}",
+        "readability_score": f"{analysis_results['readability']:.2f}",
+        "numerical_density": f"{analysis_results['numerical_density']:.2f}",
+        "text_length": str(analysis_results['full_text_length']),
+        "keyword_badges": _build_keyword_badges(analysis_results['keyword_density']),
+        "reviewer_comments": overall_assessment.get("comments", "N/A"),
+        "overall_score": str(overall_assessment.get("overallScore", "N/A")),
+        "concurrence": overall_assessment.get("ratingConcurrence", "N/A"),
+        "comparison_rows": _build_comparison_rows(gold_standard.get("sectionReviews", []))
+    }
+
+    return render_template(segments, values)
 
 def generate_html_report(ai_report, analysis_results, gold_standard, output_path="credit_judge_v2/output/report.html"):
     """
     Generates an HTML report by filling in the template with data.
     """
 
-    # 1. Load Template
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    template_path = os.path.join(script_dir, "report_template.html")
-
+    # 1. Render (the template is loaded and compiled once per process)
     try:
-        with open(template_path, 'r') as f:
-            template = f.read()
+        html_content = render_html_report(ai_report, analysis_results, gold_standard)
     except FileNotFoundError:
-        print(f"Error: Template not found at {template_path}")
+        print(f"Error: Template not found at {TEMPLATE_PATH}")
         return
 
-    # 2. Prepare Data for Replacement
+    # 2. Save File
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
 
-    # Basic Info
-    company_name = ai_report.get("companyName", "N/A")
-    ticker_symbol = ai_report.get("tickerSymbol", "N/A")
-    generation_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(output_path, 'w') as f:
+        f.write(html_content)
 
-    # Executive Summary
-    rating_info = ai_report.get("corporateCreditRating", {})
-    rating = rating_info.get("rating", "N/A")
-    outlook = rating_info.get("outlook", "N/A")
-    rating_justification = rating_info.get("justification", "N/A")
+    print(f"\nHTML Report successfully generated at: {output_path}")
 
-    sncf_info = ai_report.get("sncfRegulatoryRating", {})
-    sncf_rating = sncf_info.get("indicativeRating", "N/A")
-    sncf_justification = sncf_info.get("justification", "N/A")
+# --- Portfolio Dashboard ---
 
-    overview = ai_report.get("overview", "N/A")
+PORTFOLIO_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "portfolio_template.html")
 
-    # Quantitative Metrics
-    sentiment_polarity = f"{analysis_results['sentiment']['polarity']:.2f}"
-    sentiment_subjectivity = f"{analysis_results['sentiment']['subjectivity']:.2f}"
-    readability_score = f"{analysis_results['readability']:.2f}"
-    numerical_density = f"{analysis_results['numerical_density']:.2f}"
-    text_length = str(analysis_results['full_text_length'])
+# S&P long-term scale, strongest first, used to sort the dashboard by rating.
+_RATING_SCALE = (
+    "AAA", "AA+", "AA", "AA-", "A+", "A", "A-", "BBB+", "BBB", "BBB-",
+    "BB+", "BB", "BB-", "B+", "B", "B-", "CCC+", "CCC", "CCC-", "CC", "C", "D"
+)
+_RATING_RANK = {rating: rank for rank, rating in enumerate(_RATING_SCALE)}
 
-    keyword_badges = ""
-    for kw, density in analysis_results['keyword_density'].items():
-        if density > 0:
-            keyword_badges += f'<span class="bg-red-100 text-red-800 text-xs font-medium mr-2 px-2.5 py-0.5 rounded">{kw}: {density:.1f}</span>'
+def build_portfolio_entry(ai_report, analysis_results, gold_standard):
+    """
+    Extracts what the portfolio dashboard needs for one company.
 
-    # Qualitative Comparison
-    reviewer_comments = gold_standard.get("overallAssessment", {}).get("comments", "N/A")
-    overall_score = str(gold_standard.get("overallAssessment", {}).get("overallScore", "N/A"))
-    concurrence = gold_standard.get("overallAssessment", {}).get("ratingConcurrence", "N/A")
+    Returns:
+        dict: Summary fields (sortable columns) and detail fields (rendered
+        only when the company is selected on the dashboard).
+    """
+    rating_info = ai_report.get("corporateCreditRating", {})
+    sncf_info = ai_report.get("sncfRegulatoryRating", {})
+    overall_assessment = gold_standard.get("overallAssessment", {})
+    rating = rating_info.get("rating", "N/A")
+    keyword_density = analysis_results['keyword_density']
+
+    return {
+        "company": ai_report.get("companyName", "N/A"),
+        "ticker": ai_report.get("tickerSymbol", "N/A"),
+        "rating": rating,
+        "ratingRank": _RATING_RANK.get(str(rating).strip().upper()),
+        "outlook": rating_info.get("outlook", "N/A"),
+        "overallScore": overall_assessment.get("overallScore"),
+        "concurrence": overall_assessment.get("ratingConcurrence", "N/A"),
+        "riskDensity": round(sum(keyword_density.values()), 2),
+        "keywordDensity": keyword_density,
+        "ratingJustification": rating_info.get("justification", "N/A"),
+        "sncfRating": sncf_info.get("indicativeRating", "N/A"),
+        "sncfJustification": sncf_info.get("justification", "N/A"),
+        "overview": ai_report.get("overview", "N/A"),
+        "metrics": [
+            round(analysis_results['sentiment']['polarity'], 4),
+            round(analysis_results['sentiment']['subjectivity'], 4),
+            analysis_results['readability'],
+            round(analysis_results['numerical_density'], 2),
+            analysis_results['full_text_length']
+        ],
+        "reviewerComments": overall_assessment.get("comments", "N/A"),
+        "sectionReviews": [
+            [section.get("sectionName", "N/A"), section.get("qualitativeFeedback", "N/A"), section.get("quantitativeScore", "N/A")]
+            for section in gold_standard.get("sectionReviews", [])
+        ]
+    }
 
-    comparison_rows = ""
-    for section in gold_standard.get("sectionReviews", []):
-        name = section.get("sectionName", "N/A")
-        feedback = section.get("qualitativeFeedback", "N/A")
-        score = section.get("quantitativeScore", "N/A")
+_SUMMARY_FIELDS = ("company", "ticker", "rating", "ratingRank", "outlook", "overallScore", "concurrence", "riskDensity")
+_DETAIL_FIELDS = ("ratingJustification", "sncfRating", "sncfJustification", "overview", "metrics", "reviewerComments", "sectionReviews")
 
-        row = f"""
-        <tr class="border-b hover:bg-gray-50">
-            <td class="p-3 font-medium">{name}</td>
-            <td class="p-3 text-gray-600">{feedback}</td>
-            <td class="p-3 font-bold text-center bg-gray-100">{score}</td>
-        </tr>
-        """
-        comparison_rows += row
-
-    # 3. Replace Placeholders
-    html_content = template
-    replacements = {
-        "{{ company_name }}": company_name,
-        "{{ ticker_symbol }}": ticker_symbol,
-        "{{ generation_date }}": generation_date,
-        "{{ rating }}": rating,
-        "{{ outlook }}": outlook,
-        "{{ rating_justification }}": rating_justification,
-        "{{ sncf_rating }}": sncf_rating,
-        "{{ sncf_justification }}": sncf_justification,
-        "{{ overview }}": overview,
-        "{{ sentiment_polarity }}": sentiment_polarity,
-        "{{ sentiment_subjectivity }}": sentiment_subjectivity,
-        "{{ readability_score }}": readability_score,
-        "{{ numerical_density }}": numerical_density,
-        "{{ text_length }}": text_length,
-        "{{ keyword_badges }}": keyword_badges,
-        "{{ reviewer_comments }}": reviewer_comments,
-        "{{ overall_score }}": overall_score,
-        "{{ concurrence }}": concurrence,
-        "{{ comparison_rows }}": comparison_rows
+def build_portfolio_payload(entries):
+    """
+    Packs portfolio entries into the dashboard's columnar payload: one array
+    per summary column, plus one detail record per company with keyword
+    densities stored positionally against a shared keyword list.
+    """
+    keywords = list(dict.fromkeys(kw for entry in entries for kw in entry["keywordDensity"]))
+    details = []
+    for entry in entries:
+        detail = {field: entry[field] for field in _DETAIL_FIELDS}
+        detail["keywordDensity"] = [round(entry["keywordDensity"].get(kw, 0.0), 1) for kw in keywords]
+        details.append(detail)
+
+    return {
+        "generatedAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "keywords": keywords,
+        "summary": {field: [entry[field] for entry in entries] for field in _SUMMARY_FIELDS},
+        "details": details
     }
 
-    for key, value in replacements.items():
-        html_content = html_content.replace(key, str(value))
+def generate_portfolio_dashboard(entries, output_dir, template_path=PORTFOLIO_TEMPLATE_PATH):
+    """
+    Writes a portfolio dashboard for many companies: `portfolio.html`, a
+    fixed shell page, and `portfolio_data.js`, the data payload it loads.
+    The shell renders a sortable summary table and builds a company's full
+    report only when it is selected, so output size grows with the data
+    rather than with one templated page per company.
+
+    Args:
+        entries (list): Dicts from build_portfolio_entry.
+        output_dir (str): Directory to write both files to.
+
+    Returns:
+        str: Path of the dashboard page.
+    """
+    os.makedirs(output_dir, exist_ok=True)
 
-    # 4. Save File
-    output_dir = os.path.dirname(output_path)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    payload = json.dumps(build_portfolio_payload(entries), separators=(',', ':'), ensure_ascii=False)
+    # "</" would end an inline script early if the payload is ever inlined.
+    payload = payload.replace("</", "<\\/")
+    with open(os.path.join(output_dir, "portfolio_data.js"), 'w', encoding='utf-8') as f:
+        f.write("window.PORTFOLIO_DATA = ")
+        f.write(payload)
+        f.write(";\n")
 
-    with open(output_path, 'w') as f:
-        f.write(html_content)
+    dashboard_path = os.path.join(output_dir, "portfolio.html")
+    shutil.copyfile(template_path, dashboard_path)
 
-    print(f"\nHTML Report successfully generated at: {output_path}")
+    print(f"\nPortfolio dashboard for {len(entries)} companies generated at: {dashboard_path}")
+    return dashboard_path
@@ -0,0 +1,119 @@
+# Analysis metrics computed from the shared TokenizedText must match the
+# libraries they replaced.
+
+import json
+import os
+import re
+
+import pytest
+import textstat
+from textblob import TextBlob
+
+from credit_judge_v2.src.processing.analysis import (
+    RISK_KEYWORDS, KeywordMatcher, StreamingReportAnalyzer, TokenizedText, analyze_report_content,
+    build_report_text, calculate_keyword_density, calculate_readability, calculate_sentiment
+)
+from credit_judge_v2.src.processing.corpus_analysis import analyze_corpus
+
+SAMPLE_REPORT = os.path.join(os.path.dirname(__file__), "..", "data", "ai_report.json")
+
+READABILITY_TEXTS = [
+    "Hi.",
+    "a b. c d e f! g?? h...i j k l",
+    "Revenue was $3.5B... (up 12%). Risk/return and cash-flow_ok!",
+    "U.S. G.D.P. grew 2.3% y/y. It's fine, the company's debt-laden balance sheet isn't.",
+    "— • … only punctuation here",
+    "No terminal punctuation at all in this fairly long run of words",
+]
+
+@pytest.mark.parametrize("text", READABILITY_TEXTS)
+def test_readability_matches_textstat(text):
+    assert calculate_readability(text) == textstat.flesch_reading_ease(text)
+
+def test_readability_matches_textstat_on_sample_report():
+    with open(SAMPLE_REPORT) as f:
+        text = build_report_text(json.load(f))
+    assert calculate_readability(TokenizedText(text)) == textstat.flesch_reading_ease(text)
+
+@pytest.mark.parametrize("text", READABILITY_TEXTS)
+def test_joined_parts_match_whole_text(text):
+    parts = [TokenizedText(part) for part in text.split(" ")]
+    assert calculate_readability(TokenizedText.join(parts)) == calculate_readability(text)
+
+SENTIMENT_TEXTS = [
+    "The firm's results weren't great.",
+    "It isn't good. We don't expect a very strong year, but it's not bad!",
+    "Management's \"excellent\" guidance, e.g. margins, isn't 'credible'... Really?!",
+    "U.S. demand is strong — Mr. Smith’s “fine” outlook\n\nHeading without a period\nnever good",
+    "Outlook: D (2018) was terrible :) and great (!) growth",
+]
+
+@pytest.mark.parametrize("text", SENTIMENT_TEXTS)
+def test_sentiment_matches_textblob(text):
+    expected = TextBlob(text).sentiment
+    assert calculate_sentiment(text) == {"polarity": expected.polarity, "subjectivity": expected.subjectivity}
+
+def test_sentiment_matches_textblob_on_sample_report():
+    with open(SAMPLE_REPORT) as f:
+        text = build_report_text(json.load(f))
+    expected = TextBlob(text).sentiment
+    assert calculate_sentiment(TokenizedText(text)) == {"polarity": expected.polarity, "subjectivity": expected.subjectivity}
+
+@pytest.mark.parametrize("text", SENTIMENT_TEXTS)
+def test_joined_parts_match_whole_text_sentiment(text):
+    parts = [TokenizedText(part) for part in text.split(" ")]
+    assert calculate_sentiment(TokenizedText.join(parts)) == calculate_sentiment(text)
+
+def test_streaming_analysis_matches_batch_analysis():
+    with open(SAMPLE_REPORT) as f:
+        report = json.load(f)
+    analyzer = StreamingReportAnalyzer()
+    for key, value in report.items():
+        analyzer.add_section(key, value)
+    assert analyzer.finish(report) == analyze_report_content(report)
+
+KEYWORD_TEXT = (
+    "Risk/return trade-offs, cash-flow risks; brisk losses (loss) and debt-laden DEBT. "
+    "Burned? burn_rate Burns! risk_free, the company's risk's and Free Cash Flow."
+)
+KEYWORDS = RISK_KEYWORDS + ("cash flow", "cash", "trade-off")
+
+def _regex_counts(text, keywords):
+    # Whole-word matches with simple plurals, the reference the matcher must reproduce.
+    counts = {}
+    for keyword in keywords:
+        words = r"\W+".join(re.escape(word) for word in re.findall(r"\w+", keyword.lower()))
+        counts[keyword] = len(re.findall(rf"\b{words}(?:e?s)?\b", text.lower()))
+    return counts
+
+def test_keyword_counts_match_regex():
+    matcher = KeywordMatcher(KEYWORDS)
+    expected = _regex_counts(KEYWORD_TEXT, KEYWORDS)
+    assert matcher.count(KEYWORD_TEXT.lower()) == expected
+    assert matcher.count(KEYWORD_TEXT.lower(), tokens=re.findall(r"\w+", KEYWORD_TEXT.lower())) == expected
+    # "risk/return", "risks" and "risk's", but not "brisk" or "risk_free".
+    assert expected["risk"] == 3
+    assert expected["cash"] == expected["cash flow"] == 2
+
+def test_single_words_and_phrases_share_the_plural_rule():
+    # Every "flow" follows "cash", so the tallied word and the matched phrase
+    # must see the same plural forms.
+    text = "cash flow, cash flows; cash flowes. cash-flowss cash flowing cash_flow"
+    counts = KeywordMatcher(("flow", "cash flow")).count(text)
+    assert counts["flow"] == counts["cash flow"] == 3
+
+def test_counts_do_not_depend_on_keyword_set_size():
+    many = KEYWORDS + tuple(f"term{i}" for i in range(500))
+    assert {keyword: KeywordMatcher(many).count(KEYWORD_TEXT.lower())[keyword] for keyword in KEYWORDS} == \
+        KeywordMatcher(KEYWORDS).count(KEYWORD_TEXT.lower())
+
+def test_keyword_density_tokenizes_like_the_matcher():
+    words = len(KEYWORD_TEXT.split())
+    expected = {keyword: count / words * 1000 for keyword, count in _regex_counts(KEYWORD_TEXT, RISK_KEYWORDS).items()}
+    assert calculate_keyword_density(KEYWORD_TEXT, RISK_KEYWORDS) == expected
+    assert calculate_keyword_density(TokenizedText(KEYWORD_TEXT), RISK_KEYWORDS) == expected
+
+def test_corpus_keyword_density_matches_single_report():
+    result = analyze_corpus([{"overview": KEYWORD_TEXT}], KEYWORDS)
+    single = calculate_keyword_density(KEYWORD_TEXT, KEYWORDS)
+    assert result["keyword_density"][0] == pytest.approx([single[keyword] for keyword in KEYWORDS])
@@ -0,0 +1,52 @@
+# Leverage cross-checks compare the stated multiple on the basis it states.
+
+import json
+import os
+
+from credit_judge_v2.src.processing.financials import financial_columns, find_inconsistencies
+
+SAMPLE_REPORT = os.path.join(os.path.dirname(__file__), "..", "data", "ai_report.json")
+
+def _leverage_flags(financial_performance):
+    columns = financial_columns([{"tickerSymbol": "TEST", "financialPerformance": financial_performance}])
+    return [flag for flag in find_inconsistencies(columns) if flag["check"] == "leverage"]
+
+def test_ttm_gross_leverage_next_to_quarterly_ebitda_is_not_flagged():
+    with open(SAMPLE_REPORT, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    columns = financial_columns([report])
+    assert columns["leverage_ebitda"][0] == 250e6
+    assert find_inconsistencies(columns) == []
+
+def test_leverage_uses_the_ebitda_stated_with_it():
+    assert _leverage_flags({
+        "adjustedEBITDA": {"amount": "95M", "period": "Q3 2024"},
+        "leverage": {"netDebt": "700M", "debtToEbitda": "Net Debt / TTM EBITDA of $250M approx. 2.8x"}
+    }) == []
+    assert _leverage_flags({
+        "adjustedEBITDA": {"amount": "95M", "period": "Q3 2024"},
+        "leverage": {"netDebt": "700M", "debtToEbitda": "Net Debt / TTM EBITDA of $250M approx. 5.6x"}
+    }) == [{"ticker": "TEST", "check": "leverage", "stated": 5.6, "implied": 2.8}]
+
+def test_leverage_on_quarterly_ebitda_alone_is_skipped():
+    assert _leverage_flags({
+        "adjustedEBITDA": {"amount": "95M", "period": "Q3 2024"},
+        "leverage": {"netDebt": "700M", "debtToEbitda": "Net Debt / EBITDA approx. 1.8x"}
+    }) == []
+
+def test_annual_net_leverage_is_checked():
+    assert _leverage_flags({"adjustedEBITDA": "14.2B", "netDebt": "1.4B", "leverage": "0.1x"}) == []
+    assert _leverage_flags({"adjustedEBITDA": "14.2B", "netDebt": "28.4B", "leverage": "0.1x"}) == [
+        {"ticker": "TEST", "check": "leverage", "stated": 0.1, "implied": 2.0}
+    ]
+
+def test_gross_leverage_uses_total_debt():
+    financial_performance = {
+        "adjustedEBITDA": {"amount": "1B", "period": "FY2024"},
+        "leverage": {"netDebt": "1B", "debtToEbitda": "Total Debt / EBITDA approx. 3.0x"}
+    }
+    assert _leverage_flags(financial_performance) == []
+    financial_performance["leverage"]["totalDebt"] = "3B"
+    assert _leverage_flags(financial_performance) == []
+    financial_performance["leverage"]["totalDebt"] = "6B"
+    assert _leverage_flags(financial_performance) == [{"ticker": "TEST", "check": "leverage", "stated": 3.0, "implied": 6.0}]
@@ -0,0 +1,21 @@
+# Process-wide state in llm_handler shared by concurrent batch workers.
+
+import threading
+
+from credit_judge_v2.src.llm_interface import llm_handler
+
+def test_missing_key_warning_printed_once_across_threads(capsys, monkeypatch):
+    monkeypatch.setattr(llm_handler, "_warned_missing_key", False)
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        llm_handler._warn_missing_key()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert capsys.readouterr().out.count("OPENAI_API_KEY not found") == 1
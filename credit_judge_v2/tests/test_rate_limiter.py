@@ -0,0 +1,63 @@
+# Retry-After handling against a fake endpoint that answers 429 until it recovers.
+
+import threading
+import time
+
+import pytest
+
+from credit_judge_v2.src.llm_interface.rate_limiter import RateLimitScheduler, TokenBucket
+from credit_judge_v2.src.llm_interface.replay_backend import InjectedRateLimitError
+
+class FakeEndpoint:
+    """
+    Holds the first `concurrent` requests until all of them have arrived and
+    rejects them together with a 429 and a Retry-After, as an overloaded
+    server does; later requests succeed.
+    """
+
+    def __init__(self, concurrent, retry_after):
+        self.retry_after = retry_after
+        self.rejected = 0
+        self.accepted = []
+        self._arrivals = threading.Barrier(concurrent)
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            reject = self.rejected < self._arrivals.parties
+            if reject:
+                self.rejected += 1
+            else:
+                self.accepted.append(time.monotonic())
+        if reject:
+            self._arrivals.wait(timeout=5)
+            raise InjectedRateLimitError(retry_after=self.retry_after)
+        return "ok"
+
+def test_paused_bucket_releases_one_reservation_at_a_time():
+    bucket = TokenBucket(per_minute=600, capacity=5)
+    bucket.pause(1.0)
+    waits = [bucket.reserve(1) for _ in range(3)]
+    assert waits == pytest.approx([1.1, 1.2, 1.3], abs=0.02)
+
+def test_retry_after_releases_waiting_callers_at_the_request_rate():
+    workers = 8
+    # Burst capacity lets every worker reach the endpoint at once, so all of them get the 429.
+    scheduler = RateLimitScheduler(requests_per_minute=1200, tokens_per_minute=10**9, burst=workers)
+    endpoint = FakeEndpoint(concurrent=workers, retry_after=0.2)
+    start = time.monotonic()
+
+    threads = [threading.Thread(target=scheduler.call, args=(endpoint,), kwargs={"estimated_tokens": 1})
+               for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    accepted = sorted(endpoint.accepted)
+    assert endpoint.rejected == workers
+    assert len(accepted) == workers
+    assert accepted[0] - start >= 0.2
+    # Requests resume 1/20 s apart instead of as one burst when the pause ends.
+    gaps = [later - earlier for earlier, later in zip(accepted, accepted[1:])]
+    assert min(gaps) >= 0.03
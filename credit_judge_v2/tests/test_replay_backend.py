@@ -0,0 +1,159 @@
+# Recording completions and replaying them offline with seeded latency and injected errors.
+
+import json
+import random
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from credit_judge_v2.src.llm_interface.replay_backend import (
+    InjectedRateLimitError, InjectedTimeoutError, RecordingClient, RecordingStore, ReplayClient,
+    load_scenarios, parse_error_rates, synthesize_report
+)
+from credit_judge_v2.src.processing.schema import REPORT_VALIDATOR
+from credit_judge_v2.src.prompts.prompts import get_report_generation_prompt
+
+def _request(company, ticker, stream=False):
+    kwargs = {
+        "model": "gpt-4-turbo",
+        "messages": [{"role": "system", "content": "You are a credit analyst."},
+                     {"role": "user", "content": get_report_generation_prompt(company, ticker)}],
+        "response_format": {"type": "json_object"}
+    }
+    if stream:
+        kwargs["stream"] = True
+    return kwargs
+
+class FakeOpenAI:
+    """Answers every request with a fixed report per ticker, streamed or not."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def content_for(kwargs):
+        return json.dumps({"prompt": kwargs["messages"][-1]["content"][-40:]})
+
+    def create(self, **kwargs):
+        content = self.content_for(kwargs)
+        if kwargs.get("stream"):
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 7]))])
+                         for i in range(0, len(content), 7)])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _outcome(client, kwargs):
+    try:
+        return client.create(**kwargs).choices[0].message.content
+    except InjectedRateLimitError:
+        return "429"
+    except InjectedTimeoutError:
+        return "timeout"
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordingStore(str(tmp_path / "recordings.sqlite3"))
+    yield store
+    store.close()
+
+def test_replay_serves_what_was_recorded(store):
+    recorder = RecordingClient(FakeOpenAI(), store)
+    plain, streamed = _request("Acme Corp", "ACME"), _request("Beta Inc.", "BETA", stream=True)
+    recorder.create(**plain)
+    stream = recorder.create(**streamed)
+    assert "".join(event.choices[0].delta.content for event in stream) == FakeOpenAI.content_for(streamed)
+    assert len(store) == 2
+
+    replay = ReplayClient(store=store, latency="none")
+
+    assert replay.create(**plain).choices[0].message.content == FakeOpenAI.content_for(plain)
+    replayed = "".join(event.choices[0].delta.content for event in replay.create(**streamed))
+    assert replayed == FakeOpenAI.content_for(streamed)
+    assert replay.stats()["recorded"] == 2
+    assert replay.stats()["synthesized"] == 0
+
+def test_replay_is_deterministic_for_a_seed_whatever_the_interleaving():
+    requests = [_request(f"Company {i}", f"T{i}") for i in range(40)]
+    errors = "429=0.2,timeout=0.1,malformed=0.1"
+
+    sequential = ReplayClient(latency="uniform:0.1,2.0", latency_scale=0, error_rates=errors, seed=7)
+    expected = {i: [_outcome(sequential, kwargs) for _ in range(3)] for i, kwargs in enumerate(requests)}
+
+    threaded = ReplayClient(latency="uniform:0.1,2.0", latency_scale=0, error_rates=errors, seed=7)
+    order = [i for i in range(len(requests)) for _ in range(3)]
+    random.Random(1).shuffle(order)
+    outcomes = {i: [] for i in range(len(requests))}
+    lock = threading.Lock()
+
+    def worker(positions):
+        for i in positions:
+            result = _outcome(threaded, requests[i])
+            with lock:
+                outcomes[i].append(result)
+
+    threads = [threading.Thread(target=worker, args=(order[n::4],)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Attempts of one request are numbered in the order they arrive, so compare them as a multiset.
+    assert {i: sorted(results) for i, results in outcomes.items()} == {i: sorted(results) for i, results in expected.items()}
+    assert threaded.stats() == sequential.stats()
+
+    other_seed = ReplayClient(latency="none", error_rates=errors, seed=8)
+    assert [_outcome(other_seed, kwargs) for kwargs in requests] != [results[0] for results in expected.values()]
+
+def test_errors_are_injected_at_the_configured_rates():
+    rates = parse_error_rates("429=0.1,timeout=0.05,malformed=0.05")
+    client = ReplayClient(latency="none", error_rates=rates, seed=3)
+    total = 3000
+
+    malformed = 0
+    for i in range(total):
+        outcome = _outcome(client, _request(f"Company {i}", f"T{i}"))
+        if outcome not in ("429", "timeout"):
+            try:
+                json.loads(outcome)
+            except json.JSONDecodeError:
+                malformed += 1
+
+    stats = client.stats()
+    assert stats["requests"] == total
+    assert stats["malformed"] == malformed
+    for kind, rate in rates.items():
+        assert stats[kind] / total == pytest.approx(rate, abs=0.02)
+    assert stats["synthesized"] == total - sum(stats[kind] for kind in rates)
+
+def test_error_rates_are_validated():
+    with pytest.raises(ValueError):
+        parse_error_rates("500=0.1")
+    with pytest.raises(ValueError):
+        parse_error_rates("429=0.7,timeout=0.5")
+
+def test_unknown_tickers_get_a_valid_report_styled_on_a_scenario():
+    scenarios = load_scenarios()
+    assert "ZZZZ" not in scenarios and scenarios
+    client = ReplayClient(scenarios=scenarios, latency="none", seed=5)
+
+    report = json.loads(client.create(**_request("Zeta Holdings", "ZZZZ")).choices[0].message.content)
+
+    assert REPORT_VALIDATOR.is_valid(report)
+    assert (report["companyName"], report["tickerSymbol"]) == ("Zeta Holdings", "ZZZZ")
+    industries = {profile.get("industry") for profile in scenarios.values()}
+    assert report["overview"].split("operates in the ", 1)[1].split(" sector")[0] in industries
+    again = ReplayClient(scenarios=scenarios, latency="none", seed=5)
+    assert json.loads(again.create(**_request("Zeta Holdings", "ZZZZ")).choices[0].message.content) == report
+
+def test_synthesized_reports_are_consistent_without_a_profile():
+    report = synthesize_report("Example Corp.", "EXMPL", seed=1)
+
+    assert REPORT_VALIDATOR.is_valid(report)
+    assert synthesize_report("Example Corp.", "EXMPL", seed=1) == report
+    assert synthesize_report("Example Corp.", "EXMPL", seed=2) != report
+    leverage = report["financialPerformance"]["leverage"]
+    stated = float(leverage["debtToEbitda"].rsplit(" ", 1)[1].rstrip("x"))
+    net_debt = float(leverage["netDebt"].split()[0]) * (1e9 if "Billion" in leverage["netDebt"] else 1e6)
+    ebitda_text = report["financialPerformance"]["adjustedEBITDA"]["amount"]
+    ebitda = float(ebitda_text.split()[0]) * (1e9 if "Billion" in ebitda_text else 1e6)
+    assert net_debt / ebitda == pytest.approx(stated, rel=0.1)
@@ -0,0 +1,94 @@
+# TTL expiry and LRU eviction of the on-disk LLM response cache.
+
+from types import SimpleNamespace
+
+import pytest
+
+from credit_judge_v2.src.llm_interface import response_cache
+from credit_judge_v2.src.llm_interface.response_cache import ResponseCache, make_cache_key
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=clock))
+    return clock
+
+def _open(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / "responses.sqlite3"), **kwargs)
+
+def test_cache_key_depends_on_every_request_field():
+    key = make_cache_key("model", "system", "prompt", {"type": "json_object"})
+    assert key == make_cache_key("model", "system", "prompt", {"type": "json_object"})
+    assert len({key, make_cache_key("other", "system", "prompt", {"type": "json_object"}),
+                make_cache_key("model", None, "prompt", {"type": "json_object"}),
+                make_cache_key("model", "system", "prompt ", {"type": "json_object"}),
+                make_cache_key("model", "system", "prompt", None)}) == 5
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = _open(tmp_path, ttl_seconds=60)
+    cache.set("a", "first")
+
+    clock.now += 60
+    assert cache.get("a") == "first"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 0}
+
+    # Reading an entry does not extend its life; writing it again does.
+    cache.set("b", "second")
+    clock.now += 59
+    assert cache.get("b") == "second"
+    clock.now += 2
+    assert cache.get("b") is None
+    cache.close()
+
+def test_ttl_none_never_expires(tmp_path, clock):
+    cache = _open(tmp_path, ttl_seconds=None)
+    cache.set("a", "value")
+    clock.now += 10 ** 9
+    assert cache.get("a") == "value"
+    cache.close()
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = _open(tmp_path, max_entries=3)
+    for key in "abc":
+        clock.now += 1
+        cache.set(key, key.upper())
+    clock.now += 1
+    assert cache.get("a") == "A"
+
+    clock.now += 1
+    cache.set("d", "D")
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+    assert cache.stats()["entries"] == 3
+
+    # Overwriting a key does not count as a new entry.
+    clock.now += 1
+    cache.set("d", "D2")
+    assert cache.stats()["entries"] == 3
+    assert cache.get("a") == "A"
+    cache.close()
+
+def test_bound_holds_across_processes_sharing_the_database(tmp_path, clock):
+    # Two connections to one file stand in for two processes; each one's
+    # inserts must count towards the other's bound.
+    first = _open(tmp_path, max_entries=5)
+    second = _open(tmp_path, max_entries=5)
+    for i in range(20):
+        clock.now += 1
+        (first if i % 2 else second).set(f"key{i}", str(i))
+
+    assert first.stats()["entries"] == second.stats()["entries"] == 5
+    assert [first.get(f"key{i}") for i in range(15, 20)] == [str(i) for i in range(15, 20)]
+    assert second.get("key14") is None
+    first.close()
+    second.close()
@@ -0,0 +1,48 @@
+# Section similarity in the console comparison.
+
+import json
+import os
+import sys
+
+from credit_judge_poc.evaluation_poc import evaluate_judge_outputs
+from credit_judge_v2.evaluation import evaluator
+from credit_judge_v2.src.processing import similarity
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+def _load_pair():
+    with open(os.path.join(DATA_DIR, "ai_report.json")) as f:
+        ai_report = json.load(f)
+    with open(os.path.join(DATA_DIR, "gold_standards", "draftkings.json")) as f:
+        gold_standard = json.load(f)
+    return ai_report, gold_standard
+
+def test_display_does_not_create_an_embedding_cache(tmp_path, monkeypatch, capsys):
+    cache_path = tmp_path / "embeddings.sqlite3"
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(cache_path))
+    monkeypatch.setattr(similarity, "_embedding_cache", None)
+
+    evaluator.display_qualitative_comparison(*_load_pair())
+
+    assert "Semantic Similarity to AI Content" in capsys.readouterr().out
+    assert not cache_path.exists()
+
+def test_display_uses_a_cache_passed_by_the_caller(tmp_path, capsys):
+    cache = similarity.EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    evaluator.display_qualitative_comparison(*_load_pair(), embedding_cache=cache)
+    assert cache.stats()["entries"] > 0
+
+def test_poc_comparison_uses_v2_scores(capsys):
+    ai_report, gold_standard = _load_pair()
+    assert evaluate_judge_outputs.section_similarity(ai_report, gold_standard) == similarity.score_sections(ai_report, gold_standard)
+    evaluate_judge_outputs.display_qualitative_comparison(ai_report, gold_standard)
+    assert "Semantic Similarity to AI Content" in capsys.readouterr().out
+
+def test_poc_comparison_runs_without_numpy(monkeypatch, capsys):
+    # A None entry in sys.modules makes the import raise ImportError.
+    monkeypatch.setitem(sys.modules, "credit_judge_v2.src.processing.similarity", None)
+    ai_report, gold_standard = _load_pair()
+    assert evaluate_judge_outputs.section_similarity(ai_report, gold_standard) == {}
+    evaluate_judge_outputs.display_qualitative_comparison(ai_report, gold_standard)
+    out = capsys.readouterr().out
+    assert "Section-by-Section" in out and "Semantic Similarity" not in out
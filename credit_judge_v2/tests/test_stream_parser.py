@@ -0,0 +1,83 @@
+# SectionStreamParser against json.loads over random splits of the same text.
+
+import json
+import random
+
+import pytest
+
+from credit_judge_v2.src.llm_interface.stream_parser import SectionStreamParser
+
+DOCUMENTS = [
+    {},
+    {"overview": "Plain text."},
+    {
+        "overview": "Quotes \" and backslashes \\ and escapes \n\t é 😀 } ] {",
+        "corporateCreditRating": {"rating": "BB+", "outlook": "Stable", "drivers": ["a", {"b": [1, 2, {"c": "}"}]}]},
+        "financialPerformance": {"revenue": "1.2B", "leverage": 5.6, "nested": [[[]], {}]},
+        "count": -12,
+        "ratio": 1.5e-3,
+        "flags": [True, False, None],
+        "empty": "",
+        "done": True,
+        "missing": None,
+        "\"odd key\\": 0,
+    },
+]
+
+def _random_chunks(text, rng):
+    chunks, pos = [], 0
+    while pos < len(text):
+        size = rng.choice((1, 1, 2, 3, 7, 40))
+        chunks.append(text[pos:pos + size])
+        pos += size
+    return chunks
+
+def _parse(chunks):
+    parser = SectionStreamParser()
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    return parser, members, parser.close()
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_random_chunkings_match_json_loads(document, indent):
+    text = json.dumps(document, indent=indent, ensure_ascii=False)
+    expected = json.loads(text)
+    rng = random.Random(len(text))
+    for _ in range(200):
+        parser, members, result = _parse(_random_chunks(text, rng))
+        assert result == expected
+        assert members == list(expected.items())
+        assert parser.text == text
+
+@pytest.mark.parametrize("text", [
+    '[1, 2]',
+    '{"a" 1}',
+    '{"a": 1 "b": 2}',
+    '{"a": tru}',
+    '{"a": [1, 2,]}',
+    '{a: 1}',
+    '{"a": 1}}',
+])
+def test_malformed_input_raises(text):
+    rng = random.Random(0)
+    for _ in range(20):
+        with pytest.raises(json.JSONDecodeError):
+            _parse(_random_chunks(text, rng))
+
+def test_unterminated_object_raises_on_close():
+    parser = SectionStreamParser()
+    assert parser.feed('{"overview": "x", "b": [1') == [("overview", "x")]
+    with pytest.raises(json.JSONDecodeError) as error:
+        parser.close()
+    assert error.value.pos == len(parser.text)
+
+def test_error_position_is_absolute():
+    text = '{"a": "xxxxxxxx", "b": tru}'
+    parser = SectionStreamParser()
+    with pytest.raises(json.JSONDecodeError) as error:
+        for chunk in _random_chunks(text, random.Random(1)):
+            parser.feed(chunk)
+        parser.close()
+    assert error.value.pos == text.index("tru")